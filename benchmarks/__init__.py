@@ -0,0 +1,9 @@
+"""
+In-process load tests for the profile API.
+
+Run ``python -m benchmarks --help``. A fixed synthetic dataset is seeded
+into a throwaway database, every GET route in ``profiles/urls.py`` (or a
+recorded JSONL traffic file) is driven through the WSGI or ASGI handler,
+and per-endpoint latency percentiles, throughput and SQL queries per
+request are reported and optionally compared against a saved baseline.
+"""
@@ -0,0 +1,108 @@
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Load-test the profile API in-process and report per-endpoint latency.',
+    )
+    parser.add_argument('--profiles', type=int, default=200, help='Synthetic profiles to seed')
+    parser.add_argument('--seed', type=int, default=42, help='Dataset random seed')
+    parser.add_argument('--requests', type=int, default=50, help='Measured requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=4, help='Concurrent in-flight requests')
+    parser.add_argument('--warmup', type=int, default=3, help='Unmeasured requests per endpoint')
+    parser.add_argument('--mode', choices=['wsgi', 'asgi'], default='wsgi',
+                        help='Handler to drive requests through')
+    parser.add_argument('--replay', help='JSONL file of recorded requests to replay instead of all routes')
+    parser.add_argument('--only', action='append', default=[], help='Limit to these URL names')
+    parser.add_argument('--lean', action='store_true',
+                        help='Also run every endpoint with ?lean=1 as "<name>[lean]"')
+    parser.add_argument('--response-cache', default='dummy',
+                        help='RESPONSE_CACHE_BACKEND to run with (default: dummy, i.e. uncached)')
+    parser.add_argument('--throttle-cache', default='dummy',
+                        help='THROTTLE_CACHE_BACKEND to run with (default: dummy, i.e. unthrottled)')
+    parser.add_argument('--baseline', help='Baseline JSON to compare against')
+    parser.add_argument('--save-baseline', help='Write this run as a baseline JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed relative p95 growth before flagging a regression')
+    parser.add_argument('--json', dest='json_output', help='Also write results as JSON to this file')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'playground.settings')
+    os.environ['RESPONSE_CACHE_BACKEND'] = args.response_cache
+    os.environ['THROTTLE_CACHE_BACKEND'] = args.throttle_cache
+
+    import django
+    from django.conf import settings
+
+    django.setup()
+    from django.test.utils import setup_test_environment
+
+    from profiles import endpoints
+
+    from . import report, runner
+
+    records = None
+    if args.replay:
+        try:
+            records = runner.load_replay(args.replay)
+        except ValueError as exc:
+            print(f'--replay: {exc}', file=sys.stderr)
+            return 2
+
+    setup_test_environment()
+    settings.ALLOWED_HOSTS = ['*']
+    settings.DEBUG = False
+    # A file database, so concurrent workers behave as in production.
+    workdir = tempfile.mkdtemp(prefix='profiles-bench-')
+    for alias, database in settings.DATABASES.items():
+        database.setdefault('TEST', {})
+        if not database['TEST'].get('MIRROR'):
+            database['TEST']['NAME'] = os.path.join(workdir, f'{alias}.sqlite3')
+
+    samples = endpoints.seed(args.profiles, args.seed)
+    runner.install_query_counter()
+
+    if records is not None:
+        groups = runner.group_replay(records)
+    else:
+        groups = {
+            name: [{'request_id': f'{name}-{i}', 'method': 'GET', 'path': path}
+                   for i in range(args.requests)]
+            for name, path in endpoints.discover_endpoints(samples)
+        }
+    if args.only:
+        groups = {name: records for name, records in groups.items() if name in args.only}
+    if args.lean:
+        groups = runner.with_lean_variants(groups)
+
+    results = runner.Runner(args.mode, args.concurrency, args.warmup).run(groups)
+    print(report.format_table(results))
+
+    meta = {key: getattr(args, key) for key in ('profiles', 'seed', 'requests', 'concurrency', 'mode')}
+    if args.json_output:
+        report.save_baseline(args.json_output, results, meta)
+    if args.save_baseline:
+        report.save_baseline(args.save_baseline, results, meta)
+        print(f'Baseline written to {args.save_baseline}')
+    if args.baseline:
+        regressions = report.compare(results, report.load_baseline(args.baseline), args.tolerance)
+        if regressions:
+            print('\nRegressions:')
+            for line in regressions:
+                print(f'  {line}')
+            return 1
+        print('\nNo regressions against baseline.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+import json
+import math
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of an unsorted list"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+class EndpointStats:
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.queries = []
+        self.statuses = {}
+        self.wall_time = 0.0
+
+    def record(self, latency, queries, status):
+        self.latencies.append(latency)
+        self.queries.append(queries)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def summary(self):
+        count = len(self.latencies)
+        return {
+            'requests': count,
+            'p50_ms': round(percentile(self.latencies, 0.50) * 1000, 3),
+            'p95_ms': round(percentile(self.latencies, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(self.latencies, 0.99) * 1000, 3),
+            'rps': round(count / self.wall_time, 1) if self.wall_time else 0.0,
+            'queries_per_request': round(sum(self.queries) / count, 2) if count else 0.0,
+            'statuses': {str(status): n for status, n in sorted(self.statuses.items())},
+        }
+
+
+def format_table(results):
+    header = f"{'endpoint':<34} {'reqs':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rps':>9} {'q/req':>7}"
+    lines = [header, '-' * len(header)]
+    for name, row in results.items():
+        lines.append(
+            f"{name:<34} {row['requests']:>6} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} "
+            f"{row['p99_ms']:>9.2f} {row['rps']:>9.1f} {row['queries_per_request']:>7.2f}"
+        )
+    return '\n'.join(lines)
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)['endpoints']
+
+
+def save_baseline(path, results, meta):
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump({'meta': meta, 'endpoints': results}, handle, indent=2, sort_keys=True)
+
+
+def compare(results, baseline, tolerance=0.2):
+    """
+    Regressions against a baseline, as human-readable strings.
+
+    Latency regresses when p95 grows by more than ``tolerance``; query
+    counts regress on any increase, since they are deterministic.
+    """
+    regressions = []
+    for name, row in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if row['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {before['p95_ms']:.2f}ms -> {row['p95_ms']:.2f}ms"
+            )
+        if row['queries_per_request'] > before['queries_per_request']:
+            regressions.append(
+                f"{name}: queries/request {before['queries_per_request']} -> {row['queries_per_request']}"
+            )
+    return regressions
@@ -0,0 +1,183 @@
+import asyncio
+import contextvars
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client
+from django.urls import resolve
+
+from .report import EndpointStats
+
+_query_counter = contextvars.ContextVar('benchmark_query_counter', default=None)
+
+
+def _count_queries(execute, sql, params, many, context):
+    counter = _query_counter.get()
+    if counter is not None:
+        counter[0] += 1
+    return execute(sql, params, many, context)
+
+
+def _install_counter(sender=None, connection=None, **kwargs):
+    if _count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_queries)
+
+
+def install_query_counter():
+    """
+    Count queries on every connection, present and future.
+
+    The counter lives in a context variable, which asgiref copies into the
+    threads running sync code, so counts are per request in both modes.
+    """
+    connection_created.connect(_install_counter, weak=False)
+    for connection in connections.all(initialized_only=True):
+        _install_counter(connection=connection)
+
+
+def load_replay(path):
+    """
+    Requests recorded as JSONL, one object per line with ``path`` and
+    optional ``request_id``, ``method`` (default GET), ``body`` and
+    ``headers``, e.g. ``{"method": "GET", "path": "/api/skills/?level=expert"}``.
+
+    Lines without a ``path`` are skipped; a file with none at all raises
+    ``ValueError``, since it is not a request log.
+    """
+    records = []
+    skipped = 0
+    with open(path, encoding='utf-8') as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if 'path' in record:
+                records.append(record)
+            else:
+                skipped += 1
+    if not records:
+        raise ValueError(f'{path}: no line has a "path" ({skipped} lines skipped)')
+    return records
+
+
+class Runner:
+    """Drive requests through the in-process WSGI or ASGI handler"""
+
+    def __init__(self, mode='wsgi', concurrency=4, warmup=3):
+        self.mode = mode
+        self.concurrency = concurrency
+        self.warmup = warmup
+        self._local = threading.local()
+
+    def _client(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = Client()
+        return client
+
+    def _request_sync(self, record):
+        counter = [0]
+        token = _query_counter.set(counter)
+        try:
+            started = time.perf_counter()
+            response = self._client().generic(
+                record.get('method', 'GET').upper(), record['path'],
+                data=json.dumps(record['body']) if 'body' in record else '',
+                content_type='application/json',
+                **{f'HTTP_{k.upper().replace("-", "_")}': v for k, v in record.get('headers', {}).items()},
+            )
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            elapsed = time.perf_counter() - started
+        finally:
+            _query_counter.reset(token)
+        return elapsed, counter[0], response.status_code
+
+    async def _request_async(self, client, record):
+        counter = [0]
+        token = _query_counter.set(counter)
+        try:
+            started = time.perf_counter()
+            response = await client.generic(
+                record.get('method', 'GET').upper(), record['path'],
+                data=json.dumps(record['body']) if 'body' in record else '',
+                content_type='application/json',
+                headers=record.get('headers'),
+            )
+            if response.streaming:
+                async for _ in response.streaming_content:
+                    pass
+            elapsed = time.perf_counter() - started
+        finally:
+            _query_counter.reset(token)
+        return elapsed, counter[0], response.status_code
+
+    def run(self, groups):
+        """
+        Run ``{name: [record, ...]}`` group by group.
+
+        Each group's records are spread over ``concurrency`` workers and its
+        wall time is measured separately, so throughput is per endpoint.
+        """
+        results = {}
+        for name, records in groups.items():
+            stats = EndpointStats(name)
+            for record in records[:self.warmup]:
+                self.execute([record])
+            started = time.perf_counter()
+            for outcome in self.execute(records):
+                stats.record(*outcome)
+            stats.wall_time = time.perf_counter() - started
+            results[name] = stats.summary()
+        return results
+
+    def execute(self, records):
+        if self.mode == 'asgi':
+            return asyncio.run(self._execute_async(records))
+        with ThreadPoolExecutor(self.concurrency) as pool:
+            return list(pool.map(self._request_sync, records))
+
+    async def _execute_async(self, records):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(record):
+            async with semaphore:
+                return await self._request_async(client, record)
+
+        return await asyncio.gather(*(bounded(record) for record in records))
+
+
+def with_lean_variants(groups):
+    """
+    Interleave a ``<name>[lean]`` copy of every GET group with ``lean=1``
+    added, so the table shows each endpoint's full and lean paths together.
+    """
+    variants = {}
+    for name, records in groups.items():
+        variants[name] = records
+        if any(record.get('method', 'GET').upper() != 'GET' for record in records):
+            continue
+        variants[f'{name}[lean]'] = [
+            {**record, 'path': record['path'] + ('&' if '?' in record['path'] else '?') + 'lean=1'}
+            for record in records
+        ]
+    return variants
+
+
+def group_replay(records):
+    """Group recorded requests by the URL name they resolve to"""
+    groups = {}
+    for record in records:
+        try:
+            name = resolve(record['path'].split('?', 1)[0]).url_name or record['path']
+        except Exception:
+            name = 'unresolved'
+        groups.setdefault(name, []).append(record)
+    return groups
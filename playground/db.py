@@ -0,0 +1,63 @@
+"""
+Database routing between the writable ``default`` alias and the read-only
+``readonly`` alias.
+
+Both aliases open the same SQLite file. In WAL mode readers never wait for
+the writer, so safe-method requests read through ``readonly``, whose
+connections are also opened with ``PRAGMA query_only``. Everything else,
+including reads made while handling a POST/PUT/PATCH/DELETE, stays on
+``default`` so a request always sees its own writes.
+"""
+import contextvars
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+READ_ONLY_ALIAS = 'readonly'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_read_only = contextvars.ContextVar('playground_read_only_request', default=False)
+
+
+class ReadOnlyRequestMiddleware:
+    """Route the ORM reads of safe-method requests to the read-only alias"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _read_only.set(request.method in SAFE_METHODS)
+        try:
+            return self.get_response(request)
+        finally:
+            _read_only.reset(token)
+
+
+class ReadReplicaRouter:
+    """
+    Reads go to ``readonly`` inside a safe-method request, writes and
+    migrations always to ``default``.
+
+    Outside a request (management commands, shell, signal handlers run
+    after a write) and inside an open transaction nothing is routed, so
+    behaviour is unchanged.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not _read_only.get() or READ_ONLY_ALIAS not in settings.DATABASES:
+            return None
+        # Inside a transaction (including the one TestCase wraps every test
+        # in) only ``default`` can see the uncommitted rows.
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return READ_ONLY_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases are the same database.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != READ_ONLY_ALIAS
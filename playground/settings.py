@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,6 +44,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'profiles.middleware.ServerTimingMiddleware',
+    'profiles.middleware.CompressionMiddleware',
+    'playground.db.ReadOnlyRequestMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -75,14 +79,117 @@ WSGI_APPLICATION = 'playground.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+#
+# Every SQLite connection runs SQLITE_PRAGMAS when it is opened. WAL lets
+# readers proceed while a write is in progress; synchronous=NORMAL is
+# durable across application crashes in WAL mode (only a power loss can
+# drop the last commits). Writes take the lock up front (IMMEDIATE) so
+# concurrent writers wait out busy_timeout instead of failing to upgrade a
+# read lock. Connections are kept for DB_CONN_MAX_AGE seconds (0 closes them
+# after each request). Safe-method requests read through the "readonly"
+# alias (see playground/db.py), which opens the same file with query_only.
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64000,  # KiB, i.e. 64 MB per connection
+    'busy_timeout': 5000,  # ms
+}
+SQLITE_INIT_COMMAND = ';'.join(f'PRAGMA {name} = {value}' for name, value in SQLITE_PRAGMAS.items())
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 60))
 
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': SQLITE_INIT_COMMAND,
+            'transaction_mode': 'IMMEDIATE',
+        },
+    },
+    'readonly': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': SQLITE_INIT_COMMAND + ';PRAGMA query_only = ON',
+        },
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
+}
+DATABASE_ROUTERS = ['playground.db.ReadReplicaRouter']
+
+
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# Rendered profile responses are cached under per-profile version counters
+# kept in the same cache, so multi-process deployments need a shared backend
+# (file or Redis); locmem is only coherent within a single process. The
+# "redis" option targets a local Redis and needs the redis package.
+
+RESPONSE_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'profiles-responses',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'responses',
+    },
+    # Disables response caching, e.g. for benchmarks
+    'dummy': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/1'),
+    },
+}
+
+# Throttle token buckets (profiles/throttling.py). Limits only hold across
+# processes with a shared backend; "dummy" keeps no counters and so turns
+# throttling off.
+THROTTLE_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'profiles-throttle',
+    },
+    'dummy': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+    'redis': RESPONSE_CACHE_BACKENDS['redis'],
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': RESPONSE_CACHE_BACKENDS[os.environ.get('RESPONSE_CACHE_BACKEND', 'locmem')],
+    'throttle': THROTTLE_CACHE_BACKENDS[os.environ.get('THROTTLE_CACHE_BACKEND', 'locmem')],
+}
+
+RESPONSE_CACHE_ALIAS = 'responses'
+RESPONSE_CACHE_TIMEOUT = 3600
+# The landing-page data (profile summary, top skills) is served
+# stale-while-revalidate from the response cache: fresh for SWR_FRESH_SECONDS
+# or until a write, then served stale for up to SWR_STALE_SECONDS more while
+# one background refresh recomputes it. `manage.py warm_cache` fills it on
+# deploy.
+SWR_FRESH_SECONDS = 30
+SWR_STALE_SECONDS = 600
+# How long a refresh may hold its key, and so how long requests that miss
+# wait on another worker's result before computing it themselves
+SWR_LOCK_SECONDS = 10
+THROTTLE_CACHE_ALIAS = 'throttle'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -130,8 +237,29 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 20
+    # orjson-backed JSON when installed, DRF's renderer otherwise
+    'DEFAULT_RENDERER_CLASSES': [
+        'profiles.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # Cursor (keyset) pages by default; ?page=N opts into page numbers
+    'DEFAULT_PAGINATION_CLASS': 'profiles.pagination.KeysetPagination',
+    # ?<field>=, ?<field>__<lookup>= and ?ordering= from each view's
+    # ``filters`` and ``ordering_fields`` declarations
+    'DEFAULT_FILTER_BACKENDS': [
+        'profiles.filters.DeclarativeFilterBackend',
+        'profiles.filters.KeysetOrderingFilter',
+    ],
+    'PAGE_SIZE': 20,
+    # profiles.throttling.CostThrottle buckets, in cost units: "<scope>" per
+    # client, "<scope>:all" shared by every client of the endpoint. A
+    # selective search costs 1, a one-letter one 8.
+    'DEFAULT_THROTTLE_RATES': {
+        'search': '120/min',
+        'search:all': '1200/min',
+        'projects-by-skill': '120/min',
+        'projects-by-skill:all': '1200/min',
+    },
 }
 
 # CORS configuration
@@ -143,3 +271,56 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 CORS_ALLOW_ALL_ORIGINS = True  # For development only
+
+# Serve list and summary endpoints from values() rows instead of model
+# instances (profiles/lean.py); ?lean=1 / ?lean=0 overrides per request.
+LEAN_SERIALIZATION = False
+
+# Response compression (profiles.middleware.CompressionMiddleware): bodies
+# smaller than COMPRESSION_MIN_SIZE bytes are sent as is; compressed bodies
+# are cached in-process up to COMPRESSION_CACHE_BYTES. brotli is offered
+# when the brotli package is installed, gzip always.
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 5
+COMPRESSION_CACHE_BYTES = 32 * 1024 * 1024
+
+# Batch endpoint (profiles/batch.py): sub-requests per POST, and the only
+# middleware each sub-request runs through (the batch request itself goes
+# through MIDDLEWARE as usual).
+BATCH_MAX_REQUESTS = 20
+BATCH_SUBREQUEST_MIDDLEWARE = [
+    'playground.db.ReadOnlyRequestMiddleware',
+]
+
+# Full-text search: markers wrapped around matches in result snippets
+SEARCH_HIGHLIGHT = ('<mark>', '</mark>')
+
+# Async views (profiles/async_views.py): threads available for database work
+# and per-category search timeouts in seconds. A category that times out is
+# interrupted and reported in the response's ``timed_out`` list.
+ASYNC_DB_EXECUTOR_WORKERS = int(os.environ.get('ASYNC_DB_EXECUTOR_WORKERS', 8))
+SEARCH_CATEGORY_TIMEOUTS = {
+    'default': 2.0,
+}
+
+# Change stream (/api/events/, profiles/events.py). CHANGE_LOG_SIZE events
+# are kept for Last-Event-ID resumes, the most recent SSE_REPLAY_BUFFER of
+# them also in memory. Each process polls the log every SSE_POLL_INTERVAL
+# seconds for writes made elsewhere (its own commits wake it at once). A
+# subscriber more than SSE_QUEUE_SIZE events behind is disconnected and
+# reconnects after SSE_RETRY_SECONDS; idle streams get a comment every
+# SSE_KEEPALIVE_SECONDS so proxies keep them open.
+CHANGE_LOG_SIZE = 10000
+SSE_REPLAY_BUFFER = 1000
+SSE_POLL_INTERVAL = 1.0
+SSE_QUEUE_SIZE = 256
+SSE_RETRY_SECONDS = 3
+SSE_KEEPALIVE_SECONDS = 15
+
+# Seconds of SQL a request of each throttle scope may run before it is
+# aborted and answered 503 (profiles.throttling.QueryBudgetMixin)
+QUERY_BUDGETS = {
+    'search': 2.0,
+    'projects-by-skill': 2.0,
+}
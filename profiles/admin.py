@@ -1,71 +1,256 @@
 from django.contrib import admin
-from .models import Profile, Education, Skill, Project, ProjectLink, ProjectSkill, WorkExperience, SocialLink
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.forms.models import BaseInlineFormSet
+from django.http import QueryDict
+from .models import (
+    Profile, Education, CanonicalSkill, SkillAlias, Skill, Project, ProjectLink,
+    ProjectSkill, WorkExperience, SocialLink
+)
+from .queries import count_subquery
+from .stats import annotate_profile_counts
 
 
-class EducationInline(admin.TabularInline):
-    model = Education
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """
+    One page of the parent's rows, chosen by ``?<prefix>-page=N``.
+
+    The change form posts back to its own URL, so a POST edits the page
+    its forms were rendered from; rows on other pages are left alone.
+    """
+    per_page = 20
+    # The request's query parameters, set by PaginatedTabularInline
+    params = None
+
+    def get_queryset(self):
+        if not hasattr(self, '_queryset'):
+            queryset = super().get_queryset()
+            paginator = Paginator(queryset, self.per_page)
+            self.page = paginator.get_page(self.params and self.params.get(self.page_param))
+            self._queryset = self.page.object_list
+        return self._queryset
+
+    @property
+    def page_param(self):
+        return f'{self.prefix}-page'
+
+    def page_links(self):
+        """``(label, url)`` for the pager; ``url`` is None for the current page and gaps"""
+        self.get_queryset()
+        links = []
+        for number in self.page.paginator.get_elided_page_range(self.page.number):
+            if number == self.page.number or number == Paginator.ELLIPSIS:
+                links.append((number, None))
+            else:
+                params = self.params.copy() if self.params is not None else QueryDict(mutable=True)
+                params[self.page_param] = number
+                links.append((number, f'?{params.urlencode()}'))
+        return links
+
+
+class PaginatedTabularInline(admin.TabularInline):
+    """Tabular inline showing ``per_page`` rows at a time, with a pager"""
+    formset = PaginatedInlineFormSet
+    template = 'admin/profiles/edit_inline/paginated_tabular.html'
+    per_page = 20
     extra = 1
+    show_change_link = True
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.per_page = self.per_page
+        formset.params = request.GET
+        return formset
+
+
+class ProfileSkillAutocomplete(AutocompleteSelect):
+    """Skill autocomplete limited to one profile's skills"""
+
+    def __init__(self, field, admin_site, profile_id, **kwargs):
+        super().__init__(field, admin_site, **kwargs)
+        self.profile_id = profile_id
 
+    def get_url(self):
+        return f'{super().get_url()}?profile={self.profile_id}'
 
-class SkillInline(admin.TabularInline):
+
+class EducationInline(PaginatedTabularInline):
+    model = Education
+
+
+class SkillInline(PaginatedTabularInline):
     model = Skill
-    extra = 1
+    # Assigned from the name on save; an editable widget would fetch each
+    # row's entry again.
+    readonly_fields = ['canonical']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('canonical')
 
 
-class WorkExperienceInline(admin.TabularInline):
+class WorkExperienceInline(PaginatedTabularInline):
     model = WorkExperience
-    extra = 1
 
 
-class SocialLinkInline(admin.TabularInline):
+class SocialLinkInline(PaginatedTabularInline):
     model = SocialLink
-    extra = 1
+
+    def get_queryset(self, request):
+        # Row labels (SocialLink.__str__) read the profile's name.
+        return super().get_queryset(request).select_related('profile')
 
 
-class ProjectLinkInline(admin.TabularInline):
+class ProjectLinkInline(PaginatedTabularInline):
     model = ProjectLink
-    extra = 1
+
+    def get_queryset(self, request):
+        # Row labels (ProjectLink.__str__) read the project's title.
+        return super().get_queryset(request).select_related('project')
 
 
-class ProjectSkillInline(admin.TabularInline):
+class ProjectSkillInline(PaginatedTabularInline):
     model = ProjectSkill
-    extra = 1
+    autocomplete_fields = ['skill']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('project', 'skill')
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        if obj is not None:
+            # Only the project owner's skills can be attached to it.
+            wrapper = formset.form.base_fields['skill'].widget
+            widget = ProfileSkillAutocomplete(
+                wrapper.widget.field, self.admin_site, obj.profile_id,
+                attrs=wrapper.widget.attrs, choices=wrapper.widget.choices, using=wrapper.widget.db,
+            )
+            widget.is_required = wrapper.widget.is_required
+            wrapper.widget = widget
+        return formset
 
 
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
-    list_display = ['name', 'email', 'created_at']
+    list_display = ['name', 'email', 'skills_count', 'projects_count', 'created_at']
     search_fields = ['name', 'email']
+    show_full_result_count = False
     inlines = [EducationInline, SkillInline, WorkExperienceInline, SocialLinkInline]
 
+    def get_queryset(self, request):
+        return annotate_profile_counts(super().get_queryset(request))
+
+    @admin.display(description='Skills', ordering='skills_count')
+    def skills_count(self, obj):
+        return obj.skills_count
+
+    @admin.display(description='Projects', ordering='projects_count')
+    def projects_count(self, obj):
+        return obj.projects_count
+
 
 @admin.register(Project)
 class ProjectAdmin(admin.ModelAdmin):
-    list_display = ['title', 'profile', 'start_date', 'end_date', 'is_ongoing']
+    list_display = ['title', 'profile', 'start_date', 'end_date', 'is_ongoing',
+                    'links_count', 'skills_count']
     list_filter = ['is_ongoing', 'start_date']
+    list_select_related = ['profile']
     search_fields = ['title', 'description']
+    show_full_result_count = False
+    autocomplete_fields = ['profile']
     inlines = [ProjectLinkInline, ProjectSkillInline]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            links_count=count_subquery(Project, 'links'),
+            skills_count=count_subquery(Project, 'project_skills'),
+        )
+
+    @admin.display(description='Links', ordering='links_count')
+    def links_count(self, obj):
+        return obj.links_count
+
+    @admin.display(description='Skills', ordering='skills_count')
+    def skills_count(self, obj):
+        return obj.skills_count
+
 
 @admin.register(Education)
 class EducationAdmin(admin.ModelAdmin):
     list_display = ['institution', 'degree', 'profile', 'start_date', 'end_date']
     list_filter = ['degree', 'start_date']
+    list_select_related = ['profile']
+    show_full_result_count = False
+    autocomplete_fields = ['profile']
+
+
+class SkillAliasInline(admin.TabularInline):
+    model = SkillAlias
+    extra = 1
+
+
+@admin.register(CanonicalSkill)
+class CanonicalSkillAdmin(admin.ModelAdmin):
+    list_display = ['name', 'key', 'projects_count', 'profiles_count']
+    list_select_related = ['stats']
+    search_fields = ['name', 'key', 'aliases__alias']
+    inlines = [SkillAliasInline]
+
+    @admin.display(description='Projects', ordering='stats__projects_count')
+    def projects_count(self, obj):
+        return obj.stats.projects_count if hasattr(obj, 'stats') else 0
+
+    @admin.display(description='Profiles', ordering='stats__profiles_count')
+    def profiles_count(self, obj):
+        return obj.stats.profiles_count if hasattr(obj, 'stats') else 0
 
 
 @admin.register(Skill)
 class SkillAdmin(admin.ModelAdmin):
-    list_display = ['name', 'level', 'years_experience', 'profile']
+    list_display = ['name', 'canonical', 'level', 'years_experience', 'profile']
     list_filter = ['level', 'years_experience']
+    list_select_related = ['canonical', 'profile']
     search_fields = ['name']
+    show_full_result_count = False
+    autocomplete_fields = ['profile', 'canonical']
+
+    def get_search_results(self, request, queryset, search_term):
+        # ProfileSkillAutocomplete passes the owning profile along.
+        profile_id = request.GET.get('profile')
+        if request.GET.get('model_name') == 'projectskill' and profile_id:
+            queryset = queryset.filter(profile_id=profile_id)
+        return super().get_search_results(request, queryset, search_term)
 
 
 @admin.register(WorkExperience)
 class WorkExperienceAdmin(admin.ModelAdmin):
     list_display = ['position', 'company', 'profile', 'start_date', 'end_date', 'is_current']
     list_filter = ['is_current', 'start_date']
+    list_select_related = ['profile']
+    show_full_result_count = False
+    autocomplete_fields = ['profile']
+
+
+@admin.register(ProjectLink)
+class ProjectLinkAdmin(admin.ModelAdmin):
+    list_display = ['project', 'link_type', 'url']
+    list_filter = ['link_type']
+    list_select_related = ['project']
+    show_full_result_count = False
+    autocomplete_fields = ['project']
+
+
+@admin.register(ProjectSkill)
+class ProjectSkillAdmin(admin.ModelAdmin):
+    list_display = ['project', 'skill']
+    list_select_related = ['project', 'skill']
+    show_full_result_count = False
+    autocomplete_fields = ['project', 'skill']
 
 
-admin.register(ProjectLink)
-admin.register(ProjectSkill)
-admin.register(SocialLink)
+@admin.register(SocialLink)
+class SocialLinkAdmin(admin.ModelAdmin):
+    list_display = ['profile', 'platform', 'url']
+    list_filter = ['platform']
+    list_select_related = ['profile']
+    show_full_result_count = False
+    autocomplete_fields = ['profile']
@@ -0,0 +1,205 @@
+"""
+Async counterparts of the search and summary views for ASGI deployments,
+and the change stream, which only ASGI can hold open for many clients.
+
+Database work runs on a bounded thread pool so the event loop never blocks
+and a burst of requests cannot open more connections than the pool has
+threads. Each pool thread keeps its connection open between calls, closing
+it only after an error or a failed ``CONN_HEALTH_CHECKS`` check.
+
+Independent search categories run concurrently; one that misses its
+timeout is interrupted and reported as timed out while the others are
+still returned. Search is throttled from the same buckets as ``SearchView``.
+
+Running categories concurrently only shortens a request when there are
+spare cores for SQLite to run on with the GIL released. Searching is CPU
+work (FTS5 plus serialization) with no I/O to overlap, so on one core the
+categories just take turns and the thread hand-offs make the async view
+no faster, often a little slower, than ``SearchView``: this is what
+``python -m benchmarks --only search --only search-async`` measures on a
+single-CPU machine. What the async view still guarantees there is the
+bounded tail: a slow category costs at most its timeout.
+"""
+import asyncio
+import contextvars
+import functools
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import OperationalError, connections
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import ParseError, Throttled
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import throttling
+from .events import broker
+from .fieldsets import parse_fieldsets
+from .lean import lean_requested
+from .views import ProfileSummaryView, SearchView
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'ASYNC_DB_EXECUTOR_WORKERS', 8),
+    thread_name_prefix='profiles-db',
+)
+
+
+class QueryInterrupted(Exception):
+    pass
+
+
+class _Call:
+    """
+    One unit of work on the executor.
+
+    The lock makes sure an interrupt can only reach this call's connection
+    while the call is still running, never a later call the same thread
+    has moved on to.
+    """
+
+    def __init__(self, func, args):
+        self.func = func
+        self.args = args
+        self.lock = threading.Lock()
+        self.connections = []
+        self.finished = False
+        self.interrupted = False
+
+    def __call__(self):
+        # Wrappers for every alias: the router decides which one the call
+        # ends up reading from.
+        wrappers = [connections[alias] for alias in connections]
+        for connection in wrappers:
+            connection.close_if_health_check_failed()
+        with self.lock:
+            if self.interrupted:
+                raise QueryInterrupted()
+            self.connections = wrappers
+        try:
+            return self.func(*self.args)
+        except OperationalError as exc:
+            for connection in wrappers:
+                connection.close()
+            if self.interrupted:
+                raise QueryInterrupted() from exc
+            raise
+        finally:
+            with self.lock:
+                self.finished = True
+
+    def interrupt(self):
+        with self.lock:
+            self.interrupted = True
+            if self.finished:
+                return
+            for connection in self.connections:
+                if connection.vendor == 'sqlite' and connection.connection is not None:
+                    connection.connection.interrupt()
+
+
+async def run_db(func, *args, timeout=None):
+    """
+    Run ``func(*args)`` on the DB executor, interrupting it after ``timeout``.
+
+    SQLite statements are cancelled with ``Connection.interrupt()`` so a
+    timed-out category frees its thread instead of running to completion;
+    on other backends the call is abandoned and finishes in the background.
+    """
+    call = _Call(func, args)
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    future = loop.run_in_executor(_executor, functools.partial(context.run, call))
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+    except asyncio.TimeoutError:
+        call.interrupt()
+        # Nobody awaits the abandoned call; retrieve its outcome so asyncio
+        # doesn't log "exception was never retrieved".
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        raise
+
+
+def _json(data, status=200):
+    return JsonResponse(data, status=status, encoder=JSONEncoder, json_dumps_params={'ensure_ascii': False})
+
+
+async def search(request):
+    """GET /async/search?q=... - SearchView with categories queried concurrently"""
+    try:
+        query, page, page_size = SearchView.parse_params(request.GET)
+    except ParseError as exc:
+        return _json(exc.detail, status=400)
+    wait = await sync_to_async(throttling.consume, thread_sensitive=False)(
+        request, SearchView.throttle_scope, SearchView.query_cost(request.GET)
+    )
+    if wait:
+        throttled = Throttled(wait)
+        response = _json({'detail': throttled.detail}, status=throttled.status_code)
+        response['Retry-After'] = str(math.ceil(wait))
+        return response
+
+    timeouts = getattr(settings, 'SEARCH_CATEGORY_TIMEOUTS', {})
+    default_timeout = timeouts.get('default', 2.0)
+    names = list(SearchView.categories)
+    outcomes = await asyncio.gather(*(
+        run_db(SearchView.search_category, name, query, page, page_size,
+               timeout=timeouts.get(name, default_timeout))
+        for name in names
+    ), return_exceptions=True)
+
+    results = {}
+    timed_out = []
+    for name, outcome in zip(names, outcomes):
+        if isinstance(outcome, (asyncio.TimeoutError, QueryInterrupted)):
+            timed_out.append(name)
+            results[name] = {'count': None, 'page': page, 'page_size': page_size,
+                             'data': [], 'timed_out': True}
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        else:
+            results[name] = outcome
+
+    return _json({
+        'query': query,
+        'partial': bool(timed_out),
+        'timed_out': timed_out,
+        'results': results,
+    })
+
+
+async def profile_summary(request):
+    """GET /async/profile/summary - ProfileSummaryView off the event loop"""
+    try:
+        fields, expand = parse_fieldsets(request.GET)
+        data, _tag = await run_db(ProfileSummaryView.cached_summary, lean_requested(request), fields, expand)
+    except ParseError as exc:
+        return _json(exc.detail, status=400)
+    if data is None:
+        return _json({'error': 'No profile found'}, status=404)
+    return _json(data)
+
+
+async def events(request):
+    """
+    GET /events?profile=1,2 - Server-Sent Events stream of committed changes
+    (to the given profiles, or all), resuming after ``Last-Event-ID``
+    """
+    if not isinstance(request, ASGIRequest):
+        # A WSGI server would drain the endless stream into memory and hold
+        # the worker forever.
+        return _json({'error': 'The change stream needs an ASGI server'}, status=501)
+    last_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        profiles = request.GET.get('profile')
+        profiles = {int(pk) for pk in profiles.split(',')} if profiles else None
+        last_id = int(last_id) if last_id else None
+    except ValueError:
+        return _json({'error': 'profile and Last-Event-ID must be integers'}, status=400)
+    response = StreamingHttpResponse(broker.stream(profiles, last_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Reverse proxies (nginx) would otherwise buffer the stream.
+    response['X-Accel-Buffering'] = 'no'
+    return response
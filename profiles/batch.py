@@ -0,0 +1,173 @@
+"""
+``POST /api/batch/``: several GET requests in one round trip.
+
+The body lists sub-requests as paths or objects::
+
+    {"requests": [
+        "/api/profile/summary/",
+        {"id": "skills", "path": "/api/skills/top/?limit=5"},
+        {"path": "/api/projects/", "headers": {"If-None-Match": "\"…\""}}
+    ]}
+
+Each sub-request is resolved against ``profiles.urls`` and dispatched to its
+view in-process, on this request's thread and so on its database
+connection, skipping the middleware stack except for the short
+``BATCH_SUBREQUEST_MIDDLEWARE`` chain. Response cache versions are read
+once for the whole batch and identical sub-requests run once. The answer
+lists one ``{id, status, headers, body}`` per sub-request, in order, with
+JSON bodies spliced in as rendered.
+"""
+import asyncio
+import json
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, QueryDict
+from django.urls import Resolver404, resolve
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+from rest_framework.views import APIView
+
+from . import cache
+
+# Response headers passed back per sub-request.
+FORWARDED_HEADERS = ('ETag', 'Cache-Control', 'Content-Type')
+# Request headers that describe the batch's own body, not a sub-request's.
+_BODY_META = ('CONTENT_TYPE', 'CONTENT_LENGTH', 'HTTP_CONTENT_ENCODING', 'HTTP_IF_NONE_MATCH')
+
+
+@lru_cache(maxsize=None)
+def _routes():
+    """View callables reachable through a batch: every profiles route but this one"""
+    from . import urls
+    return {
+        pattern.callback for pattern in urls.urlpatterns
+        if getattr(pattern.callback, 'view_class', None) is not BatchView
+    }
+
+
+def _dispatch(request):
+    match = request.resolver_match
+    if asyncio.iscoroutinefunction(match.func):
+        return async_to_sync(match.func)(request, *match.args, **match.kwargs)
+    return match.func(request, *match.args, **match.kwargs)
+
+
+@lru_cache(maxsize=None)
+def _handler():
+    """``_dispatch`` wrapped in ``BATCH_SUBREQUEST_MIDDLEWARE``, outermost first"""
+    handler = _dispatch
+    for path in reversed(getattr(settings, 'BATCH_SUBREQUEST_MIDDLEWARE', [])):
+        handler = import_string(path)(handler)
+    return handler
+
+
+def _item_json(item):
+    return json.dumps(item, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+class BatchView(APIView):
+    """POST /batch - Resolve a list of GET sub-requests in one round trip"""
+
+    def get_items(self, request):
+        items = request.data
+        if isinstance(items, dict):
+            items = items.get('requests')
+        if not isinstance(items, list):
+            raise serializers.ValidationError({'requests': 'Expected a list of requests.'})
+        max_requests = getattr(settings, 'BATCH_MAX_REQUESTS', 20)
+        if len(items) > max_requests:
+            raise serializers.ValidationError(
+                {'requests': f'At most {max_requests} requests per batch.'}
+            )
+        parsed = []
+        for index, item in enumerate(items):
+            if isinstance(item, str):
+                item = {'path': item}
+            if (not isinstance(item, dict) or not isinstance(item.get('path'), str)
+                    or not isinstance(item.get('headers', {}), dict)):
+                raise serializers.ValidationError(
+                    {'requests': f'Item {index}: expected a path or an object with a "path".'}
+                )
+            parsed.append({
+                'id': item.get('id', index),
+                'method': str(item.get('method', 'GET')).upper(),
+                'path': item['path'],
+                'headers': {str(k): str(v) for k, v in item.get('headers', {}).items()},
+            })
+        return parsed
+
+    def subrequest(self, request, path, headers):
+        """A GET ``HttpRequest`` for ``path`` carrying the batch's credentials"""
+        outer = request._request
+        url = urlsplit(path)
+        sub = HttpRequest()
+        sub.method = 'GET'
+        sub.path = sub.path_info = url.path
+        sub.META = {key: value for key, value in outer.META.items() if key not in _BODY_META}
+        sub.META.update({
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': url.path,
+            'QUERY_STRING': url.query,
+            'HTTP_ACCEPT': 'application/json',
+        })
+        for name, value in headers.items():
+            sub.META[f'HTTP_{name.upper().replace("-", "_")}'] = value
+        sub.GET = QueryDict(url.query)
+        sub.COOKIES = outer.COOKIES
+        for attr in ('user', 'session'):
+            if hasattr(outer, attr):
+                setattr(sub, attr, getattr(outer, attr))
+        return sub
+
+    def execute(self, request, item):
+        """``(status, headers, body bytes or None, is_json)`` for one sub-request"""
+        if item['method'] != 'GET':
+            return 405, {}, _item_json({'error': 'Only GET requests can be batched'}), True
+        try:
+            match = resolve(urlsplit(item['path']).path)
+        except Resolver404:
+            match = None
+        if match is None or match.func not in _routes():
+            return 404, {}, _item_json({'error': 'Not a batchable API route'}), True
+
+        sub = self.subrequest(request, item['path'], item['headers'])
+        sub.resolver_match = match
+        response = _handler()(sub)
+        if response.streaming:
+            response.close()
+            return 400, {}, _item_json({'error': 'Streaming responses cannot be batched'}), True
+        if hasattr(response, 'render') and not response.is_rendered:
+            response.render()
+
+        headers = {name: response[name] for name in FORWARDED_HEADERS if response.has_header(name)}
+        media_type = headers.get('Content-Type', '').split(';')[0].strip()
+        if response.status_code == 304 or not response.content:
+            return response.status_code, headers, None, True
+        is_json = media_type == 'application/json' or media_type.endswith('+json')
+        return response.status_code, headers, response.content, is_json
+
+    def post(self, request):
+        items = self.get_items(request)
+        results = {}
+        with cache.pinned_versions():
+            for item in items:
+                key = (item['method'], item['path'], tuple(sorted(item['headers'].items())))
+                if key not in results:
+                    results[key] = self.execute(request, item)
+
+        parts = []
+        for item in items:
+            key = (item['method'], item['path'], tuple(sorted(item['headers'].items())))
+            status_code, headers, body, is_json = results[key]
+            if body is None:
+                body = b'null'
+            elif not is_json:
+                body = _item_json(body.decode(errors='replace'))
+            meta = _item_json({'id': item['id'], 'status': status_code, 'headers': headers})
+            # Splice the rendered body in rather than parsing and re-encoding it.
+            parts.append(meta[:-1] + b',"body":' + body + b'}')
+        return HttpResponse(b'{"responses":[' + b','.join(parts) + b']}',
+                            content_type='application/json')
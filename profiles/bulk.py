@@ -0,0 +1,184 @@
+from django.db import transaction
+from rest_framework import serializers, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import taxonomy
+from .models import Profile, Project, ProjectLink, ProjectSkill, Skill
+from .serializers import (
+    ProjectLinkSerializer, ProjectSerializer, ProjectSkillSerializer, SkillSerializer
+)
+from .signals import bulk_saved
+
+
+class PreloadedRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary-key field resolved from objects the bulk view loaded up front.
+
+    The view fetches every referenced row with one ``in_bulk()`` per field
+    and passes them as ``context['preloaded'][field_name]``, replacing the
+    per-item ``get()`` of ``PrimaryKeyRelatedField``.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        obj = self.context['preloaded'][self.field_name].get(pk)
+        if obj is None:
+            self.fail('does_not_exist', pk_value=data)
+        return obj
+
+
+class SkillBulkSerializer(SkillSerializer):
+    profile = PreloadedRelatedField(queryset=Profile.objects.all())
+
+    class Meta(SkillSerializer.Meta):
+        # (profile, name) conflicts are resolved by the upsert itself
+        validators = []
+
+
+class ProjectBulkSerializer(ProjectSerializer):
+    profile = PreloadedRelatedField(queryset=Profile.objects.all())
+
+
+class ProjectLinkBulkSerializer(ProjectLinkSerializer):
+    project = PreloadedRelatedField(queryset=Project.objects.all())
+
+
+class ProjectSkillBulkSerializer(ProjectSkillSerializer):
+    project = PreloadedRelatedField(queryset=Project.objects.all())
+    skill = PreloadedRelatedField(queryset=Skill.objects.all())
+
+    class Meta(ProjectSkillSerializer.Meta):
+        fields = ProjectSkillSerializer.Meta.fields + ['project']
+        validators = []
+
+    def validate(self, attrs):
+        if attrs['skill'].profile_id != attrs['project'].profile_id:
+            raise serializers.ValidationError('Skill and project belong to different profiles.')
+        return attrs
+
+
+class BulkCreateView(APIView):
+    """
+    POST a JSON list of items; valid items are written with one
+    ``bulk_create`` in one transaction and invalid ones reported by index.
+
+    ``unique_fields``/``update_fields`` turn the insert into an upsert keyed
+    on the model's ``unique_together`` constraint; duplicate keys within one
+    payload collapse to the last occurrence.
+    """
+    serializer_class = None
+    related = {}
+    unique_fields = None
+    update_fields = None
+    max_items = 1000
+    batch_size = 500
+
+    def get_items(self, request):
+        items = request.data
+        if isinstance(items, dict):
+            items = items.get('items')
+        if not isinstance(items, list):
+            raise serializers.ValidationError({'items': 'Expected a list of items.'})
+        if len(items) > self.max_items:
+            raise serializers.ValidationError(
+                {'items': f'At most {self.max_items} items per request.'}
+            )
+        return items
+
+    def preload(self, items):
+        preloaded = {}
+        for field, model in self.related.items():
+            pks = set()
+            for item in items:
+                try:
+                    pks.add(int(item.get(field)))
+                except (AttributeError, TypeError, ValueError):
+                    pass
+            preloaded[field] = model.objects.in_bulk(pks)
+        return preloaded
+
+    def prepare(self, instances):
+        """Hook to fill derived columns on all valid instances at once"""
+
+    def post(self, request):
+        items = self.get_items(request)
+        context = {'request': request, 'view': self, 'preloaded': self.preload(items)}
+        model = self.serializer_class.Meta.model
+
+        errors = []
+        valid = {}
+        for index, item in enumerate(items):
+            serializer = self.serializer_class(data=item, context=context)
+            if not serializer.is_valid():
+                errors.append({'index': index, 'errors': serializer.errors})
+                continue
+            instance = model(**serializer.validated_data)
+            if self.unique_fields:
+                key = tuple(getattr(instance, model._meta.get_field(f).attname)
+                            for f in self.unique_fields)
+            else:
+                key = index
+            valid[key] = (index, instance)
+
+        if not valid:
+            return Response({'saved': 0, 'results': [], 'errors': errors},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        instances = [instance for _, instance in valid.values()]
+        self.prepare(instances)
+        options = {}
+        if self.unique_fields:
+            options = {
+                'update_conflicts': True,
+                'unique_fields': self.unique_fields,
+                'update_fields': self.update_fields,
+            }
+        with transaction.atomic():
+            saved = model.objects.bulk_create(instances, batch_size=self.batch_size, **options)
+            bulk_saved.send(sender=model, instances=saved)
+
+        return Response({
+            'saved': len(saved),
+            'results': [{'index': index, 'id': instance.pk} for index, instance in valid.values()],
+            'errors': errors,
+        }, status=status.HTTP_201_CREATED)
+
+
+class SkillBulkView(BulkCreateView):
+    """POST /skills/bulk - Upsert skills on (profile, name)"""
+    serializer_class = SkillBulkSerializer
+    related = {'profile': Profile}
+    unique_fields = ['profile', 'name']
+    update_fields = ['level', 'years_experience', 'canonical']
+
+    def prepare(self, instances):
+        catalog = taxonomy.resolve_many({skill.name for skill in instances})
+        for skill in instances:
+            skill.canonical = catalog[skill.name]
+
+
+class ProjectBulkView(BulkCreateView):
+    """POST /projects/bulk - Create projects"""
+    serializer_class = ProjectBulkSerializer
+    related = {'profile': Profile}
+
+
+class ProjectLinkBulkView(BulkCreateView):
+    """POST /project-links/bulk - Create project links"""
+    serializer_class = ProjectLinkBulkSerializer
+    related = {'project': Project}
+
+
+class ProjectSkillBulkView(BulkCreateView):
+    """POST /project-skills/bulk - Link skills to projects, keyed on (project, skill)"""
+    serializer_class = ProjectSkillBulkSerializer
+    related = {'project': Project, 'skill': Skill}
+    unique_fields = ['project', 'skill']
+    # Rewriting a key column is a no-op that lets the upsert return ids.
+    update_fields = ['skill']
@@ -0,0 +1,236 @@
+import contextvars
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import parse_etags
+from rest_framework.response import Response
+
+# Scope bumped by every change; for views that are not tied to one profile.
+GLOBAL_SCOPE = 'global'
+
+# {scope: version} read so far while versions are pinned, else None.
+_pinned = contextvars.ContextVar('profiles_pinned_versions', default=None)
+
+# Seconds between checks while waiting on another worker's computation
+SWR_POLL_INTERVAL = 0.05
+
+# Background refreshes of stale values. Few keys are hot, so two threads
+# keep a burst of expiries from becoming a burst of queries.
+_refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix='profiles-swr')
+
+
+def _cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def profile_scope(profile_id):
+    return f'profile:{profile_id}'
+
+
+def _version_key(scope):
+    return f'profiles:version:{scope}'
+
+
+def get_version(scope):
+    """
+    Current version of a cache scope, read from the cache alone.
+
+    A missing counter starts at the current time in milliseconds, so a
+    counter lost to eviction or a restart never reuses an old version.
+    """
+    pinned = _pinned.get()
+    if pinned is not None and scope in pinned:
+        return pinned[scope]
+    cache = _cache()
+    key = _version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    if pinned is not None:
+        pinned[scope] = version
+    return version
+
+
+@contextmanager
+def pinned_versions():
+    """
+    Read each scope's version from the cache once for the whole block, so
+    the responses served in it (e.g. one batch) come from one snapshot.
+    """
+    token = _pinned.set({})
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+def bump_version(scope):
+    cache = _cache()
+    key = _version_key(scope)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+
+
+def invalidate_profile(profile_id):
+    """
+    Bump a profile's version, and the global one, once the write commits.
+
+    Bumping before commit would let a concurrent reader cache pre-commit
+    data under the new version.
+    """
+    def bump():
+        if profile_id is not None:
+            bump_version(profile_scope(profile_id))
+        bump_version(GLOBAL_SCOPE)
+    transaction.on_commit(bump)
+
+
+def not_modified(request, etag):
+    """A 304 for ``etag`` when ``If-None-Match`` has it, else None"""
+    # Weak comparison (RFC 9110 13.1.2): compression weakens the ETag.
+    etags = parse_etags(request.headers.get('If-None-Match', ''))
+    if etag in etags or f'W/{etag}' in etags:
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+    return None
+
+
+def tagged_response(request, tag, data):
+    """
+    ``Response(data)`` with an ETag built from ``tag`` (from
+    ``cached_value()``), or a 304 when ``If-None-Match`` has it. The browsable
+    API gets neither: its page embeds request state, such as the CSRF token
+    and the user, that the tag doesn't cover.
+    """
+    if request.accepted_renderer.format == 'api':
+        return Response(data)
+    etag = f'"{tag}-{request.accepted_renderer.format}"'
+    response = not_modified(request, etag) or Response(data)
+    response['ETag'] = etag
+    return response
+
+
+def cached_value(name, scope, compute, *args, refresh=False):
+    """
+    ``compute(*args)``, cached stale-while-revalidate; returns
+    ``(value, tag)``, the tag naming the scope version it was computed at.
+
+    A value is fresh for ``SWR_FRESH_SECONDS`` and until its scope's version
+    changes. After that it is still served, for up to ``SWR_STALE_SECONDS``,
+    while a single background refresh recomputes it. Only a missing value is
+    computed in the request, and then by one worker at a time: the others
+    wait up to ``SWR_LOCK_SECONDS`` for its result rather than all querying
+    the database at once. ``refresh`` recomputes in the caller regardless.
+    """
+    cache = _cache()
+    digest = hashlib.sha1(json.dumps(args, sort_keys=True, default=str).encode()).hexdigest()
+    key = f'profiles:swr:{name}:{digest}'
+    lock = f'{key}:lock'
+    lock_timeout = getattr(settings, 'SWR_LOCK_SECONDS', 10)
+
+    entry = None if refresh else cache.get(key)
+    if entry is None and not refresh and not cache.add(lock, 1, lock_timeout):
+        deadline = time.monotonic() + lock_timeout
+        while entry is None and time.monotonic() < deadline:
+            time.sleep(SWR_POLL_INTERVAL)
+            entry = cache.get(key)
+    if entry is None:
+        try:
+            entry = _store(key, scope, compute, args)
+        finally:
+            cache.delete(lock)
+    else:
+        _value, version, fresh_until = entry
+        stale = time.time() > fresh_until or version != get_version(scope)
+        if stale and cache.add(lock, 1, lock_timeout):
+            _refresh_later(_refresh, key, lock, scope, compute, args)
+    value, version, _fresh_until = entry
+    return value, f'{version}-{digest[:16]}'
+
+
+def _store(key, scope, compute, args):
+    # The version is read first: a write landing mid-computation leaves the
+    # entry already stale instead of passing it off as current.
+    version = get_version(scope)
+    fresh = getattr(settings, 'SWR_FRESH_SECONDS', 30)
+    entry = (compute(*args), version, time.time() + fresh)
+    _cache().set(key, entry, fresh + getattr(settings, 'SWR_STALE_SECONDS', 600))
+    return entry
+
+
+def _refresh(key, lock, scope, compute, args):
+    try:
+        _store(key, scope, compute, args)
+    finally:
+        _cache().delete(lock)
+        connections.close_all()
+
+
+def _refresh_later(func, *args):
+    _refresher.submit(func, *args)
+
+
+class VersionedCacheMixin:
+    """
+    Cache rendered GET responses under the version of a scope.
+
+    Views implement ``get_cache_scope()``; views defining their own ``get``
+    route it through ``serve_cached()``. The ETag is derived from the
+    scope version and the request, so a matching ``If-None-Match`` is
+    answered with 304 before the database is touched; other hits are served
+    from the stored bytes without serializing or rendering.
+    """
+    cache_timeout = None
+
+    def get_cache_scope(self):
+        raise NotImplementedError
+
+    def _cache_key(self, request):
+        scope = self.get_cache_scope()
+        version = get_version(scope)
+        variant = f'{request.get_full_path()}|{request.accepted_renderer.format}'
+        digest = hashlib.sha1(variant.encode()).hexdigest()
+        return f'profiles:response:{scope}:{version}:{digest}', f'"{version}-{digest[:16]}"'
+
+    def get(self, request, *args, **kwargs):
+        return self.serve_cached(request, super().get, *args, **kwargs)
+
+    def serve_cached(self, request, handler, *args, **kwargs):
+        """Answer from the cache, falling back to ``handler`` on a miss"""
+        # Only cache machine formats; the browsable API embeds request state.
+        if request.accepted_renderer.format == 'api':
+            return handler(request, *args, **kwargs)
+
+        self.response_cache_key, self.etag = self._cache_key(request)
+        response = not_modified(request, self.etag)
+        if response is not None:
+            return response
+
+        cached = _cache().get(self.response_cache_key)
+        if cached is not None:
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+            response['ETag'] = self.etag
+            return response
+        return handler(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, 'response_cache_key', None)
+        if key and response.status_code == 200 and not response.has_header('ETag'):
+            response.render()
+            timeout = self.cache_timeout or getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 3600)
+            _cache().set(key, (response.content, response['Content-Type']), timeout)
+            response['ETag'] = self.etag
+        return response
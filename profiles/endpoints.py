@@ -0,0 +1,91 @@
+"""
+The API's GET routes with sample parameters, and a seeded scratch dataset
+to run them against. Shared by ``check_query_plans`` and the benchmarks.
+"""
+import asyncio
+from io import StringIO
+
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connections
+from django.urls import URLPattern, URLResolver, get_resolver
+
+from .models import Profile
+
+# Query strings for routes that need parameters to do real work.
+DEFAULT_QUERIES = {
+    'search': 'q=data',
+    'search-async': 'q=data',
+    'projects-by-skill': 'skill=python',
+    'top-skills': 'limit=10',
+    'export': 'format=ndjson',
+}
+
+# Routes that stream until the client disconnects
+ENDLESS_ROUTES = {'events'}
+
+
+def _iter_patterns(patterns, prefix=''):
+    for entry in patterns:
+        if isinstance(entry, URLResolver):
+            yield from _iter_patterns(entry.url_patterns, prefix + str(entry.pattern))
+        elif isinstance(entry, URLPattern):
+            yield prefix + str(entry.pattern), entry
+
+
+def discover_endpoints(sample_pks):
+    """
+    ``(name, path)`` for every GET route under ``/api/``.
+
+    ``<int:pk>`` is filled from ``sample_pks`` keyed by the view's model;
+    routes without a GET handler (the bulk POST endpoints) and endless
+    streams are skipped.
+    """
+    endpoints = []
+    for route, pattern in _iter_patterns(get_resolver().url_patterns):
+        if not route.startswith('api/') or not pattern.name or pattern.name in ENDLESS_ROUTES:
+            continue
+        view_class = getattr(pattern.callback, 'view_class', None) or getattr(pattern.callback, 'cls', None)
+        if view_class is None and asyncio.iscoroutinefunction(pattern.callback):
+            # Async function views (profiles.async_views) only serve GET.
+            view_class = pattern.callback
+        elif view_class is None or not hasattr(view_class, 'get'):
+            continue
+        if '<int:pk>' in route:
+            queryset = getattr(view_class, 'queryset', None)
+            model = queryset.model if queryset is not None else None
+            # Per-profile child lists take the profile's pk.
+            if route.count('/') > 3 and route.startswith('api/profiles/'):
+                model = 'profile'
+            pk = sample_pks.get(model)
+            if pk is None:
+                continue
+            route = route.replace('<int:pk>', str(pk))
+        path = '/' + route
+        query = DEFAULT_QUERIES.get(pattern.name)
+        endpoints.append((pattern.name, f'{path}?{query}' if query else path))
+    return endpoints
+
+
+def seed(profiles, seed_value):
+    """Create the schema and a fixed synthetic dataset; returns sample pks"""
+    mirrors = {}
+    for alias in connections:
+        mirror = connections[alias].settings_dict.get('TEST', {}).get('MIRROR')
+        if mirror:
+            mirrors[alias] = mirror
+            continue
+        connections[alias].creation.create_test_db(verbosity=0, autoclobber=True)
+    for alias, mirror in mirrors.items():
+        connections[alias].close()
+        connections[alias].settings_dict['NAME'] = connections[mirror].settings_dict['NAME']
+    call_command('seed_data', profiles=profiles, seed=seed_value, verbosity=0, stdout=StringIO())
+    return sample_pks()
+
+
+def sample_pks():
+    """The first pk of every profiles model, keyed by model (``'profile'`` too)"""
+    samples = {'profile': Profile.objects.order_by('pk').values_list('pk', flat=True).first()}
+    for model in apps.get_app_config('profiles').get_models():
+        samples[model] = model.objects.order_by('pk').values_list('pk', flat=True).first()
+    return samples
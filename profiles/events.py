@@ -0,0 +1,231 @@
+"""
+Change stream: every committed write to a profile's rows as a compact event
+``{"model": "skill", "pk": 5, "op": "update", "profile": 3}``, served as
+Server-Sent Events by ``async_views.events``.
+
+The signal handlers append events to the ``ChangeEvent`` log inside the
+writer's transaction, so a rolled-back write never produces one and writes
+made by other processes (other workers, management commands) are streamed
+too. SQLite admits one writer at a time, so ids commit in increasing order
+and "every event after id N" is a complete answer; that is what
+``Last-Event-ID`` resumes from. ``op`` is ``create``, ``update``,
+``delete``, or ``save`` for bulk writes, which may have done either. An
+update moving a row to another profile is logged once for each profile,
+so subscribers to the one it left hear of it too.
+
+Each process runs one ``Broker`` on its event loop. A single poller reads
+new log rows, woken at once by commits in this process and every
+``SSE_POLL_INTERVAL`` seconds otherwise, and fans them out to subscriber
+queues, so idle subscribers cost no queries and no threads. A subscriber
+whose queue fills (a client reading slower than changes arrive) is
+disconnected; its EventSource reconnects with ``Last-Event-ID`` and
+catches up from the log.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+from collections import deque
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, transaction
+
+from .models import ChangeEvent
+
+logger = logging.getLogger(__name__)
+
+# Log rows fetched per poll
+FETCH_SIZE = 500
+# Prune the log whenever an id is a multiple of this
+PRUNE_EVERY = 1000
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def record(model, rows, op, using=DEFAULT_DB_ALIAS):
+    """Log ``op`` on ``rows``, ``(pk, profile_id)`` pairs of ``model``"""
+    events = ChangeEvent.objects.using(using).bulk_create([
+        ChangeEvent(model=model._meta.model_name, object_id=pk, op=op, profile_id=profile_id)
+        for pk, profile_id in rows if pk is not None
+    ])
+    if any(event.pk % PRUNE_EVERY == 0 for event in events):
+        ChangeEvent.objects.using(using).filter(
+            pk__lte=events[-1].pk - _setting('CHANGE_LOG_SIZE', 10000)
+        ).delete()
+    if events:
+        transaction.on_commit(broker.notify, using=using)
+
+
+async def _run_db(func, *args):
+    # async_views imports the views, and through them the signal handlers
+    # that import this module.
+    from .async_views import run_db
+    return await run_db(func, *args)
+
+
+def latest_id():
+    return ChangeEvent.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+
+def oldest_id():
+    return ChangeEvent.objects.order_by('pk').values_list('pk', flat=True).first()
+
+
+def fetch(after, until=None, limit=FETCH_SIZE):
+    """Events with ids in ``(after, until]``, oldest first"""
+    rows = ChangeEvent.objects.filter(pk__gt=after).order_by('pk')
+    if until is not None:
+        rows = rows.filter(pk__lte=until)
+    return [Event.from_row(row) for row in rows[:limit]]
+
+
+class Event:
+    """A logged change, with its SSE frame encoded once for every subscriber"""
+    __slots__ = ('id', 'profile', 'frame')
+
+    def __init__(self, id, profile, frame):
+        self.id = id
+        self.profile = profile
+        self.frame = frame
+
+    @classmethod
+    def from_row(cls, row):
+        data = json.dumps({'model': row.model, 'pk': row.object_id, 'op': row.op,
+                           'profile': row.profile_id}, separators=(',', ':'))
+        return cls(row.pk, row.profile_id, f'id: {row.pk}\nevent: change\ndata: {data}\n\n'.encode())
+
+
+# Sent instead of a replay when events after the client's Last-Event-ID
+# have been pruned: the client should refetch what it shows.
+RESET_FRAME = b'event: reset\ndata: {}\n\n'
+KEEPALIVE_FRAME = b': keepalive\n\n'
+
+
+class Subscription:
+    def __init__(self, profiles, size):
+        self.profiles = profiles
+        self.queue = asyncio.Queue(size)
+        self.overflowed = False
+
+    def wants(self, event):
+        return self.profiles is None or event.profile in self.profiles
+
+
+class Broker:
+    """Fans the log out to this process's subscribers; lives on one event loop"""
+
+    def __init__(self):
+        self.loop = None
+
+    def _bind(self):
+        # A new loop (e.g. a fresh one per test) starts from scratch: tasks
+        # and queues of a closed loop can't be reused.
+        loop = asyncio.get_running_loop()
+        if loop is not self.loop:
+            self.loop = loop
+            self.subscribers = set()
+            self.recent = deque(maxlen=_setting('SSE_REPLAY_BUFFER', 1000))
+            self.last_id = None
+            self.wakeup = asyncio.Event()
+            self.poller = None
+
+    def notify(self):
+        """New events were committed; safe to call from any thread"""
+        loop = self.loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self.wakeup.set)
+
+    async def stream(self, profiles=None, last_id=None):
+        """
+        SSE frames for the events on ``profiles`` (None for all) after
+        ``last_id``, then as they are committed, until the client goes away
+        or falls a full queue behind.
+        """
+        self._bind()
+        if self.last_id is None:
+            latest = await _run_db(latest_id)
+            # Another subscriber may have started the poller meanwhile.
+            if self.last_id is None:
+                self.last_id = latest
+        subscription = Subscription(profiles, _setting('SSE_QUEUE_SIZE', 256))
+        # Registered before anything is awaited again: the queue receives
+        # every event after ``cutoff`` and the replay covers the rest.
+        self.subscribers.add(subscription)
+        cutoff = self.last_id
+        self._start_poller()
+        try:
+            yield f'retry: {int(_setting("SSE_RETRY_SECONDS", 3) * 1000)}\n\n'.encode()
+            if last_id is not None and last_id != cutoff:
+                for frame in await self._replay(subscription, last_id, cutoff):
+                    yield frame
+            keepalive = _setting('SSE_KEEPALIVE_SECONDS', 15)
+            while not (subscription.overflowed and subscription.queue.empty()):
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    yield KEEPALIVE_FRAME
+                    continue
+                yield event.frame
+        finally:
+            self.subscribers.discard(subscription)
+
+    async def _replay(self, subscription, last_id, cutoff):
+        if self.recent and self.recent[0].id <= last_id + 1 and last_id < cutoff:
+            events = [event for event in self.recent if last_id < event.id <= cutoff]
+        else:
+            oldest = await _run_db(oldest_id)
+            if last_id > cutoff or oldest is None or oldest > last_id + 1:
+                return [RESET_FRAME]
+            events = []
+            while last_id < cutoff:
+                page = await _run_db(fetch, last_id, cutoff)
+                if not page:
+                    break
+                events.extend(page)
+                last_id = page[-1].id
+        return [event.frame for event in events if subscription.wants(event)]
+
+    def _start_poller(self):
+        if self.poller is None or self.poller.done():
+            # Its own context: not the first subscriber's request state
+            # (read-only routing, Server-Timing totals).
+            self.poller = self.loop.create_task(self._poll(), context=contextvars.Context())
+
+    async def _poll(self):
+        while self.subscribers:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), _setting('SSE_POLL_INTERVAL', 1.0))
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            try:
+                page = await _run_db(fetch, self.last_id)
+                while page:
+                    for event in page:
+                        self._publish(event)
+                    page = await _run_db(fetch, self.last_id) if len(page) == FETCH_SIZE else None
+            except DatabaseError:
+                logger.exception('Reading the change log failed; retrying')
+        # Nobody is listening: the next subscriber starts from the log's
+        # end rather than being sent what happened in between.
+        self.last_id = None
+        self.recent.clear()
+
+    def _publish(self, event):
+        self.last_id = event.id
+        self.recent.append(event)
+        for subscription in list(self.subscribers):
+            if not subscription.wants(event):
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Stop feeding it; its stream ends once the queue drains and
+                # the client resumes from the log.
+                subscription.overflowed = True
+                self.subscribers.discard(subscription)
+
+
+broker = Broker()
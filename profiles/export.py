@@ -0,0 +1,36 @@
+import json
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Profile
+from .queries import plan_queryset
+from .serializers import ProfileSerializer
+
+
+def iter_profile_batches(batch_size=500, queryset=None):
+    """
+    Yield lists of fully prefetched profiles in primary-key order.
+
+    Each batch is a keyset query (``pk > last``) with the serializer's
+    prefetch plan applied, so memory is bounded by ``batch_size`` and no read
+    cursor stays open between batches while the consumer does I/O.
+    """
+    queryset = plan_queryset(
+        Profile.objects.all() if queryset is None else queryset, ProfileSerializer
+    ).order_by('pk')
+    last_pk = None
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        batch = list(page[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1].pk
+
+
+def iter_ndjson(batch_size=500, queryset=None):
+    """Yield NDJSON text, one chunk per batch and one profile per line"""
+    encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    for batch in iter_profile_batches(batch_size, queryset):
+        documents = ProfileSerializer(batch, many=True).data
+        yield ''.join(encoder.encode(document) + '\n' for document in documents)
@@ -0,0 +1,114 @@
+"""
+Sparse fieldsets (``?fields=``) and relation expansion (``?expand=``).
+
+Both parameters take comma-separated field names, dotted to reach into
+nested serializers: ``?fields=name,projects.title`` renders each profile's
+name and the titles of its projects, nothing else. ``?expand=`` names the
+relations to render:
+
+* nested serializers not named in ``expand`` are dropped, so
+  ``?expand=projects`` renders a profile's own fields and its projects but
+  not its skills or education;
+* foreign keys listed in a serializer's ``Meta.expandable_fields`` render
+  as nested objects instead of ids, e.g. ``/api/projects/?expand=profile``.
+
+Without either parameter responses are unchanged. The pruned serializer
+instance is what the query planner and the lean path compile, so relations
+that aren't rendered aren't prefetched either.
+"""
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+from rest_framework.permissions import SAFE_METHODS
+
+
+def _parse_tree(value):
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for part in path.strip().split('.'):
+            if not part:
+                raise ParseError({'error': f"invalid field path '{path.strip()}'"})
+            node = node.setdefault(part, {})
+    return tree
+
+
+def parse_fieldsets(params):
+    """``(fields, expand)`` trees of ``{name: subtree}``, None when not given"""
+    fields, expand = params.get('fields', '').strip(), params.get('expand', '').strip()
+    return (_parse_tree(fields) if fields else None,
+            _parse_tree(expand) if expand else None)
+
+
+def requested_fieldsets(request):
+    """Fieldsets of a safe request; writes always see the whole serializer"""
+    if request.method not in SAFE_METHODS:
+        return None, None
+    return parse_fieldsets(request.query_params)
+
+
+def _nested(field):
+    if isinstance(field, serializers.ListSerializer):
+        return field.child
+    if isinstance(field, serializers.BaseSerializer):
+        return field
+    return None
+
+
+def _prune(serializer, fields, expand, prefix=''):
+    meta = getattr(serializer, 'Meta', None)
+    expandable = getattr(meta, 'expandable_fields', {})
+    for name in expand or ():
+        if name in expandable:
+            serializer.fields[name] = expandable[name](read_only=True)
+        elif _nested(serializer.fields.get(name)) is None:
+            raise ParseError({'error': f"'{prefix}{name}' cannot be expanded"})
+
+    if fields:
+        unknown = [name for name in fields if name not in serializer.fields]
+        if unknown:
+            raise ParseError({'error': f"unknown field '{prefix}{unknown[0]}'"})
+
+    for name, field in list(serializer.fields.items()):
+        nested = _nested(field)
+        if fields and name not in fields and name not in (expand or ()):
+            del serializer.fields[name]
+        elif expand is not None and nested is not None and name not in expand and not fields:
+            del serializer.fields[name]
+        elif nested is not None:
+            _prune(nested, (fields or {}).get(name) or None,
+                   None if expand is None else expand.get(name, {}), f'{prefix}{name}.')
+        elif fields and fields[name]:
+            raise ParseError({'error': f"'{prefix}{name}' has no fields"})
+
+
+def apply_fieldsets(serializer, fields=None, expand=None):
+    """
+    Prune a serializer instance (or a ``many=True`` list of one) in place.
+
+    Raises ``ParseError`` for names the serializer doesn't have. A pruned
+    serializer is marked with its ``fieldsets`` so the lean path compiles
+    it rather than reusing the class's cached form.
+    """
+    if fields is None and expand is None:
+        return serializer
+    target = serializer.child if isinstance(serializer, serializers.ListSerializer) else serializer
+    _prune(target, fields, expand)
+    target.fieldsets = serializer.fieldsets = (fields, expand)
+    return serializer
+
+
+class FieldsetMixin:
+    """
+    Generic view mixin applying the request's fieldsets to its serializers
+    and, through ``PlannedQuerysetMixin``, to its query plan.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        return apply_fieldsets(super().get_serializer(*args, **kwargs),
+                               *requested_fieldsets(self.request))
+
+    def get_planned_serializer(self):
+        fields, expand = requested_fieldsets(self.request)
+        if fields is None and expand is None:
+            return super().get_planned_serializer()
+        return self.get_serializer()
@@ -0,0 +1,141 @@
+"""
+Declarative query-parameter filtering and index-backed ordering.
+
+List views declare ``filters``, a dict of parameter name to ``Filter``::
+
+    filters = {
+        'profile': Filter('profile', ['exact', 'in']),
+        'start_date': Filter('start_date', ['gte', 'lte']),
+        'link_type': Filter('links__link_type', ['exact', 'in']),
+    }
+
+``?profile=3``, ``?profile__in=3,4`` and ``?start_date__gte=2020-01-01`` then
+become ``WHERE`` terms of the list query. Values are parsed by the model
+field, so bad input is a 400 rather than an empty page. A path through a
+reverse relation compiles to ``EXISTS (...)`` instead of a join, so rows are
+never duplicated, and ``iexact`` on text compares ``LOWER()`` on both sides,
+which the functional ``Lower`` indexes can serve.
+
+``ordering_fields`` is an allow-list for ``?ordering=``. It holds the
+non-null columns that lead an index, since ``KeysetPagination`` seeks on
+whatever ordering the filtered queryset ends up with.
+"""
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import models
+from django.db.models import Exists, OuterRef, Q, Value
+from django.db.models.functions import Lower
+from django.db.models.lookups import Exact
+from rest_framework import filters, serializers
+from rest_framework.filters import BaseFilterBackend
+
+LOOKUPS = ('exact', 'iexact', 'in', 'gt', 'gte', 'lt', 'lte', 'isnull')
+
+
+class Filter:
+    """One filterable field path and the lookups allowed on it"""
+
+    def __init__(self, field_name, lookups=('exact',)):
+        unknown = set(lookups) - set(LOOKUPS)
+        if unknown:
+            raise ImproperlyConfigured(f'Unsupported lookups for {field_name}: {sorted(unknown)}')
+        self.field_name = field_name
+        self.lookups = tuple(lookups)
+
+    def resolve(self, model):
+        """``(reverse relation or None, path below it, final model field)``"""
+        parts = self.field_name.split('__')
+        try:
+            relation = model._meta.get_field(parts[0])
+            if relation.one_to_many and len(parts) > 1:
+                model, parts = relation.related_model, parts[1:]
+            else:
+                relation = None
+            for index, part in enumerate(parts):
+                field = model._meta.get_field(part)
+                if field.is_relation and index < len(parts) - 1:
+                    model = field.related_model
+        except FieldDoesNotExist as exc:
+            raise ImproperlyConfigured(f'Filter {self.field_name!r}: {exc}')
+        if field.is_relation:
+            # Filtering on a relation compares its key.
+            field = field.target_field
+        return relation, parts, field
+
+    def parse(self, field, lookup, raw):
+        if lookup == 'isnull' or isinstance(field, models.BooleanField):
+            # true/false/yes/no/1/0, which the model field doesn't all accept
+            return serializers.BooleanField().to_internal_value(raw)
+        values = raw.split(',') if lookup == 'in' else [raw]
+        try:
+            parsed = [field.to_python(value.strip()) for value in values]
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(exc.messages)
+        return parsed if lookup == 'in' else parsed[0]
+
+    def condition(self, model, lookup, raw):
+        """The ``WHERE`` term (a ``Q`` or boolean expression) for one parameter"""
+        relation, path, field = self.resolve(model)
+        value = self.parse(field, lookup, raw)
+        name = '__'.join(path)
+        if lookup == 'iexact':
+            term = Exact(Lower(name), Lower(Value(value)))
+        else:
+            term = Q(**{name if lookup == 'exact' else f'{name}__{lookup}': value})
+        if relation is None:
+            return term
+        rows = relation.related_model._default_manager.filter(
+            **{relation.field.name: OuterRef('pk')}
+        ).filter(term)
+        return Exists(rows)
+
+
+class DeclarativeFilterBackend(BaseFilterBackend):
+    """Apply the view's ``filters`` to the query parameters present"""
+
+    def filter_queryset(self, request, queryset, view):
+        declared = getattr(view, 'filters', None)
+        if not declared:
+            return queryset
+        errors = {}
+        conditions = []
+        for param, raw in request.query_params.items():
+            name, _, lookup = param.partition('__')
+            filter_ = declared.get(name)
+            if filter_ is None:
+                continue
+            lookup = lookup or 'exact'
+            if lookup not in filter_.lookups:
+                errors[param] = [f'Unsupported lookup; use one of: {", ".join(filter_.lookups)}.']
+                continue
+            try:
+                conditions.append(filter_.condition(queryset.model, lookup, raw))
+            except serializers.ValidationError as exc:
+                errors[param] = exc.detail
+        if errors:
+            raise serializers.ValidationError(errors)
+        return queryset.filter(*conditions) if conditions else queryset
+
+
+class KeysetOrderingFilter(filters.OrderingFilter):
+    """
+    ``?ordering=`` limited to the view's ``ordering_fields``, with ``id``
+    appended in the same direction so the ordering stays unique and can be
+    read off a ``(field, id)`` index.
+    """
+
+    def get_valid_fields(self, queryset, view, context={}):
+        return [(field, field) for field in getattr(view, 'ordering_fields', None) or ()]
+
+    def get_ordering(self, request, queryset, view):
+        params = request.query_params.get(self.ordering_param)
+        if not params:
+            return None
+        ordering = self.remove_invalid_fields(
+            queryset, [param.strip() for param in params.split(',')], view, request
+        )
+        if not ordering:
+            return None
+        if not any(term.lstrip('-') in ('id', 'pk') for term in ordering):
+            ordering.append('-id' if ordering[0].startswith('-') else 'id')
+        return ordering
@@ -0,0 +1,367 @@
+"""
+Whole-profile writes: ``POST /profiles/`` and ``PUT /profiles/<pk>/`` take
+the nested document in one request::
+
+    {"name": "...", "email": "...",
+     "skills": [{"name": "Python", "level": "expert"}],
+     "projects": [{"title": "...", "description": "...", "skills": ["Python"],
+                   "links": [{"url": "https://...", "link_type": "github"}]}],
+     "education": [...], "work_experience": [...], "social_links": [...]}
+
+The document is validated as a whole before anything is written, then saved
+in one transaction with one ``bulk_create`` and at most one ``bulk_update``
+and one ``DELETE`` per table.
+
+A relation present in an update replaces the stored one. Items are matched to
+existing rows by ``id`` or else by their natural key (``MATCH_FIELDS``).
+Matched rows are only written when a field differs, and unmatched rows are
+deleted. A relation left out is not touched. Projects name their skills,
+which must be listed in ``skills`` or already belong to the profile.
+"""
+from collections import defaultdict
+
+from django.db import models, transaction
+from django.db.models.functions import Cast, Concat
+from rest_framework import serializers
+
+from . import taxonomy
+from .models import (
+    Profile, Education, Skill, Project, ProjectLink, ProjectSkill,
+    WorkExperience, SocialLink
+)
+from .queries import plan_queryset
+from .serializers import ProfileSerializer
+from .signals import bulk_saved
+
+# Rows per nested list
+MAX_ROWS = 1000
+
+# Reverse accessor on Profile -> child model
+RELATIONS = {
+    'education': Education,
+    'skills': Skill,
+    'projects': Project,
+    'work_experience': WorkExperience,
+    'social_links': SocialLink,
+}
+
+
+# Fields identifying an existing row when an item carries no ``id``
+MATCH_FIELDS = {
+    Education: ('institution', 'degree', 'start_date'),
+    Skill: ('name',),
+    Project: ('title',),
+    ProjectLink: ('url', 'link_type'),
+    WorkExperience: ('company', 'position', 'start_date'),
+    SocialLink: ('platform',),
+}
+
+
+# Fields unique within a parent. SQLite checks uniqueness row by row during
+# an UPDATE, so rows taking each other's values (a swap) are first moved to
+# placeholders.
+UNIQUE_FIELDS = {
+    Skill: 'name',
+    SocialLink: 'platform',
+}
+
+
+class NestedRowSerializer(serializers.ModelSerializer):
+    """One child row of the document; ``id`` names the row it updates"""
+    id = serializers.IntegerField(required=False)
+
+
+class EducationInputSerializer(NestedRowSerializer):
+    class Meta:
+        model = Education
+        exclude = ['profile']
+
+
+class SkillInputSerializer(NestedRowSerializer):
+    class Meta:
+        model = Skill
+        fields = ['id', 'name', 'level', 'years_experience']
+
+
+class ProjectLinkInputSerializer(NestedRowSerializer):
+    class Meta:
+        model = ProjectLink
+        exclude = ['project']
+
+
+class ProjectInputSerializer(NestedRowSerializer):
+    links = ProjectLinkInputSerializer(many=True, required=False, max_length=MAX_ROWS)
+    skills = serializers.ListField(
+        child=serializers.CharField(max_length=50), required=False, max_length=MAX_ROWS
+    )
+
+    class Meta:
+        model = Project
+        fields = ['id', 'title', 'description', 'start_date', 'end_date', 'is_ongoing',
+                  'links', 'skills']
+        # Existing skill links are diffed against ``skills`` on update.
+        related_lookups = ['project_skills__skill']
+
+
+class WorkExperienceInputSerializer(NestedRowSerializer):
+    class Meta:
+        model = WorkExperience
+        exclude = ['profile']
+
+
+class SocialLinkInputSerializer(NestedRowSerializer):
+    class Meta:
+        model = SocialLink
+        exclude = ['profile']
+
+
+class ProfileIngestSerializer(serializers.ModelSerializer):
+    """
+    Writable nested profile document. Responses render the saved profile
+    with ``ProfileSerializer``.
+    """
+    education = EducationInputSerializer(many=True, required=False, max_length=MAX_ROWS)
+    skills = SkillInputSerializer(many=True, required=False, max_length=MAX_ROWS)
+    projects = ProjectInputSerializer(many=True, required=False, max_length=MAX_ROWS)
+    work_experience = WorkExperienceInputSerializer(many=True, required=False, max_length=MAX_ROWS)
+    social_links = SocialLinkInputSerializer(many=True, required=False, max_length=MAX_ROWS)
+
+    class Meta:
+        model = Profile
+        fields = ['id', 'name', 'email', 'bio', 'created_at', 'updated_at',
+                  'education', 'skills', 'projects', 'work_experience', 'social_links']
+
+    def validate(self, attrs):
+        errors = {}
+        profile = self.instance
+        for name in RELATIONS:
+            if name not in attrs:
+                continue
+            existing = _rows(profile, name)
+            problem = _check_ids(attrs[name], existing)
+            if problem:
+                errors[name] = problem
+        if 'skills' in attrs:
+            names = [item['name'] for item in attrs['skills']]
+            if len(set(names)) != len(names):
+                errors['skills'] = 'Skill names must be unique.'
+            skill_names = set(names)
+        else:
+            skill_names = {skill.name for skill in _rows(profile, 'skills')}
+        if 'social_links' in attrs:
+            platforms = [item['platform'] for item in attrs['social_links']]
+            if len(set(platforms)) != len(platforms):
+                errors['social_links'] = 'One link per platform.'
+
+        project_errors = {}
+        projects = {project.pk: project for project in _rows(profile, 'projects')}
+        for index, item in enumerate(attrs.get('projects', [])):
+            problems = {}
+            unknown = sorted(set(item.get('skills', [])) - skill_names)
+            if unknown:
+                problems['skills'] = f'Unknown skills {unknown}; list them under "skills".'
+            if 'links' in item:
+                project = projects.get(item.get('id'))
+                links = list(project.links.all()) if project is not None else []
+                problem = _check_ids(item['links'], links)
+                if problem:
+                    problems['links'] = problem
+            if problems:
+                project_errors[index] = problems
+        if project_errors:
+            errors['projects'] = project_errors
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+    def create(self, validated_data):
+        return save_profile(None, validated_data)
+
+    def update(self, instance, validated_data):
+        return save_profile(instance, validated_data)
+
+    def to_representation(self, instance):
+        saved = plan_queryset(Profile.objects.filter(pk=instance.pk), ProfileSerializer).get()
+        return ProfileSerializer(saved, context=self.context).data
+
+
+def _rows(parent, accessor):
+    """A saved parent's rows of a relation (prefetched when planned), else none"""
+    if parent is None or parent.pk is None:
+        return []
+    return list(getattr(parent, accessor).all())
+
+
+def _check_ids(items, existing):
+    pks = {row.pk for row in existing}
+    ids = [item['id'] for item in items if 'id' in item]
+    unknown = sorted(set(ids) - pks)
+    if unknown:
+        return f'No such rows: {unknown}.'
+    if len(set(ids)) != len(ids):
+        return 'Each row may appear once.'
+    return None
+
+
+class _Changes:
+    """Rows of one model to insert, update and delete, written in bulk"""
+
+    def __init__(self, model):
+        self.model = model
+        self.created = []
+        self.updated = []
+        self.fields = set()
+        self.deleted = []
+        # Updated rows whose UNIQUE_FIELDS value changes
+        self.renamed = []
+
+    def match(self, parent_field, parent, items, existing):
+        """
+        Pair ``items`` with ``existing`` rows and record the differences;
+        returns the row for each item, in order.
+        """
+        by_id = {row.pk: row for row in existing}
+        by_key = defaultdict(list)
+        for row in existing:
+            by_key[tuple(getattr(row, f) for f in MATCH_FIELDS[self.model])].append(row)
+        matched = set()
+        rows = []
+        for item in items:
+            values = dict(item)
+            pk = values.pop('id', None)
+            if pk is not None:
+                row = by_id[pk]
+            else:
+                key = tuple(values.get(f) for f in MATCH_FIELDS[self.model])
+                row = next((row for row in by_key[key] if row.pk not in matched), None)
+            if row is None or row.pk in matched:
+                row = self.model(**{parent_field: parent}, **values)
+                self.created.append(row)
+            else:
+                matched.add(row.pk)
+                changed = [f for f, value in values.items() if getattr(row, f) != value]
+                if changed:
+                    if UNIQUE_FIELDS.get(self.model) in changed:
+                        self.renamed.append(row)
+                    for f in changed:
+                        setattr(row, f, values[f])
+                    self.updated.append(row)
+                    self.fields.update(changed)
+            rows.append(row)
+        self.deleted.extend(row.pk for row in existing if row.pk not in matched)
+        return rows
+
+    def delete(self):
+        # Through delete() so the per-row signals (stats, search) still run.
+        if self.deleted:
+            self.model.objects.filter(pk__in=self.deleted).delete()
+
+    def save(self):
+        if self.renamed:
+            # A NUL-prefixed id can't collide with a real value or another row.
+            self.model.objects.filter(pk__in=[row.pk for row in self.renamed]).update(**{
+                UNIQUE_FIELDS[self.model]: Concat(
+                    models.Value('\x00'), Cast('pk', models.CharField()), output_field=models.CharField()
+                )
+            })
+        if self.updated:
+            self.model.objects.bulk_update(self.updated, sorted(self.fields))
+        if self.created:
+            self.model.objects.bulk_create(self.created)
+
+    def send(self):
+        if self.created or self.updated:
+            bulk_saved.send(sender=self.model, instances=self.created + self.updated)
+
+    @property
+    def changed(self):
+        return bool(self.created or self.updated or self.deleted)
+
+
+def save_profile(profile, data):
+    """
+    Create (``profile`` None) or update a profile from a validated document.
+
+    Deletes run first, so a natural key freed by a removed row can be
+    reused by a new one; parents are inserted before their children so
+    that the children get their keys.
+    """
+    data = dict(data)
+    nested = {name: data.pop(name) for name in RELATIONS if name in data}
+    changes = {model: _Changes(model) for model in RELATIONS.values()}
+    link_changes = _Changes(ProjectLink)
+    skill_link_changes = _Changes(ProjectSkill)
+    created = profile is None
+
+    with transaction.atomic():
+        if created:
+            profile = Profile.objects.create(**data)
+            changed_fields = []
+        else:
+            changed_fields = [f for f, value in data.items() if getattr(profile, f) != value]
+            for f in changed_fields:
+                setattr(profile, f, data[f])
+
+        rows = {}
+        for name, model in RELATIONS.items():
+            if name in nested:
+                items = nested[name]
+                if model is Project:
+                    items = [{k: v for k, v in item.items() if k not in ('links', 'skills')}
+                             for item in items]
+                existing = [] if created else _rows(profile, name)
+                rows[name] = changes[model].match('profile', profile, items, existing)
+
+        # New and renamed skills point at the catalog entry of their name
+        # (bulk writes skip the pre_save signal that does it otherwise).
+        skill_changes = changes[Skill]
+        resolve = skill_changes.created + skill_changes.renamed
+        if resolve:
+            catalog = taxonomy.resolve_many({skill.name for skill in resolve})
+            for skill in skill_changes.renamed:
+                # Stats of the entry it leaves are refreshed too.
+                skill._previous_stats_keys = {'profile_id': skill.profile_id,
+                                              'canonical_id': skill.canonical_id}
+            for skill in resolve:
+                skill.canonical = catalog[skill.name]
+            if skill_changes.renamed:
+                skill_changes.fields.add('canonical')
+
+        for model_changes in changes.values():
+            model_changes.delete()
+        for model_changes in changes.values():
+            model_changes.save()
+
+        # Project children need the keys the project insert assigned.
+        if 'projects' in nested:
+            skills = rows['skills'] if 'skills' in rows else _rows(profile, 'skills')
+            skills = {skill.name: skill for skill in skills}
+            new_projects = {id(project) for project in changes[Project].created}
+            for item, project in zip(nested['projects'], rows['projects']):
+                is_new = id(project) in new_projects
+                if 'links' in item:
+                    existing = [] if is_new else _rows(project, 'links')
+                    link_changes.match('project', project, item['links'], existing)
+                if 'skills' in item:
+                    existing = [] if is_new else _rows(project, 'project_skills')
+                    _match_skill_links(skill_link_changes, project, item['skills'], skills, existing)
+            for model_changes in (link_changes, skill_link_changes):
+                model_changes.delete()
+                model_changes.save()
+
+        everything = list(changes.values()) + [link_changes, skill_link_changes]
+        if not created and (changed_fields or any(c.changed for c in everything)):
+            profile.save(update_fields=changed_fields + ['updated_at'])
+        for model_changes in everything:
+            model_changes.send()
+    return profile
+
+
+def _match_skill_links(changes, project, names, skills, existing):
+    """Add and drop a project's skill links to match ``names``"""
+    linked = {link.skill_id: link for link in existing}
+    wanted = {skills[name].pk for name in names}
+    for pk in dict.fromkeys(skills[name].pk for name in names):
+        if pk not in linked:
+            changes.created.append(ProjectSkill(project=project, skill_id=pk))
+    changes.deleted.extend(link.pk for skill_id, link in linked.items() if skill_id not in wanted)
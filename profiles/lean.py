@@ -0,0 +1,237 @@
+"""
+Read-only serialization straight from ``.values()`` rows.
+
+A ``LeanSerializer`` is compiled once per serializer class: every readable
+field becomes a ``values()`` lookup plus a converter (``None`` when the
+database value is already what DRF would emit, the field's own
+``to_representation`` otherwise), nested list serializers become one
+grouped ``values()`` query per relation, and ``Meta.annotated_counts``
+become count subqueries. The output has the same shape and key order as
+the serializer's ``.data``, without building model instances or walking
+DRF's per-field machinery for every row.
+
+Serializers opt in implicitly by only using supported fields; anything
+else (method fields without a declaration, many-to-many relations, nested
+objects other than flat forward foreign keys) raises
+``ImproperlyConfigured`` when the class is compiled.
+``SerializerMethodField`` values that are lists of related values are
+declared with ``Meta.related_values``, e.g.
+``{'skills': 'project_skills__skill__name'}``.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from .pagination import keyset_ordering
+from .queries import _related_fields, count_subquery
+
+# Fields whose to_representation() is the identity for values the
+# database driver returns.
+_PASSTHROUGH_FIELDS = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+    serializers.PrimaryKeyRelatedField,
+)
+_TRUE = ('1', 'true', 'yes', 'on')
+_FALSE = ('0', 'false', 'no', 'off')
+
+
+def _converter(field):
+    if isinstance(field, _PASSTHROUGH_FIELDS):
+        return None
+    if isinstance(field, serializers.ChoiceField):
+        if all(str(key) == key for key in field.choice_strings_to_values.values()):
+            return None
+    return field.to_representation
+
+
+class LeanSerializer:
+    def __init__(self, serializer):
+        if isinstance(serializer, type):
+            serializer = serializer()
+        serializer_class = type(serializer)
+        meta = serializer.Meta
+        self.model = meta.model
+        counts = getattr(meta, 'annotated_counts', {})
+        related_values = getattr(meta, 'related_values', {})
+        related = _related_fields(self.model)
+
+        self.counts = {}
+        # (output key, values() lookup or None for related data, converter)
+        self.fields = []
+        # output key -> (foreign key on the child model, child LeanSerializer)
+        self.nested = {}
+        # output key -> (child model, foreign key on it, lookup on the child)
+        self.lists = {}
+        # output key -> (foreign key column, [(key, values() lookup, converter)])
+        self.objects = {}
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if name in counts:
+                self.counts[name] = counts[name]
+                self.fields.append((name, name, None))
+            elif name in related_values:
+                relation, lookup = related_values[name].split('__', 1)
+                rel = related[relation]
+                self.lists[name] = (rel.related_model, rel.field.name, lookup)
+                self.fields.append((name, None, None))
+            elif isinstance(field, serializers.ListSerializer):
+                rel = related.get(field.source)
+                if rel is None or rel.many_to_many or not rel.auto_created:
+                    raise ImproperlyConfigured(
+                        f'{serializer_class.__name__}.{name}: only reverse foreign keys can be nested'
+                    )
+                self.nested[name] = (rel.field.name, LeanSerializer(field.child))
+                self.fields.append((name, None, None))
+            elif isinstance(field, serializers.BaseSerializer) and self._forward(field, related):
+                child = LeanSerializer(field)
+                if child.nested or child.lists or child.counts or child.objects:
+                    raise ImproperlyConfigured(
+                        f'{serializer_class.__name__}.{name}: nested objects must have plain fields only'
+                    )
+                self.objects[name] = (related[field.source].attname, [
+                    (key, f'{field.source}__{lookup}', convert) for key, lookup, convert in child.fields
+                ])
+                self.fields.append((name, None, None))
+            elif isinstance(field, (serializers.BaseSerializer, serializers.SerializerMethodField,
+                                    serializers.ManyRelatedField)) or field.source == '*':
+                raise ImproperlyConfigured(
+                    f'{serializer_class.__name__}.{name}: {type(field).__name__} has no lean equivalent'
+                )
+            else:
+                self.fields.append((name, '__'.join(field.source_attrs), _converter(field)))
+
+        self.lookups = [lookup for _, lookup, _ in self.fields if lookup is not None]
+        for column, fields in self.objects.values():
+            for lookup in [column] + [lookup for _, lookup, _ in fields]:
+                if lookup not in self.lookups:
+                    self.lookups.append(lookup)
+        if (self.nested or self.lists) and 'pk' not in self.lookups:
+            self.lookups.append('pk')
+
+    @staticmethod
+    def _forward(field, related):
+        """Whether a nested serializer reads a forward foreign key"""
+        rel = related.get(field.source)
+        return rel is not None and rel.concrete and (rel.many_to_one or rel.one_to_one)
+
+    def values(self, queryset, extra=()):
+        """``queryset`` as the ``values()`` rows ``serialize()`` expects"""
+        queryset = queryset.select_related(None).prefetch_related(None)
+        missing = {
+            name: count_subquery(self.model, relation)
+            for name, relation in self.counts.items()
+            if name not in queryset.query.annotations
+        }
+        if missing:
+            queryset = queryset.annotate(**missing)
+        lookups = list(self.lookups)
+        lookups.extend(name for name in extra if name not in lookups)
+        return queryset.values(*lookups)
+
+    def serialize(self, rows):
+        rows = list(rows)
+        related = self.fetch_related([row['pk'] for row in rows]) if self.nested or self.lists else {}
+        data = []
+        for row in rows:
+            item = {}
+            for key, lookup, convert in self.fields:
+                if lookup is None:
+                    if key in self.objects:
+                        item[key] = self._object(row, *self.objects[key])
+                    else:
+                        item[key] = related[key].get(row['pk'], [])
+                    continue
+                value = row[lookup]
+                item[key] = value if convert is None or value is None else convert(value)
+            data.append(item)
+        return data
+
+    @staticmethod
+    def _object(row, column, fields):
+        if row[column] is None:
+            return None
+        return {
+            key: row[lookup] if convert is None or row[lookup] is None else convert(row[lookup])
+            for key, lookup, convert in fields
+        }
+
+    def fetch_related(self, pks):
+        """``{output key: {parent pk: [value, ...]}}`` with one query per relation"""
+        related = {}
+        for key, (fk_name, child) in self.nested.items():
+            groups = related[key] = {}
+            if not pks:
+                continue
+            rows = list(child.values(
+                child.model._default_manager.filter(**{f'{fk_name}__in': pks}), extra=[fk_name]
+            ))
+            for parent, item in zip((row[fk_name] for row in rows), child.serialize(rows)):
+                groups.setdefault(parent, []).append(item)
+        for key, (model, fk_name, lookup) in self.lists.items():
+            groups = related[key] = {}
+            if not pks:
+                continue
+            queryset = model._default_manager.filter(**{f'{fk_name}__in': pks})
+            for parent, value in queryset.values_list(fk_name, lookup):
+                groups.setdefault(parent, []).append(value)
+        return related
+
+
+@lru_cache(maxsize=None)
+def lean_serializer(serializer_class):
+    return LeanSerializer(serializer_class)
+
+
+def lean_for(serializer):
+    """
+    Lean form of a serializer instance: the class's cached form unless
+    sparse fieldsets pruned it.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    if getattr(serializer, 'fieldsets', None) is None:
+        return lean_serializer(type(serializer))
+    return LeanSerializer(serializer)
+
+
+def lean_requested(request):
+    """
+    ``?lean=1``/``?lean=0`` when given, else ``settings.LEAN_SERIALIZATION``.
+    """
+    params = getattr(request, 'query_params', request.GET)
+    value = params.get('lean', '').lower()
+    if value in _TRUE:
+        return True
+    if value in _FALSE:
+        return False
+    return getattr(settings, 'LEAN_SERIALIZATION', False)
+
+
+class LeanListMixin:
+    """
+    List view mixin serving ``GET`` through the serializer's lean form.
+
+    Filtering and pagination run on the ``values()`` queryset, so keyset
+    cursors and page numbers behave exactly as on the full path.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not lean_requested(request):
+            return super().list(request, *args, **kwargs)
+        lean = lean_for(self.get_serializer())
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = lean.values(
+            queryset,
+            extra=[field.lstrip('-') for field in keyset_ordering(queryset, self)] + ['id'],
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(lean.serialize(page))
+        return Response(lean.serialize(queryset))
@@ -0,0 +1,183 @@
+import os
+import re
+import shutil
+import tempfile
+from contextlib import ExitStack
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from profiles.endpoints import discover_endpoints, sample_pks, seed
+
+# "SCAN <table>" with no index: a full table (rowid) scan. Index scans
+# ("SCAN t USING INDEX i"), virtual tables and subquery results don't match.
+_FULL_SCAN = re.compile(r'^SCAN (?P<name>[\w"]+)$')
+# FROM/JOIN "table" <alias>, as Django writes subquery aliases (U0, V1, ...).
+_TABLE_ALIAS = re.compile(r'"(?P<table>\w+)"\s+(?:AS\s+)?"?(?P<alias>[A-Z]\d+)"?')
+_SUBQUERY = re.compile(r'\([^()]*\)')
+
+
+def _top_level(sql):
+    """``sql`` with every parenthesized group, nested ones first, collapsed to ``_``"""
+    previous = None
+    while previous != sql:
+        previous, sql = sql, _SUBQUERY.sub('_', sql)
+    return sql.upper()
+
+
+def _bounded(sql, plan):
+    """
+    Whether a top-level scan stops after its LIMIT: no filter, grouping or
+    sort can make SQLite read past the first rows.
+    """
+    top = _top_level(sql)
+    return (
+        ' LIMIT ' in top
+        and ' WHERE ' not in top
+        and ' GROUP BY ' not in top
+        and not any(detail.startswith('USE TEMP B-TREE') for _, parent, detail in plan if not parent)
+    )
+
+
+class Command(BaseCommand):
+    help = ('Run EXPLAIN QUERY PLAN on the SELECTs every API endpoint issues '
+            'and fail on full table scans of large tables')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', type=int, default=1000,
+                            help='Synthetic profiles to seed into a scratch database')
+        parser.add_argument('--seed', type=int, default=42, help='Dataset random seed')
+        parser.add_argument('--no-seed', action='store_true',
+                            help='Check against the configured database as it is')
+        parser.add_argument('--threshold', type=int, default=1000,
+                            help='Rows a table may have and still be scanned in full')
+        parser.add_argument('--path', action='append', default=[],
+                            help='Extra path to check (repeatable)')
+        parser.add_argument('--exclude', action='append', default=['export'],
+                            help='URL names to skip (default: export, which reads everything)')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        workdir = None
+        names = {alias: connections[alias].settings_dict['NAME'] for alias in connections}
+        try:
+            if options['no_seed']:
+                samples = sample_pks()
+            else:
+                workdir = tempfile.mkdtemp(prefix='profiles-plans-')
+                for alias in connections:
+                    test = connections[alias].settings_dict.setdefault('TEST', {})
+                    if not test.get('MIRROR'):
+                        test['NAME'] = os.path.join(workdir, f'{alias}.sqlite3')
+                self.stdout.write(f"Seeding {options['profiles']} profiles...")
+                samples = seed(options['profiles'], options['seed'])
+            problems = self.check_endpoints(samples, options)
+        finally:
+            for alias, name in names.items():
+                connections[alias].close()
+                connections[alias].settings_dict['NAME'] = name
+            if workdir:
+                shutil.rmtree(workdir, ignore_errors=True)
+            teardown_test_environment()
+
+        if problems:
+            for line in problems:
+                self.stderr.write(line)
+            raise CommandError(f'{len(problems)} full table scan(s) above {options["threshold"]} rows')
+        self.stdout.write(self.style.SUCCESS('No full table scans above the threshold'))
+
+    def check_endpoints(self, samples, options):
+        endpoints = [
+            (name, path) for name, path in discover_endpoints(samples)
+            if name not in options['exclude']
+        ]
+        endpoints += [(path, path) for path in options['path']]
+
+        client = Client()
+        row_counts = {}
+        problems = []
+        while endpoints:
+            name, path = endpoints.pop(0)
+            response, statements = self.capture(client, path)
+            # The second page of a list runs the keyset seek query.
+            next_page = self.next_page(response)
+            if next_page and not name.endswith('[next]'):
+                endpoints.insert(0, (f'{name}[next]', next_page))
+            if not statements:
+                continue
+            self.stdout.write(f'{name}: {len(statements)} queries')
+            for alias, sql, params in statements:
+                plan = self.explain(alias, sql, params)
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'  {sql}')
+                    for _, _, detail in plan:
+                        self.stdout.write(f'    {detail}')
+                tables = {
+                    match['alias']: match['table'] for match in _TABLE_ALIAS.finditer(sql)
+                }
+                for _, parent, detail in plan:
+                    match = _FULL_SCAN.match(detail)
+                    if not match:
+                        continue
+                    if not parent and _bounded(sql, plan):
+                        continue
+                    table = match['name'].strip('"')
+                    table = tables.get(table, table)
+                    rows = self.count_rows(alias, table, row_counts)
+                    if rows is not None and rows > options['threshold']:
+                        problems.append(f'{name}: {detail} ({table}, {rows} rows)\n  {sql}')
+        return problems
+
+    @staticmethod
+    def capture(client, path):
+        """The response to ``path`` and ``(alias, sql, params)`` of its SELECTs"""
+        statements = []
+
+        def wrapper(alias):
+            def capture(execute, sql, params, many, context):
+                if sql.lstrip().upper().startswith('SELECT'):
+                    statements.append((alias, sql, params))
+                return execute(sql, params, many, context)
+            return capture
+
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(wrapper(alias)))
+            response = client.get(path)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+        return response, statements
+
+    @staticmethod
+    def next_page(response):
+        if response.streaming or 'json' not in response.get('Content-Type', ''):
+            return None
+        data = response.json()
+        link = data.get('next') if isinstance(data, dict) else None
+        if not isinstance(link, str):
+            return None
+        url = urlsplit(link)
+        return f'{url.path}?{url.query}' if url.query else url.path
+
+    @staticmethod
+    def explain(alias, sql, params):
+        """``[(id, parent, detail), ...]`` from ``EXPLAIN QUERY PLAN``"""
+        with connections[alias].cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [(row[0], row[1], row[3]) for row in cursor.fetchall()]
+
+    @staticmethod
+    def count_rows(alias, table, cache):
+        if table not in cache:
+            with connections[alias].cursor() as cursor:
+                tables = connections[alias].introspection.table_names(cursor)
+                if table not in tables:
+                    cache[table] = None
+                else:
+                    cursor.execute(f'SELECT COUNT(*) FROM {connections[alias].ops.quote_name(table)}')
+                    cache[table] = cursor.fetchone()[0]
+        return cache[table]
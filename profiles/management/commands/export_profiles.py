@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, OutputWrapper
+
+from profiles.export import iter_ndjson
+
+
+class Command(BaseCommand):
+    help = 'Export every profile as NDJSON, one nested document per line'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', '-o',
+            help='File to write to (default: standard output)',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Profiles fetched and serialized per batch',
+        )
+
+    def handle(self, *args, **options):
+        output = options['output']
+        stream = OutputWrapper(open(output, 'w', encoding='utf-8')) if output else self.stdout
+        try:
+            for chunk in iter_ndjson(batch_size=options['batch_size']):
+                # Chunks end in a newline already.
+                stream.write(chunk, ending='')
+        finally:
+            if output:
+                stream.close()
+
+        if output:
+            self.stdout.write(self.style.SUCCESS(f'Successfully exported profiles to {output}'))
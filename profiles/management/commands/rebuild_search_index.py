@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from profiles import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index from the profile tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Database alias to rebuild the index on',
+        )
+
+    def handle(self, *args, **options):
+        using = options['database']
+        backend = search.get_backend(using)
+        if isinstance(backend, search.LikeBackend):
+            self.stdout.write(self.style.WARNING(
+                'No FTS5 tables on this database; search uses LIKE queries and has no index'
+            ))
+            return
+
+        with transaction.atomic(using=using):
+            for name, index in search.INDEXES.items():
+                count = backend.rebuild(index)
+                self.stdout.write(f'Indexed {count} {name}')
+
+        self.stdout.write(self.style.SUCCESS('Successfully rebuilt search index'))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from profiles import stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the profile and skill stats tables, repairing any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Database alias to rebuild the stats on',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Rows written per INSERT',
+        )
+
+    def handle(self, *args, **options):
+        results = stats.rebuild(using=options['database'], batch_size=options['batch_size'])
+        for model, (rows, corrected) in results.items():
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: {rows} rows, {corrected} corrected'
+            )
+
+        self.stdout.write(self.style.SUCCESS('Successfully rebuilt stats'))
@@ -1,6 +1,10 @@
+import time
+
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import date
+from profiles import cache, synthetic
 from profiles.models import (
     Profile, Education, Skill, Project, ProjectLink, 
     ProjectSkill, WorkExperience, SocialLink
@@ -8,9 +12,33 @@ from profiles.models import (
 
 
 class Command(BaseCommand):
-    help = 'Seed the database with sample profile data'
+    help = ('Seed the database with sample profile data, or with a synthetic '
+            'dataset of any size when --profiles is given')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profiles', type=int,
+            help='Generate this many synthetic profiles instead of the sample profile',
+        )
+        parser.add_argument('--skills-per-profile', type=int, default=10,
+                            help='Maximum skills per synthetic profile')
+        parser.add_argument('--projects-per-profile', type=int, default=5,
+                            help='Maximum projects per synthetic profile')
+        parser.add_argument('--seed', type=int, default=42,
+                            help='Random seed; the same seed generates the same data')
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Profiles inserted per transaction')
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='Rows per bulk_create statement')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Processes inserting disjoint id ranges in parallel')
+        parser.add_argument('--flush', action='store_true',
+                            help='Delete existing profiles before generating synthetic data')
 
     def handle(self, *args, **options):
+        if options['profiles'] is not None:
+            return self.generate_synthetic(options)
+
         # Clear existing data
         Profile.objects.all().delete()
         
@@ -173,3 +201,31 @@ class Command(BaseCommand):
         self.stdout.write(
             self.style.SUCCESS('Successfully seeded database with profile data')
         )
+
+    def generate_synthetic(self, options):
+        if options['flush']:
+            Profile.objects.all().delete()
+
+        started = time.monotonic()
+        counts = synthetic.generate(
+            options['profiles'],
+            skills_per_profile=options['skills_per_profile'],
+            projects_per_profile=options['projects_per_profile'],
+            seed=options['seed'],
+            chunk_size=options['chunk_size'],
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+        )
+        elapsed = time.monotonic() - started
+        for model, count in counts.items():
+            self.stdout.write(f'{model.__name__}: {count} rows')
+
+        # bulk_create skips the signals that maintain derived data.
+        call_command('rebuild_search_index', stdout=self.stdout)
+        call_command('rebuild_stats', stdout=self.stdout)
+        cache.bump_version(cache.GLOBAL_SCOPE)
+
+        total = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully generated {total} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.0f} rows/s)'
+        ))
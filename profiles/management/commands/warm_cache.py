@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from profiles.views import ProfileSummaryView, TopSkillsView
+
+
+class Command(BaseCommand):
+    help = ('Compute the landing-page responses (profile summary, top skills) into the '
+            'response cache, so the first requests after a deploy are hits')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, action='append',
+            help='Top skills ?limit= to warm (repeatable, default: 10)',
+        )
+
+    def handle(self, *args, **options):
+        cache = caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+        if isinstance(cache, LocMemCache):
+            self.stderr.write(self.style.WARNING(
+                'The response cache is in-process (locmem); servers will not see these entries. '
+                'Use RESPONSE_CACHE_BACKEND=file or redis.'
+            ))
+
+        keys = []
+        for lean in (False, True):
+            keys.append((f'profile summary (lean={lean})', ProfileSummaryView.cached_summary,
+                         {'lean': lean}))
+            # Clamped as the view clamps ?limit=, so these are the keys it reads.
+            limits = {TopSkillsView.parse_limit({'limit': limit}) for limit in options['limit'] or [10]}
+            for limit in sorted(limits):
+                keys.append((f'top skills (limit={limit}, lean={lean})',
+                             TopSkillsView.cached_top_skills, {'limit': limit, 'lean': lean}))
+
+        for label, warm, kwargs in keys:
+            started = time.perf_counter()
+            warm(refresh=True, **kwargs)
+            self.stdout.write(f'{label}: {(time.perf_counter() - started) * 1000:.1f} ms')
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully warmed {len(keys)} cache entries'))
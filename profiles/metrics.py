@@ -0,0 +1,93 @@
+"""
+Per-endpoint request metrics, exposed in the Prometheus text format.
+
+Histograms and counters are cumulative since process start, as Prometheus
+expects; rolling windows come from ``rate()``/``histogram_quantile()`` over
+scrapes. Each worker process keeps its own registry.
+"""
+import threading
+
+# Upper bounds in seconds of the request duration histogram buckets.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# ``app`` includes serialization (see ServerTimingMiddleware).
+PHASES = ('db', 'app', 'render')
+
+
+class EndpointMetrics:
+    __slots__ = ('buckets', 'count', 'total', 'phases', 'queries', 'duplicates')
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.queries = 0
+        self.duplicates = 0
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def observe(self, endpoint, total, phases, queries, duplicates):
+        index = next((i for i, bound in enumerate(BUCKETS) if total <= bound), len(BUCKETS))
+        with self._lock:
+            metrics = self._endpoints.get(endpoint)
+            if metrics is None:
+                metrics = self._endpoints[endpoint] = EndpointMetrics()
+            metrics.buckets[index] += 1
+            metrics.count += 1
+            metrics.total += total
+            for phase, seconds in phases.items():
+                metrics.phases[phase] += seconds
+            metrics.queries += queries
+            metrics.duplicates += duplicates
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+
+    def render(self):
+        with self._lock:
+            snapshot = {
+                name: (list(m.buckets), m.count, m.total, dict(m.phases), m.queries, m.duplicates)
+                for name, m in self._endpoints.items()
+            }
+
+        lines = [
+            '# HELP profiles_request_duration_seconds Request latency by endpoint.',
+            '# TYPE profiles_request_duration_seconds histogram',
+        ]
+        for name, (buckets, count, total, _, _, _) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, hits in zip(BUCKETS + ('+Inf',), buckets):
+                cumulative += hits
+                lines.append(f'profiles_request_duration_seconds_bucket{{endpoint="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'profiles_request_duration_seconds_sum{{endpoint="{name}"}} {total:.6f}')
+            lines.append(f'profiles_request_duration_seconds_count{{endpoint="{name}"}} {count}')
+
+        lines += [
+            '# HELP profiles_request_phase_seconds_total Time spent per request phase.',
+            '# TYPE profiles_request_phase_seconds_total counter',
+        ]
+        for name, (_, _, _, phases, _, _) in sorted(snapshot.items()):
+            for phase, seconds in phases.items():
+                lines.append(f'profiles_request_phase_seconds_total{{endpoint="{name}",phase="{phase}"}} {seconds:.6f}')
+
+        lines += [
+            '# HELP profiles_db_queries_total SQL queries executed.',
+            '# TYPE profiles_db_queries_total counter',
+        ]
+        lines += [f'profiles_db_queries_total{{endpoint="{name}"}} {values[4]}'
+                  for name, values in sorted(snapshot.items())]
+        lines += [
+            '# HELP profiles_db_duplicate_queries_total Queries repeating an earlier SQL statement in the same request (N+1 candidates).',
+            '# TYPE profiles_db_duplicate_queries_total counter',
+        ]
+        lines += [f'profiles_db_duplicate_queries_total{{endpoint="{name}"}} {values[5]}'
+                  for name, values in sorted(snapshot.items())]
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
@@ -0,0 +1,256 @@
+import contextvars
+import gzip
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.cache import patch_vary_headers
+
+from .metrics import registry
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+_current = contextvars.ContextVar('profiles_request_timing', default=None)
+
+
+class RequestTiming:
+    __slots__ = ('db', 'queries', 'statements', 'view_started', 'view_db', 'app', 'render')
+
+    def __init__(self):
+        self.db = 0.0
+        self.queries = 0
+        self.statements = set()
+        self.view_started = None
+        self.view_db = 0.0
+        self.app = 0.0
+        self.render = 0.0
+
+
+def _time_query(execute, sql, params, many, context):
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.db += time.perf_counter() - started
+        timing.queries += 1
+        # SQL text keeps parameters as placeholders, so a repeat is the
+        # same statement with different values: the N+1 signature.
+        timing.statements.add(sql)
+
+
+def _install(sender=None, connection=None, **kwargs):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+class ServerTimingMiddleware:
+    """
+    Time the DB, app (view and serialization) and render phases of each
+    request, count queries and repeated statements, and report them in a
+    ``Server-Timing`` header and in ``profiles.metrics.registry``.
+
+    Query timing hooks every connection once through ``execute_wrappers``
+    and accumulates into a context variable, which also follows database
+    work that async views run in worker threads. Place this middleware
+    first so its totals cover the rest of the stack.
+
+    Serialization has no phase of its own. Serializers iterate querysets
+    lazily, so a list's query and its prefetches run partway through
+    ``.data``, and the lean path reads its rows as it converts them; a
+    separate timer would have to be stopped around every query. ``app``
+    is the view's time less its queries instead, which for the read
+    endpoints is nearly all serialization.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        connection_created.connect(_install, weak=False, dispatch_uid='profiles_server_timing')
+        for connection in connections.all(initialized_only=True):
+            _install(connection=connection)
+
+    def __call__(self, request):
+        timing = RequestTiming()
+        token = _current.set(timing)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - started
+
+        if timing.view_started is not None and not timing.app:
+            # Plain HttpResponse: no separate render step.
+            timing.app = max(total - timing.db, 0.0)
+        duplicates = timing.queries - len(timing.statements)
+        match = getattr(request, 'resolver_match', None)
+        endpoint = (match.url_name or match.view_name) if match else 'unresolved'
+        registry.observe(endpoint, total, {
+            'db': timing.db, 'app': timing.app, 'render': timing.render,
+        }, timing.queries, duplicates)
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={timing.db * 1000:.2f};desc="{timing.queries} queries, {duplicates} repeated"',
+            f'app;dur={timing.app * 1000:.2f}',
+            f'render;dur={timing.render * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ])
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timing = _current.get()
+        if timing is not None:
+            timing.view_started = time.perf_counter()
+            timing.view_db = timing.db
+
+    def process_template_response(self, request, response):
+        timing = _current.get()
+        if timing is None or timing.view_started is None:
+            return response
+        now = time.perf_counter()
+        timing.app = max(now - timing.view_started - (timing.db - timing.view_db), 0.0)
+        # Render here rather than in the handler so the phase can be timed.
+        response.render()
+        timing.render = time.perf_counter() - now
+        return response
+
+
+_COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'application/javascript',
+                       'application/xml', 'text/')
+
+# Types whose body the ETag fully determines, so the compressed bytes can be
+# found by ETag. Pages such as the browsable API embed per-request state
+# (CSRF token, user) under a shared ETag and are keyed by their body.
+_ETAG_KEYED_TYPES = ('application/json', 'application/x-ndjson')
+
+
+def accepted_encodings(header):
+    """``{coding: q}`` from an ``Accept-Encoding`` header"""
+    encodings = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        encodings[coding] = q
+    return encodings
+
+
+def choose_encoding(header, available):
+    """The first of ``available`` the client accepts, honouring ``q=0`` and ``*``"""
+    encodings = accepted_encodings(header)
+    wildcard = encodings.get('*', 0.0)
+    best, best_q = None, 0.0
+    for coding in available:
+        q = encodings.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class CompressedPayloadCache:
+    """LRU of compressed bodies bounded by their total size in bytes"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            body = self.entries.get(key)
+            if body is not None:
+                self.entries.move_to_end(key)
+            return body
+
+    def set(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self.entries[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with brotli or gzip, as negotiated by
+    ``Accept-Encoding``.
+
+    Only complete bodies of at least ``COMPRESSION_MIN_SIZE`` bytes with a
+    text-like content type are compressed; streaming responses pass through
+    untouched so exports keep flowing. Compressed bodies are kept in an LRU
+    of ``COMPRESSION_CACHE_BYTES`` keyed by ETag for machine formats, and by
+    a digest of the body otherwise, so a hot payload is compressed once. Strong ETags
+    are weakened, as Django's ``GZipMiddleware`` does, because the bytes
+    now differ by encoding.
+
+    brotli is used when the ``brotli`` package is installed.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+        self.gzip_level = getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6)
+        self.brotli_quality = getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5)
+        self.cache = CompressedPayloadCache(getattr(settings, 'COMPRESSION_CACHE_BYTES', 32 * 1024 * 1024))
+        self.encodings = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (response.streaming or response.has_header('Content-Encoding')
+                or len(response.content) < self.min_size
+                or not response.get('Content-Type', '').startswith(_COMPRESSIBLE_TYPES)):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.headers.get('Accept-Encoding', ''), self.encodings)
+        if encoding is None:
+            return response
+
+        etag = response.get('ETag')
+        if etag and response['Content-Type'].startswith(_ETAG_KEYED_TYPES):
+            key = (encoding, etag, response['Content-Type'])
+        else:
+            key = (encoding, hashlib.blake2b(response.content, digest_size=16).digest())
+        body = self.cache.get(key)
+        if body is None:
+            body = self.compress(response.content, encoding)
+            self.cache.set(key, body)
+        if len(body) >= len(response.content):
+            return response
+
+        response.content = body
+        response['Content-Length'] = str(len(body))
+        response['Content-Encoding'] = encoding
+        if etag and not etag.startswith('W/'):
+            response['ETag'] = 'W/' + etag
+        return response
+
+    def compress(self, content, encoding):
+        if encoding == 'br':
+            return brotli.compress(content, quality=self.brotli_quality)
+        # mtime=0 keeps the output identical for identical input.
+        return gzip.compress(content, compresslevel=self.gzip_level, mtime=0)
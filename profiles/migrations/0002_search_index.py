@@ -0,0 +1,68 @@
+from django.db import migrations
+
+# The FTS5 tables as of this migration: (table, source table, columns, BM25
+# weights). Frozen here rather than read from profiles.search, whose
+# indexes have changed since (0003 drops the skills table).
+INDEXES = [
+    ('profiles_search_projects', 'profiles_project', ('title', 'description'), (10.0, 1.0)),
+    ('profiles_search_skills', 'profiles_skill', ('name',), (1.0,)),
+    ('profiles_search_work_experience', 'profiles_workexperience',
+     ('position', 'company', 'description'), (5.0, 5.0, 1.0)),
+]
+
+
+def fts5_available(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if cursor.fetchone()[0]:
+            return True
+        # Builds that load FTS5 as a default extension don't report it.
+        try:
+            cursor.execute('CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x)')
+            cursor.execute('DROP TABLE temp._fts5_probe')
+        except Exception:
+            return False
+    return True
+
+
+def create_search_tables(apps, schema_editor):
+    connection = schema_editor.connection
+    if not fts5_available(connection):
+        # SearchView falls back to LIKE queries on this backend.
+        return
+    with connection.cursor() as cursor:
+        for table, source, columns, weights in INDEXES:
+            values = ', '.join(f"coalesce({column}, '')" for column in columns)
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5({', '.join(columns)}, "
+                f"tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+            )
+            cursor.execute(
+                f"INSERT INTO {table}({table}, rank) VALUES "
+                f"('rank', 'bm25({', '.join(str(weight) for weight in weights)})')"
+            )
+            cursor.execute(
+                f"INSERT INTO {table}(rowid, {', '.join(columns)}) SELECT id, {values} FROM {source}"
+            )
+            cursor.execute(f"INSERT INTO {table}({table}) VALUES ('optimize')")
+
+
+def drop_search_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table, _source, _columns, _weights in INDEXES:
+            cursor.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_tables, drop_search_tables),
+    ]
@@ -0,0 +1,111 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:24
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Copies of profiles.taxonomy as of this migration, which must keep
+# producing the same catalog however the live module changes.
+DEFAULT_ALIASES = {
+    'js': 'JavaScript',
+    'ecmascript': 'JavaScript',
+    'ts': 'TypeScript',
+    'py': 'Python',
+    'python3': 'Python',
+    'golang': 'Go',
+    'node': 'Node.js',
+    'nodejs': 'Node.js',
+    'reactjs': 'React',
+    'react.js': 'React',
+    'vuejs': 'Vue.js',
+    'vue': 'Vue.js',
+    'postgres': 'PostgreSQL',
+    'psql': 'PostgreSQL',
+    'k8s': 'Kubernetes',
+    'html': 'HTML/CSS',
+    'css': 'HTML/CSS',
+    'amazon web services': 'AWS',
+}
+
+_VERSION_SUFFIX = re.compile(r'\s+v?\d+(\.\d+)*$')
+
+
+def normalize_skill_name(name):
+    key = unicodedata.normalize('NFKC', name or '').casefold()
+    key = ' '.join(key.split())
+    return _VERSION_SUFFIX.sub('', key) or key
+
+
+def display_name(name):
+    name = ' '.join((name or '').split())
+    return _VERSION_SUFFIX.sub('', name) or name
+
+
+def backfill_canonical_skills(apps, schema_editor):
+    CanonicalSkill = apps.get_model('profiles', 'CanonicalSkill')
+    SkillAlias = apps.get_model('profiles', 'SkillAlias')
+    Skill = apps.get_model('profiles', 'Skill')
+
+    catalog = {}
+    for name in DEFAULT_ALIASES.values():
+        key = normalize_skill_name(name)
+        if key not in catalog:
+            catalog[key] = CanonicalSkill.objects.create(name=name, key=key)
+    SkillAlias.objects.bulk_create(
+        SkillAlias(alias=alias, canonical=catalog[normalize_skill_name(name)])
+        for alias, name in DEFAULT_ALIASES.items()
+    )
+    aliases = {alias: normalize_skill_name(name) for alias, name in DEFAULT_ALIASES.items()}
+
+    skills = list(Skill.objects.only('id', 'name'))
+    for skill in skills:
+        key = normalize_skill_name(skill.name)
+        key = aliases.get(key, key)
+        if key not in catalog:
+            catalog[key] = CanonicalSkill.objects.create(name=display_name(skill.name), key=key)
+        skill.canonical_id = catalog[key].id
+    Skill.objects.bulk_update(skills, ['canonical'], batch_size=500)
+
+
+def drop_skill_search_table(apps, schema_editor):
+    # Skill search now goes through the canonical catalog instead of FTS.
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS profiles_search_skills')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0002_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CanonicalSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('key', models.CharField(max_length=50, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='skill',
+            name='canonical',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='skills', to='profiles.canonicalskill'),
+        ),
+        migrations.CreateModel(
+            name='SkillAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.CharField(max_length=50, unique=True)),
+                ('canonical', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='profiles.canonicalskill')),
+            ],
+            options={
+                'verbose_name_plural': 'skill aliases',
+            },
+        ),
+        migrations.RunPython(backfill_canonical_skills, migrations.RunPython.noop),
+        migrations.RunPython(drop_skill_search_table, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+PROFILE_STATS_SQL = '''
+INSERT INTO profiles_profilestats
+    (profile_id, skills_count, projects_count, experience_count, years_experience)
+SELECT p.id,
+       (SELECT COUNT(*) FROM profiles_skill s WHERE s.profile_id = p.id),
+       (SELECT COUNT(*) FROM profiles_project r WHERE r.profile_id = p.id),
+       (SELECT COUNT(*) FROM profiles_workexperience w WHERE w.profile_id = p.id),
+       COALESCE((SELECT SUM(s.years_experience) FROM profiles_skill s WHERE s.profile_id = p.id), 0)
+FROM profiles_profile p
+'''
+
+SKILL_STATS_SQL = '''
+INSERT INTO profiles_skillstats (canonical_id, name, projects_count, profiles_count)
+SELECT c.id, c.name,
+       (SELECT COUNT(*) FROM profiles_projectskill ps
+        INNER JOIN profiles_skill s ON s.id = ps.skill_id WHERE s.canonical_id = c.id),
+       (SELECT COUNT(DISTINCT s.profile_id) FROM profiles_skill s WHERE s.canonical_id = c.id)
+FROM profiles_canonicalskill c
+'''
+
+
+def backfill_stats(apps, schema_editor):
+    schema_editor.execute(PROFILE_STATS_SQL)
+    schema_editor.execute(SKILL_STATS_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0003_skill_taxonomy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileStats',
+            fields=[
+                ('profile', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='profiles.profile')),
+                ('skills_count', models.PositiveIntegerField(default=0)),
+                ('projects_count', models.PositiveIntegerField(default=0)),
+                ('experience_count', models.PositiveIntegerField(default=0)),
+                ('years_experience', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'profile stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='SkillStats',
+            fields=[
+                ('canonical', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='profiles.canonicalskill')),
+                ('name', models.CharField(max_length=50)),
+                ('projects_count', models.PositiveIntegerField(default=0)),
+                ('profiles_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'skill stats',
+                'indexes': [models.Index(fields=['-projects_count', '-profiles_count', 'name'], name='skillstats_rank_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:04
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0004_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='education',
+            index=models.Index(fields=['start_date', 'id'], name='education_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='education',
+            index=models.Index(fields=['profile', 'start_date', 'id'], name='education_profile_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['created_at', 'id'], name='profile_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['created_at', 'id'], name='project_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['profile', 'created_at', 'id'], name='project_profile_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='skill',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='skill_name_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workexperience',
+            index=models.Index(fields=['start_date', 'id'], name='workexp_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workexperience',
+            index=models.Index(fields=['profile', 'start_date', 'id'], name='workexp_profile_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workexperience',
+            index=models.Index(fields=['is_current', 'start_date'], name='workexp_current_start_idx'),
+        ),
+    ]
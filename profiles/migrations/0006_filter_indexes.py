@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0005_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['is_ongoing', 'created_at', 'id'], name='project_ongoing_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['start_date'], name='project_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectlink',
+            index=models.Index(fields=['project', 'link_type'], name='projectlink_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='skill',
+            index=models.Index(fields=['level', 'id'], name='skill_level_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='skill',
+            index=models.Index(fields=['name', 'id'], name='skill_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='skill',
+            index=models.Index(fields=['years_experience', 'id'], name='skill_years_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0006_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=30)),
+                ('object_id', models.BigIntegerField()),
+                ('op', models.CharField(max_length=6)),
+                ('profile_id', models.BigIntegerField(null=True)),
+            ],
+        ),
+    ]
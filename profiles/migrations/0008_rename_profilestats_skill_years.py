@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0007_change_events'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='profilestats',
+            old_name='years_experience',
+            new_name='skill_years',
+        ),
+    ]
@@ -1,7 +1,21 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.core.validators import URLValidator
 
 
+class LoadedValuesMixin:
+    """
+    Remembers the column values a row was loaded with in ``_loaded_values``,
+    so save handlers can tell what changed without reading the row again.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+
 class Profile(models.Model):
     name = models.CharField(max_length=100)
     email = models.EmailField()
@@ -9,11 +23,17 @@ class Profile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination order of the profile list
+            models.Index(fields=['created_at', 'id'], name='profile_created_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
 
-class Education(models.Model):
+class Education(LoadedValuesMixin, models.Model):
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='education')
     institution = models.CharField(max_length=200)
     degree = models.CharField(max_length=100)
@@ -22,13 +42,42 @@ class Education(models.Model):
     end_date = models.DateField(blank=True, null=True)
     description = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['start_date', 'id'], name='education_start_idx'),
+            models.Index(fields=['profile', 'start_date', 'id'], name='education_profile_start_idx'),
+        ]
+
     def __str__(self):
         return f"{self.degree} at {self.institution}"
 
 
-class Skill(models.Model):
+class CanonicalSkill(models.Model):
+    """Shared skill catalog entry that per-profile skills resolve to"""
+    name = models.CharField(max_length=50)
+    key = models.CharField(max_length=50, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class SkillAlias(models.Model):
+    """Alternative spelling of a canonical skill, stored normalized"""
+    canonical = models.ForeignKey(CanonicalSkill, on_delete=models.CASCADE, related_name='aliases')
+    alias = models.CharField(max_length=50, unique=True)
+
+    class Meta:
+        verbose_name_plural = 'skill aliases'
+
+    def __str__(self):
+        return f"{self.alias} -> {self.canonical.name}"
+
+
+class Skill(LoadedValuesMixin, models.Model):
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='skills')
     name = models.CharField(max_length=50)
+    canonical = models.ForeignKey(CanonicalSkill, on_delete=models.SET_NULL, blank=True, null=True,
+                                  related_name='skills')
     level = models.CharField(max_length=20, choices=[
         ('beginner', 'Beginner'),
         ('intermediate', 'Intermediate'),
@@ -39,12 +88,21 @@ class Skill(models.Model):
 
     class Meta:
         unique_together = ['profile', 'name']
+        indexes = [
+            # ?name__iexact= on the skill list: filters.Filter compares
+            # LOWER() on both sides, since SQLite's iexact (LIKE) can't use it.
+            models.Index(Lower('name'), name='skill_name_lower_idx'),
+            # ?level= and the ?ordering= fields of the skill list
+            models.Index(fields=['level', 'id'], name='skill_level_idx'),
+            models.Index(fields=['name', 'id'], name='skill_name_idx'),
+            models.Index(fields=['years_experience', 'id'], name='skill_years_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.level})"
 
 
-class Project(models.Model):
+class Project(LoadedValuesMixin, models.Model):
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='projects')
     title = models.CharField(max_length=200)
     description = models.TextField()
@@ -53,11 +111,19 @@ class Project(models.Model):
     is_ongoing = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='project_created_idx'),
+            models.Index(fields=['profile', 'created_at', 'id'], name='project_profile_created_idx'),
+            models.Index(fields=['is_ongoing', 'created_at', 'id'], name='project_ongoing_created_idx'),
+            models.Index(fields=['start_date'], name='project_start_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
 
-class ProjectLink(models.Model):
+class ProjectLink(LoadedValuesMixin, models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='links')
     url = models.URLField()
     link_type = models.CharField(max_length=20, choices=[
@@ -68,11 +134,17 @@ class ProjectLink(models.Model):
     ])
     description = models.CharField(max_length=100, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # ?link_type= on the project list is an EXISTS probe per project
+            models.Index(fields=['project', 'link_type'], name='projectlink_type_idx'),
+        ]
+
     def __str__(self):
         return f"{self.project.title} - {self.link_type}"
 
 
-class ProjectSkill(models.Model):
+class ProjectSkill(LoadedValuesMixin, models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='project_skills')
     skill = models.ForeignKey(Skill, on_delete=models.CASCADE)
 
@@ -83,7 +155,7 @@ class ProjectSkill(models.Model):
         return f"{self.project.title} - {self.skill.name}"
 
 
-class WorkExperience(models.Model):
+class WorkExperience(LoadedValuesMixin, models.Model):
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='work_experience')
     company = models.CharField(max_length=200)
     position = models.CharField(max_length=100)
@@ -93,11 +165,18 @@ class WorkExperience(models.Model):
     is_current = models.BooleanField(default=False)
     description = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['start_date', 'id'], name='workexp_start_idx'),
+            models.Index(fields=['profile', 'start_date', 'id'], name='workexp_profile_start_idx'),
+            models.Index(fields=['is_current', 'start_date'], name='workexp_current_start_idx'),
+        ]
+
     def __str__(self):
         return f"{self.position} at {self.company}"
 
 
-class SocialLink(models.Model):
+class SocialLink(LoadedValuesMixin, models.Model):
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='social_links')
     platform = models.CharField(max_length=20, choices=[
         ('github', 'GitHub'),
@@ -114,3 +193,57 @@ class SocialLink(models.Model):
 
     def __str__(self):
         return f"{self.profile.name} - {self.platform}"
+
+
+class ProfileStats(models.Model):
+    """Per-profile counts, kept current by ``profiles.stats`` on every write"""
+    profile = models.OneToOneField(Profile, on_delete=models.CASCADE, primary_key=True,
+                                   related_name='stats')
+    skills_count = models.PositiveIntegerField(default=0)
+    projects_count = models.PositiveIntegerField(default=0)
+    experience_count = models.PositiveIntegerField(default=0)
+    # Sum of Skill.years_experience over the profile's skills; concurrent
+    # skills add up, so this is not the length of anyone's career.
+    skill_years = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'profile stats'
+
+    def __str__(self):
+        return f"Stats for {self.profile_id}"
+
+
+class SkillStats(models.Model):
+    """Usage counts per catalog skill, kept current by ``profiles.stats``"""
+    canonical = models.OneToOneField(CanonicalSkill, on_delete=models.CASCADE, primary_key=True,
+                                     related_name='stats')
+    # Copy of the catalog name so rankings are one index scan
+    name = models.CharField(max_length=50)
+    projects_count = models.PositiveIntegerField(default=0)
+    profiles_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'skill stats'
+        indexes = [
+            models.Index(fields=['-projects_count', '-profiles_count', 'name'],
+                         name='skillstats_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name}: {self.projects_count} projects"
+
+
+class ChangeEvent(models.Model):
+    """
+    One committed write to a profile's rows, for the change stream
+    (``profiles.events``). Ids are never reused, so they double as SSE event
+    ids; the log keeps the most recent ``CHANGE_LOG_SIZE`` events.
+    """
+    model = models.CharField(max_length=30)
+    object_id = models.BigIntegerField()
+    op = models.CharField(max_length=6)
+    # Not a foreign key: a profile's deletion is itself an event.
+    profile_id = models.BigIntegerField(null=True)
+
+    def __str__(self):
+        return f"{self.op} {self.model} {self.object_id}"
@@ -0,0 +1,184 @@
+import base64
+import json
+from datetime import date, datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def keyset_ordering(queryset, view, default=('id',)):
+    """
+    The ordering a keyset page seeks on: the queryset's explicit
+    ``order_by()`` (e.g. from ``?ordering=``), else the view's
+    ``keyset_ordering``.
+    """
+    explicit = queryset.query.order_by
+    if explicit and all(isinstance(term, str) for term in explicit):
+        return tuple(explicit)
+    return tuple(getattr(view, 'keyset_ordering', default))
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks on a composite ordering instead of OFFSET.
+
+    Views declare ``keyset_ordering``, a tuple of non-null field names ending
+    in a unique one (e.g. ``('created_at', 'id')``); the cursor holds the
+    ordering values of the boundary row, so every page costs one indexed
+    range scan however deep it is. An explicit ``order_by()`` on the
+    queryset, as ``?ordering=`` applies, takes the place of the view's
+    ordering; cursors are only valid for the ordering that made them.
+    ``?page=`` switches to page-number mode and ``?count=true`` adds a
+    capped, and so approximate, total.
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_query_param = 'page'
+    count_query_param = 'count'
+    count_cap = 10000
+    default_ordering = ('id',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = keyset_ordering(queryset, view, self.default_ordering)
+        queryset = queryset.order_by(*self.ordering)
+
+        self.page_number = None
+        if self.page_query_param in request.query_params:
+            self.page_number = PageNumberPagination()
+            self.page_number.page_size = self.get_page_size(request)
+            return self.page_number.paginate_queryset(queryset, request, view)
+
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes'):
+            self.count = queryset.order_by()[:self.count_cap + 1].count()
+
+        page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request, queryset.model)
+        if reverse:
+            queryset = queryset.reverse()
+        if position is not None:
+            queryset = queryset.filter(self.seek_filter(position, reverse))
+
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        # Moving backwards, there is always a page after; forwards, before.
+        has_next = has_more if not reverse else position is not None
+        has_previous = has_more if reverse else position is not None
+        self.next_position = self.row_position(rows[-1]) if rows and has_next else None
+        self.previous_position = self.row_position(rows[0]) if rows and has_previous else None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def seek_filter(self, position, reverse):
+        """
+        Rows strictly after ``position`` in the ordering, as a disjunction.
+
+        ``(a, b) > (x, y)`` becomes ``a >= x AND (a > x OR (a = x AND b > y))``,
+        with the comparison flipped for descending fields and when paging
+        backwards. The redundant ``a >= x`` is what lets SQLite seek into the
+        ordering index instead of scanning it from the start.
+        """
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            term = Q(**{f'{name}__{"lt" if descending else "gt"}': position[index]})
+            for previous, value in zip(self.ordering[:index], position):
+                term &= Q(**{previous.lstrip('-'): value})
+            condition |= term
+        if len(self.ordering) > 1:
+            first = self.ordering[0]
+            descending = first.startswith('-') != reverse
+            condition &= Q(**{f'{first.lstrip("-")}__{"lte" if descending else "gte"}': position[0]})
+        return condition
+
+    def row_position(self, row):
+        if isinstance(row, dict):
+            # values() rows from the lean serialization path
+            return [row[field.lstrip('-')] for field in self.ordering]
+        return [getattr(row, field.lstrip('-')) for field in self.ordering]
+
+    def encode_cursor(self, position, reverse):
+        values = [value.isoformat() if isinstance(value, (date, datetime)) else value
+                  for value in position]
+        payload = json.dumps({'p': values, 'r': reverse, 'o': list(self.ordering)},
+                             separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)))
+            values = payload['p']
+            if len(values) != len(self.ordering):
+                raise ValueError
+            if payload.get('o', list(self.ordering)) != list(self.ordering):
+                raise ValueError
+            position = [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+            return position, bool(payload.get('r'))
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def cursor_link(self, position, reverse):
+        if position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position, reverse))
+
+    def get_next_link(self):
+        return self.cursor_link(self.next_position, False)
+
+    def get_previous_link(self):
+        return self.cursor_link(self.previous_position, True)
+
+    def get_paginated_response(self, data):
+        if self.page_number is not None:
+            return self.page_number.get_paginated_response(data)
+        payload = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.count is not None:
+            payload = {
+                'count': min(self.count, self.count_cap),
+                'count_is_exact': self.count <= self.count_cap,
+                **payload,
+            }
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'example': 123},
+                'count_is_exact': {'type': 'boolean'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,171 @@
+from functools import lru_cache
+
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from rest_framework import serializers
+
+
+# Key under which a tree node stores the counts its serializer reads.
+_COUNTS = object()
+
+
+def _related_fields(model):
+    """Map every attribute name usable in a lookup to its relation field"""
+    fields = {}
+    for field in model._meta.get_fields():
+        if not field.is_relation:
+            continue
+        fields[field.name] = field
+        if field.auto_created and not field.concrete:
+            fields[field.get_accessor_name()] = field
+    return fields
+
+
+def _add_lookup(tree, parts):
+    for part in parts:
+        tree = tree.setdefault(part, {})
+
+
+def _build_tree(serializer, tree=None):
+    """Collect the relations a serializer instance will traverse"""
+    tree = {} if tree is None else tree
+    meta = getattr(serializer, 'Meta', None)
+    fields = serializer.fields
+    for lookup in getattr(meta, 'related_lookups', ()):
+        _add_lookup(tree, lookup.split('__'))
+    # Only plan for the fields still present after sparse fieldsets.
+    for name, lookup in getattr(meta, 'related_values', {}).items():
+        if name in fields:
+            _add_lookup(tree, lookup.split('__')[:-1])
+    tree.setdefault(_COUNTS, {}).update({
+        name: relation for name, relation in getattr(meta, 'annotated_counts', {}).items()
+        if name in fields
+    })
+
+    for field in fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        if isinstance(field, serializers.ListSerializer):
+            _build_tree(field.child, tree.setdefault(field.source, {}))
+        elif isinstance(field, serializers.BaseSerializer):
+            _build_tree(field, tree.setdefault(field.source, {}))
+        elif len(field.source_attrs) > 1:
+            _add_lookup(tree, field.source_attrs[:-1])
+    return tree
+
+
+@lru_cache(maxsize=None)
+def _class_tree(serializer_class):
+    return _build_tree(serializer_class())
+
+
+def count_subquery(model, relation):
+    """
+    Correlated ``COUNT(*)`` of a reverse relation, 0 when there are no rows.
+
+    A subquery per relation avoids the row multiplication of combining
+    several ``Count()`` joins in the same query.
+    """
+    field = _related_fields(model)[relation]
+    child_model = field.related_model
+    fk_name = field.field.name
+    counts = (
+        child_model._default_manager
+        .filter(**{fk_name: OuterRef('pk')})
+        .order_by()
+        .values(fk_name)
+        .annotate(count=Count('*'))
+        .values('count')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def annotate_counts(queryset, counts):
+    """Annotate ``{name: relation}`` counts onto a queryset"""
+    if not counts:
+        return queryset
+    return queryset.annotate(**{
+        name: count_subquery(queryset.model, relation)
+        for name, relation in counts.items()
+    })
+
+
+def annotated_count(obj, name, relation):
+    """Read a planned count annotation, counting in the database if absent"""
+    count = getattr(obj, name, None)
+    if count is None:
+        count = getattr(obj, relation).count()
+    return count
+
+
+def _compile(model, tree):
+    """Turn a relation tree into select_related names and Prefetch objects"""
+    select, prefetch = [], []
+    related = _related_fields(model)
+    for name, subtree in tree.items():
+        if name is _COUNTS:
+            continue
+        field = related.get(name)
+        if field is None:
+            # Not a relation (e.g. a property); nothing to plan for it.
+            continue
+        child_model = field.related_model
+        if field.many_to_one or field.one_to_one:
+            # Counts are only annotated on the root and on prefetched rows.
+            child_select, child_prefetch = _compile(child_model, subtree)
+            select.append(name)
+            select.extend(f'{name}__{lookup}' for lookup in child_select)
+            prefetch.extend(
+                Prefetch(f'{name}__{p.prefetch_through}', queryset=p.queryset)
+                for p in child_prefetch
+            )
+        else:
+            child_select, child_prefetch = _compile(child_model, subtree)
+            queryset = annotate_counts(
+                child_model._default_manager.all(), subtree.get(_COUNTS)
+            )
+            if child_select:
+                queryset = queryset.select_related(*child_select)
+            if child_prefetch:
+                queryset = queryset.prefetch_related(*child_prefetch)
+            prefetch.append(Prefetch(name, queryset=queryset))
+    return select, prefetch
+
+
+def plan_queryset(queryset, serializer):
+    """
+    Apply the select_related/prefetch_related chain a serializer needs.
+
+    ``serializer`` may be a serializer class or instance. Nested serializers
+    and dotted ``source`` attributes are discovered automatically; relations
+    only reached from ``SerializerMethodField`` methods are declared with
+    ``Meta.related_lookups``, or come from ``Meta.related_values``.
+    ``Meta.annotated_counts`` maps attribute names to reverse relations
+    whose row counts are annotated in the same query. An instance pruned by
+    sparse fieldsets is planned for just the fields it kept.
+    """
+    if isinstance(serializer, serializers.BaseSerializer):
+        if isinstance(serializer, serializers.ListSerializer):
+            serializer = serializer.child
+        tree = _build_tree(serializer)
+    else:
+        tree = _class_tree(serializer)
+
+    queryset = annotate_counts(queryset, tree.get(_COUNTS))
+    select, prefetch = _compile(queryset.model, tree)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+class PlannedQuerysetMixin:
+    """Generic view mixin applying the serializer's query plan"""
+
+    def get_queryset(self):
+        return plan_queryset(super().get_queryset(), self.get_planned_serializer())
+
+    def get_planned_serializer(self):
+        """Serializer class or instance whose relations the plan covers"""
+        return self.get_serializer_class()
@@ -0,0 +1,52 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    ``JSONRenderer`` backed by orjson when it is installed.
+
+    Output is byte-for-byte what DRF's renderer produces for the default
+    compact, unicode settings: datetimes, decimals, lazy strings and other
+    non-native values are handed to DRF's ``JSONEncoder.default`` rather
+    than orjson's own formatting. Indented output, unserializable values
+    and a missing orjson fall back to ``JSONRenderer``.
+    """
+    encoder = JSONEncoder()
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or not self.compact or self.ensure_ascii
+                or self.get_indent(accepted_media_type, renderer_context or {})):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder.default, option=self.options)
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same escaping as JSONRenderer: U+2028/U+2029 are valid JSON but
+        # end lines in JavaScript.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Newline-delimited JSON. Views using it stream their own body; what goes
+    through ``render`` (errors, throttling, 404s) is one JSON document on
+    its own line, which is also valid NDJSON.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+    json = FastJSONRenderer()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return self.json.render(data, renderer_context=renderer_context) + b'\n'
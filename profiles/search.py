@@ -0,0 +1,251 @@
+import re
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, router
+from django.db.models import Q
+
+from . import taxonomy
+from .models import Project, Skill, WorkExperience
+
+
+def _highlight():
+    return getattr(settings, 'SEARCH_HIGHLIGHT', ('<mark>', '</mark>'))
+
+
+class SearchIndex:
+    """
+    One searchable model: the FTS5 table mirroring it and the columns copied.
+
+    The FTS table uses the model's primary key as its rowid so that
+    updates, deletes and joins back to the model never need a lookup.
+    """
+
+    def __init__(self, name, model, columns, weights):
+        self.name = name
+        self.model = model
+        self.columns = columns
+        self.weights = weights
+        self.table = f'profiles_search_{name}'
+
+    def create_sql(self):
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+            f"{', '.join(self.columns)}, "
+            f"tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+            # Make ORDER BY rank use the column-weighted BM25 score.
+            f"INSERT INTO {self.table}({self.table}, rank) VALUES "
+            f"('rank', 'bm25({', '.join(str(w) for w in self.weights)})')",
+        ]
+
+    def drop_sql(self):
+        return [f'DROP TABLE IF EXISTS {self.table}']
+
+    def rebuild_sql(self):
+        source = ', '.join(f"coalesce({column}, '')" for column in self.columns)
+        return [
+            f'DELETE FROM {self.table}',
+            f"INSERT INTO {self.table}(rowid, {', '.join(self.columns)}) "
+            f"SELECT id, {source} FROM {self.model._meta.db_table}",
+            f"INSERT INTO {self.table}({self.table}) VALUES ('optimize')",
+        ]
+
+    def row(self, obj):
+        return [obj.pk] + [getattr(obj, column) or '' for column in self.columns]
+
+    def insert_sql(self):
+        placeholders = ', '.join(['%s'] * (len(self.columns) + 1))
+        return f"INSERT INTO {self.table}(rowid, {', '.join(self.columns)}) VALUES ({placeholders})"
+
+    def delete_sql(self):
+        return f'DELETE FROM {self.table} WHERE rowid = %s'
+
+    def text_filter(self, query):
+        condition = Q()
+        for column in self.columns:
+            condition |= Q(**{f'{column}__icontains': query})
+        return condition
+
+
+INDEXES = {
+    'projects': SearchIndex('projects', Project, ('title', 'description'), (10.0, 1.0)),
+    'work_experience': SearchIndex(
+        'work_experience', WorkExperience,
+        ('position', 'company', 'description'), (5.0, 5.0, 1.0),
+    ),
+}
+
+INDEXED_MODELS = {index.model: index for index in INDEXES.values()}
+
+
+def fts5_available(connection):
+    """Whether the backend can host the FTS5 tables at all"""
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if cursor.fetchone()[0]:
+            return True
+        # Builds that load FTS5 as a default extension don't report it.
+        try:
+            cursor.execute('CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x)')
+            cursor.execute('DROP TABLE temp._fts5_probe')
+        except Exception:
+            return False
+    return True
+
+
+def fts_match_expression(query):
+    """
+    Quote each word of free text as an FTS5 prefix term.
+
+    Quoting keeps user input from being parsed as FTS5 syntax; the prefix
+    ``*`` keeps the substring feel of the old ``icontains`` search.
+    """
+    terms = re.findall(r'\w+', query)
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def make_snippet(text, query, width=64):
+    """Python counterpart of FTS5 ``snippet()`` for the LIKE backend"""
+    text = text or ''
+    start_mark, end_mark = _highlight()
+    position = text.lower().find(query.lower())
+    if position < 0:
+        return text[:width]
+    start = max(0, position - width // 2)
+    end = min(len(text), position + len(query) + width // 2)
+    return ''.join([
+        '…' if start else '',
+        text[start:position],
+        start_mark, text[position:position + len(query)], end_mark,
+        text[position + len(query):end],
+        '…' if end < len(text) else '',
+    ])
+
+
+class FTS5Backend:
+    """BM25-ranked search over the FTS5 tables"""
+
+    def __init__(self, using):
+        self.using = using
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    def search(self, index, query, offset, limit):
+        """Return ``(count, [(pk, snippet), ...])`` for one page of hits"""
+        expression = fts_match_expression(query)
+        if not expression:
+            return 0, []
+        start_mark, end_mark = _highlight()
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {index.table} WHERE {index.table} MATCH %s',
+                [expression],
+            )
+            count = cursor.fetchone()[0]
+            if not count or offset >= count:
+                return count, []
+            cursor.execute(
+                f"SELECT rowid, snippet({index.table}, -1, %s, %s, '…', 12) "
+                f"FROM {index.table} WHERE {index.table} MATCH %s "
+                f"ORDER BY rank LIMIT %s OFFSET %s",
+                [start_mark, end_mark, expression, limit, offset],
+            )
+            return count, cursor.fetchall()
+
+    def index(self, obj):
+        self.index_many(type(obj), [obj])
+
+    def index_many(self, model, objs):
+        index = INDEXED_MODELS[model]
+        with self.connection.cursor() as cursor:
+            cursor.executemany(index.delete_sql(), [[obj.pk] for obj in objs])
+            cursor.executemany(index.insert_sql(), [index.row(obj) for obj in objs])
+
+    def remove(self, model, pk):
+        with self.connection.cursor() as cursor:
+            cursor.execute(INDEXED_MODELS[model].delete_sql(), [pk])
+
+    def rebuild(self, index):
+        """Repopulate one index from its model table; returns the row count"""
+        with self.connection.cursor() as cursor:
+            for sql in index.rebuild_sql():
+                cursor.execute(sql)
+            cursor.execute(f'SELECT count(*) FROM {index.table}')
+            return cursor.fetchone()[0]
+
+
+class LikeBackend:
+    """Unranked ``icontains`` search for backends without FTS5"""
+
+    def search(self, index, query, offset, limit):
+        queryset = index.model._default_manager.filter(index.text_filter(query))
+        count = queryset.count()
+        if not count or offset >= count:
+            return count, []
+        hits = []
+        for row in queryset.order_by('pk').values_list('pk', *index.columns)[offset:offset + limit]:
+            text = next((value for value in row[1:] if value and query.lower() in value.lower()), '')
+            hits.append((row[0], make_snippet(text, query)))
+        return count, hits
+
+    def index(self, obj):
+        pass
+
+    def index_many(self, model, objs):
+        pass
+
+    def remove(self, model, pk):
+        pass
+
+    def rebuild(self, index):
+        return 0
+
+
+_backends = {}
+
+
+def get_backend(using=DEFAULT_DB_ALIAS):
+    """FTS5 when the search tables exist on ``using``, LIKE otherwise"""
+    connection = connections[using]
+    key = (using, connection.settings_dict['NAME'])
+    if key not in _backends:
+        tables = connection.introspection.table_names()
+        if all(index.table in tables for index in INDEXES.values()):
+            _backends[key] = FTS5Backend(using)
+        else:
+            _backends[key] = LikeBackend()
+    return _backends[key]
+
+
+def search_skills(query, offset, limit, using=DEFAULT_DB_ALIAS):
+    """
+    Skills whose canonical catalog entry matches ``query``.
+
+    Matching happens on the small catalog; skills are then fetched through
+    the indexed ``canonical_id`` key rather than by scanning their names.
+    """
+    queryset = Skill.objects.using(using).filter(
+        canonical_id__in=taxonomy.matching_canonical_ids(query).using(using)
+    )
+    count = queryset.count()
+    if not count or offset >= count:
+        return count, []
+    rows = queryset.order_by('pk').values_list('pk', 'name')[offset:offset + limit]
+    return count, [(pk, make_snippet(name, query)) for pk, name in rows]
+
+
+def search(name, query, offset=0, limit=20, using=None):
+    """
+    Search one category; returns ``(count, [(pk, snippet), ...])``.
+
+    Full-text hits are BM25-ranked on FTS5 and in primary-key order on the
+    fallback; skills are resolved through the canonical skill catalog.
+    ``using`` defaults to the alias the router picks for reading the model.
+    """
+    if name == 'skills':
+        return search_skills(query, offset, limit, using or router.db_for_read(Skill))
+    index = INDEXES[name]
+    return get_backend(using or router.db_for_read(index.model)).search(index, query, offset, limit)
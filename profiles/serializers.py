@@ -1,8 +1,16 @@
 from rest_framework import serializers
 from .models import (
-    Profile, Education, Skill, Project, ProjectLink, 
+    Profile, Education, Skill, SkillStats, Project, ProjectLink, 
     ProjectSkill, WorkExperience, SocialLink
 )
+from .queries import annotated_count
+
+
+class ProfileBriefSerializer(serializers.ModelSerializer):
+    """Profile embedded in another resource by ``?expand=profile``"""
+    class Meta:
+        model = Profile
+        fields = ['id', 'name', 'email']
 
 
 class EducationSerializer(serializers.ModelSerializer):
@@ -14,7 +22,9 @@ class EducationSerializer(serializers.ModelSerializer):
 class SkillSerializer(serializers.ModelSerializer):
     class Meta:
         model = Skill
-        fields = '__all__'
+        # The catalog entry is derived from ``name`` on save and stays
+        # internal: clients search and rank through the catalog instead.
+        exclude = ['canonical']
 
 
 class ProjectLinkSerializer(serializers.ModelSerializer):
@@ -52,6 +62,8 @@ class ProjectSerializer(serializers.ModelSerializer):
     class Meta:
         model = Project
         fields = '__all__'
+        related_values = {'skills': 'project_skills__skill__name'}
+        expandable_fields = {'profile': ProfileBriefSerializer}
     
     def get_skills(self, obj):
         return [ps.skill.name for ps in obj.project_skills.all()]
@@ -77,12 +89,13 @@ class ProfileSummarySerializer(serializers.ModelSerializer):
     class Meta:
         model = Profile
         fields = ['id', 'name', 'email', 'bio', 'skills_count', 'projects_count']
+        annotated_counts = {'skills_count': 'skills', 'projects_count': 'projects'}
     
     def get_skills_count(self, obj):
-        return obj.skills.count()
+        return annotated_count(obj, 'skills_count', 'skills')
     
     def get_projects_count(self, obj):
-        return obj.projects.count()
+        return annotated_count(obj, 'projects_count', 'projects')
 
 
 class SkillSummarySerializer(serializers.ModelSerializer):
@@ -92,9 +105,19 @@ class SkillSummarySerializer(serializers.ModelSerializer):
     class Meta:
         model = Skill
         fields = ['id', 'name', 'level', 'years_experience', 'projects_count']
+        annotated_counts = {'projects_count': 'projectskill_set'}
     
     def get_projects_count(self, obj):
-        return obj.projectskill_set.count()
+        return annotated_count(obj, 'projects_count', 'projectskill_set')
+
+
+class SkillStatsSerializer(serializers.ModelSerializer):
+    """Serializer for catalog-wide skill statistics"""
+    id = serializers.IntegerField(source='canonical_id', read_only=True)
+    
+    class Meta:
+        model = SkillStats
+        fields = ['id', 'name', 'projects_count', 'profiles_count']
 
 
 class ProjectSummarySerializer(serializers.ModelSerializer):
@@ -106,9 +129,12 @@ class ProjectSummarySerializer(serializers.ModelSerializer):
         model = Project
         fields = ['id', 'title', 'description', 'start_date', 'end_date', 
                  'is_ongoing', 'skills', 'links_count']
+        related_values = {'skills': 'project_skills__skill__name'}
+        annotated_counts = {'links_count': 'links'}
+        expandable_fields = {'profile': ProfileBriefSerializer}
     
     def get_skills(self, obj):
         return [ps.skill.name for ps in obj.project_skills.all()]
     
     def get_links_count(self, obj):
-        return obj.links.count()
+        return annotated_count(obj, 'links_count', 'links')
@@ -0,0 +1,227 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from . import cache, events, search, stats, taxonomy
+from .models import (
+    Profile, Education, CanonicalSkill, LoadedValuesMixin, Skill, Project, ProjectLink,
+    ProjectSkill, ProfileStats, WorkExperience, SocialLink
+)
+
+# Sent after bulk_create()/bulk_update() writes, which skip post_save;
+# receives ``instances``.
+bulk_saved = Signal()
+
+PROFILE_MODELS = [
+    Profile, Education, Skill, Project, ProjectLink,
+    ProjectSkill, WorkExperience, SocialLink
+]
+
+
+def owning_profile_id(instance):
+    """Id of the profile a row belongs to, querying only for project children"""
+    if isinstance(instance, Profile):
+        return instance.pk
+    if hasattr(instance, 'profile_id'):
+        return instance.profile_id
+    project = instance._state.fields_cache.get('project')
+    if project is not None:
+        return project.profile_id
+    return (
+        Project.objects.filter(pk=instance.project_id)
+        .values_list('profile_id', flat=True).first()
+    )
+
+
+@receiver(pre_save, sender=Skill)
+def assign_canonical_skill(sender, instance, raw=False, **kwargs):
+    """Point every skill at its catalog entry before it is written"""
+    if raw:
+        return
+    # An unrenamed skill keeps its entry: resolving costs two queries.
+    loaded = getattr(instance, '_loaded_values', {})
+    if instance.canonical_id is not None and 'name' in loaded and loaded['name'] == instance.name:
+        return
+    instance.canonical = taxonomy.resolve(instance.name)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=WorkExperience)
+def update_search_index(sender, instance, raw=False, using=None, **kwargs):
+    """Keep the full-text index in step with searchable rows"""
+    if raw:
+        return
+    search.get_backend(using).index(instance)
+
+
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=WorkExperience)
+def remove_from_search_index(sender, instance, using=None, **kwargs):
+    search.get_backend(using).remove(sender, instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+def create_profile_stats(sender, instance, created=False, raw=False, using=None, **kwargs):
+    if created and not raw:
+        ProfileStats.objects.using(using).bulk_create([ProfileStats(profile=instance)],
+                                                      ignore_conflicts=True)
+
+
+@receiver(post_save, sender=CanonicalSkill)
+def refresh_renamed_skill_stats(sender, instance, created=False, raw=False, using=None, **kwargs):
+    if not raw:
+        stats.refresh_skills([instance.pk], using=using,
+                             fields=stats.SKILL_FIELDS if created else ['name'])
+
+
+def remember_stats_keys(sender, instance, raw=False, using=None, **kwargs):
+    """Note which stats rows an update moves a row away from"""
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    keys = stats.STATS_KEYS[sender]
+    loaded = getattr(instance, '_loaded_values', {})
+    if all(key in loaded for key in keys):
+        instance._previous_stats_keys = {key: loaded[key] for key in keys}
+    else:
+        # Built by hand or loaded without these columns
+        instance._previous_stats_keys = (
+            sender._default_manager.using(using).filter(pk=instance.pk)
+            .values(*keys).first()
+        )
+
+
+def refresh_saved_stats(sender, instance, created=False, raw=False, using=None, **kwargs):
+    """Recompute the stats rows a save touched, in the writer's transaction"""
+    if raw:
+        return
+    current = stats.stats_keys(instance)
+    previous = None if created else instance.__dict__.pop('_previous_stats_keys', None)
+    rows = [current, previous] if previous and previous != current else [current]
+    stats.refresh_rows(sender, rows, using=using, moved=created or previous != current)
+
+
+# Models whose deletes cascade to stats-tracked rows
+CASCADE_ORIGINS = [Profile, Project, Skill]
+
+
+def _model_of(origin):
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+def refresh_deleted_stats(sender, instance, using=None, origin=None, **kwargs):
+    """
+    Recompute the stats rows a delete touched. Rows a cascade takes with
+    it are collected on the delete's origin and refreshed once, when the
+    cascade reaches the origin's own rows (deleted last).
+    """
+    rows = [stats.stats_keys(instance)]
+    origin_model = _model_of(origin)
+    if origin_model in CASCADE_ORIGINS and origin_model is not sender:
+        origin.__dict__.setdefault('_cascaded_stats', {}).setdefault(sender, []).extend(rows)
+        return
+    stats.refresh_rows(sender, rows, using=using)
+
+
+def refresh_cascaded_stats(sender, instance, using=None, origin=None, **kwargs):
+    if _model_of(origin) is not sender:
+        return
+    cascaded = origin.__dict__.pop('_cascaded_stats', {})
+    # A deleted profile's stats row went with it (CASCADE).
+    profiles = sender is not Profile
+    for model, rows in cascaded.items():
+        stats.refresh_rows(model, rows, using=using, profiles=profiles)
+
+
+for model in CASCADE_ORIGINS:
+    post_delete.connect(refresh_cascaded_stats, sender=model,
+                        dispatch_uid=f'refresh_cascaded_stats_{model.__name__}')
+
+for model in stats.STATS_KEYS:
+    pre_save.connect(remember_stats_keys, sender=model,
+                     dispatch_uid=f'remember_stats_keys_{model.__name__}')
+    post_save.connect(refresh_saved_stats, sender=model,
+                      dispatch_uid=f'refresh_stats_save_{model.__name__}')
+    post_delete.connect(refresh_deleted_stats, sender=model,
+                        dispatch_uid=f'refresh_stats_delete_{model.__name__}')
+
+
+def remember_owner(sender, instance, raw=False, using=None, **kwargs):
+    """Note the profile an update moves a row away from"""
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    field = 'profile_id' if hasattr(instance, 'profile_id') else 'project_id'
+    loaded = getattr(instance, '_loaded_values', {})
+    if field in loaded:
+        previous = loaded[field]
+    else:
+        # Loaded without the column
+        previous = (
+            sender._default_manager.using(using).filter(pk=instance.pk)
+            .values_list(field, flat=True).first()
+        )
+    if previous is None or previous == getattr(instance, field):
+        return
+    if field == 'project_id':
+        previous = (
+            Project.objects.using(using).filter(pk=previous)
+            .values_list('profile_id', flat=True).first()
+        )
+    instance._previous_profile_id = previous
+
+
+def publish_change(sender, instance, raw=False, using=None, created=None, **kwargs):
+    """
+    Bump the response cache version of the profile owning the row, and of
+    the one a moved row left, and log the change for both.
+    """
+    if raw:
+        return
+    profile_id = owning_profile_id(instance)
+    previous = instance.__dict__.pop('_previous_profile_id', None)
+    owners = [profile_id] if previous in (None, profile_id) else [previous, profile_id]
+    for owner in owners:
+        cache.invalidate_profile(owner)
+    op = 'delete' if created is None else 'create' if created else 'update'
+    events.record(sender, [(instance.pk, owner) for owner in owners], op, using=using)
+
+
+def remember_saved_values(sender, instance, raw=False, **kwargs):
+    """What a later save of this instance is compared with"""
+    if raw:
+        return
+    instance._loaded_values = {
+        field.attname: getattr(instance, field.attname)
+        for field in sender._meta.concrete_fields if field.attname in instance.__dict__
+    }
+
+
+for model in PROFILE_MODELS:
+    if model is not Profile:
+        pre_save.connect(remember_owner, sender=model,
+                         dispatch_uid=f'remember_owner_{model.__name__}')
+    post_save.connect(publish_change, sender=model,
+                      dispatch_uid=f'publish_change_save_{model.__name__}')
+    post_delete.connect(publish_change, sender=model,
+                        dispatch_uid=f'publish_change_delete_{model.__name__}')
+    # Connected last: the handlers above compare with the previous snapshot.
+    if issubclass(model, LoadedValuesMixin):
+        post_save.connect(remember_saved_values, sender=model,
+                          dispatch_uid=f'remember_saved_values_{model.__name__}')
+
+
+@receiver(bulk_saved)
+def handle_bulk_saved(sender, instances, using=None, **kwargs):
+    """Apply the post_save side effects to a batch of rows at once"""
+    if sender in search.INDEXED_MODELS:
+        search.get_backend(using or 'default').index_many(sender, instances)
+    if sender in stats.STATS_KEYS:
+        keys = [stats.stats_keys(instance) for instance in instances]
+        # Keys a row moved away from, noted by the writer as pre_save would
+        keys += [instance._previous_stats_keys for instance in instances
+                 if getattr(instance, '_previous_stats_keys', None)]
+        stats.refresh_rows(sender, keys, using=using or 'default')
+    rows = [(instance.pk, owning_profile_id(instance)) for instance in instances]
+    for profile_id in {profile_id for _pk, profile_id in rows}:
+        cache.invalidate_profile(profile_id)
+    if sender in PROFILE_MODELS:
+        events.record(sender, rows, 'save', using=using or 'default')
@@ -0,0 +1,200 @@
+"""
+Materialized aggregates for the summary and top-skills endpoints.
+
+``ProfileStats`` and ``SkillStats`` rows are recomputed for just the keys a
+write touches, with one ``UPDATE ... SET col = (SELECT ...)`` per table, so
+they run inside the writer's transaction and cannot drift the way
+``+1``/``-1`` deltas do under concurrent or bulk writes. ``rebuild()``
+recomputes everything and reports how many rows had drifted anyway (raw
+SQL, fixtures, writes that bypass signals).
+
+Only the columns a model feeds are recomputed, and an update that leaves
+a row's ``STATS_KEYS`` alone can only have changed sums, not counts.
+"""
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .models import (
+    CanonicalSkill, Profile, ProfileStats, Project, ProjectSkill, Skill,
+    SkillStats, WorkExperience
+)
+from .queries import count_subquery
+
+PROFILE_FIELDS = ['skills_count', 'projects_count', 'experience_count', 'skill_years']
+SKILL_FIELDS = ['name', 'projects_count', 'profiles_count']
+
+
+def _aggregate(queryset, group, aggregate):
+    """Correlated scalar subquery of one aggregate, 0 when there are no rows"""
+    values = queryset.order_by().values(group).annotate(value=aggregate).values('value')
+    return Coalesce(Subquery(values, output_field=IntegerField()), 0)
+
+
+def profile_expressions():
+    """Stat columns as expressions correlated on a profile's ``pk``"""
+    return {
+        'skills_count': count_subquery(Profile, 'skills'),
+        'projects_count': count_subquery(Profile, 'projects'),
+        'experience_count': count_subquery(Profile, 'work_experience'),
+        'skill_years': _aggregate(
+            Skill.objects.filter(profile=OuterRef('pk')), 'profile', Sum('years_experience')
+        ),
+    }
+
+
+def skill_expressions():
+    """Stat columns as expressions correlated on a catalog skill's ``pk``"""
+    return {
+        'name': Subquery(CanonicalSkill.objects.filter(pk=OuterRef('pk')).values('name')[:1]),
+        'projects_count': _aggregate(
+            ProjectSkill.objects.filter(skill__canonical=OuterRef('pk')), 'skill__canonical', Count('*')
+        ),
+        'profiles_count': _aggregate(
+            Skill.objects.filter(canonical=OuterRef('pk')), 'canonical', Count('profile', distinct=True)
+        ),
+    }
+
+
+def _refresh(stats_model, source_model, expressions, fields, pks, using, update_fields):
+    pks = {pk for pk in pks if pk is not None}
+    if not pks or not update_fields:
+        return
+    manager = stats_model._default_manager.db_manager(using)
+    updated = manager.filter(pk__in=pks).update(**{name: expressions[name] for name in update_fields})
+    if updated == len(pks):
+        return
+    # Rows that don't exist yet are created from the same expressions.
+    missing = pks - set(manager.filter(pk__in=pks).values_list('pk', flat=True))
+    rows = (
+        source_model._default_manager.db_manager(using).filter(pk__in=missing)
+        .annotate(**{f'stat_{name}': expression for name, expression in expressions.items()})
+        .values('pk', *(f'stat_{name}' for name in fields))
+    )
+    manager.bulk_create([
+        stats_model(pk=row['pk'], **{name: row[f'stat_{name}'] for name in fields})
+        for row in rows
+    ], ignore_conflicts=True)
+
+
+def refresh_profiles(profile_ids, using=DEFAULT_DB_ALIAS, fields=PROFILE_FIELDS):
+    """Recompute ``fields`` of these profiles' stats, creating missing rows"""
+    _refresh(ProfileStats, Profile, profile_expressions(), PROFILE_FIELDS, profile_ids, using, fields)
+
+
+def refresh_skills(canonical_ids, using=DEFAULT_DB_ALIAS, fields=SKILL_FIELDS):
+    """Recompute ``fields`` of these catalog skills' stats, creating missing rows"""
+    _refresh(SkillStats, CanonicalSkill, skill_expressions(), SKILL_FIELDS, canonical_ids, using, fields)
+
+
+def affected_keys(model, rows, using=DEFAULT_DB_ALIAS):
+    """
+    ``(profile_ids, canonical_ids)`` whose stats depend on ``rows``, given as
+    dicts of the model's ``STATS_KEYS`` columns.
+    """
+    profile_ids, canonical_ids = set(), set()
+    for row in rows:
+        profile_ids.add(row.get('profile_id'))
+        canonical_ids.add(row.get('canonical_id'))
+    if model is ProjectSkill:
+        skill_ids = {row['skill_id'] for row in rows}
+        canonical_ids.update(
+            Skill.objects.using(using).filter(pk__in=skill_ids).values_list('canonical_id', flat=True)
+        )
+    profile_ids.discard(None)
+    canonical_ids.discard(None)
+    return profile_ids, canonical_ids
+
+
+# Columns of each tracked model that decide which stats rows it feeds.
+STATS_KEYS = {
+    Skill: ('profile_id', 'canonical_id'),
+    Project: ('profile_id',),
+    WorkExperience: ('profile_id',),
+    ProjectSkill: ('skill_id',),
+}
+
+
+# Stats columns each tracked model feeds: (ProfileStats, SkillStats)
+SOURCES = {
+    Skill: (['skills_count', 'skill_years'], ['projects_count', 'profiles_count']),
+    Project: (['projects_count'], []),
+    WorkExperience: (['experience_count'], []),
+    ProjectSkill: ([], ['projects_count']),
+}
+# The subset that also depends on a row's other columns
+VALUE_SOURCES = {
+    Skill: (['skill_years'], []),
+}
+
+
+def stats_keys(instance):
+    return {key: getattr(instance, key) for key in STATS_KEYS[type(instance)]}
+
+
+def refresh_rows(model, rows, using=DEFAULT_DB_ALIAS, moved=True, profiles=True):
+    """
+    Recompute the stats that ``rows`` (``STATS_KEYS`` dicts) of ``model``
+    feed. ``moved=False`` for updates that kept their keys, which leaves
+    counts as they were; ``profiles=False`` skips ``ProfileStats``.
+    """
+    profile_fields, skill_fields = (SOURCES if moved else VALUE_SOURCES).get(model, ([], []))
+    if not profiles:
+        profile_fields = []
+    if not (profile_fields or skill_fields):
+        return
+    profile_ids, canonical_ids = affected_keys(model, rows, using=using)
+    refresh_profiles(profile_ids, using=using, fields=profile_fields)
+    refresh_skills(canonical_ids, using=using, fields=skill_fields)
+
+
+def _rebuild(stats_model, source_model, expressions, fields, using, batch_size):
+    fresh = {
+        row['pk']: {name: row[f'stat_{name}'] for name in fields}
+        for row in source_model._default_manager.db_manager(using)
+        .annotate(**{f'stat_{name}': expression for name, expression in expressions.items()})
+        .values('pk', *(f'stat_{name}' for name in fields))
+    }
+    current = {
+        row.pop('pk'): row
+        for row in stats_model._default_manager.db_manager(using).values('pk', *fields)
+    }
+    stale = [
+        stats_model(pk=pk, **values)
+        for pk, values in fresh.items()
+        if current.get(pk) != values
+    ]
+    stats_model._default_manager.db_manager(using).bulk_create(
+        stale, batch_size=batch_size, update_conflicts=True,
+        unique_fields=[stats_model._meta.pk.name], update_fields=fields,
+    )
+    return len(fresh), len(stale)
+
+
+def rebuild(using=DEFAULT_DB_ALIAS, batch_size=1000):
+    """
+    Recompute every stats row; returns ``{model: (rows, corrected)}``.
+
+    Rows of deleted profiles and catalog skills go with them (CASCADE), so
+    only missing and drifted rows are written.
+    """
+    with transaction.atomic(using=using):
+        return {
+            ProfileStats: _rebuild(ProfileStats, Profile, profile_expressions(),
+                                   PROFILE_FIELDS, using, batch_size),
+            SkillStats: _rebuild(SkillStats, CanonicalSkill, skill_expressions(),
+                                 SKILL_FIELDS, using, batch_size),
+        }
+
+
+def annotate_profile_counts(queryset):
+    """
+    Profile queryset with ``skills_count``/``projects_count`` read from
+    ``ProfileStats``, counted live only for profiles without a stats row.
+    """
+    return queryset.annotate(
+        skills_count=Coalesce(F('stats__skills_count'), count_subquery(Profile, 'skills'),
+                              output_field=IntegerField()),
+        projects_count=Coalesce(F('stats__projects_count'), count_subquery(Profile, 'projects'),
+                                output_field=IntegerField()),
+    )
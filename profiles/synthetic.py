@@ -0,0 +1,260 @@
+"""
+Synthetic profile data for load and query-plan testing.
+
+Rows are generated per profile from a seeded RNG, so a given ``--seed``
+produces the same dataset however the work is split between processes.
+Every table gets an id range reserved up front (a fixed number of slots per
+profile), which lets worker processes insert disjoint ranges with
+``bulk_create`` and no coordination.
+"""
+import bisect
+import math
+import multiprocessing
+import random
+from datetime import date, timedelta
+
+from django.db import connection, connections, transaction
+from django.db.models import Max
+
+from . import taxonomy
+from .models import (
+    Profile, Education, Skill, Project, ProjectLink,
+    ProjectSkill, WorkExperience, SocialLink
+)
+
+BASE_SKILLS = [
+    'Python', 'JavaScript', 'TypeScript', 'Java', 'Go', 'Rust', 'C', 'C++', 'C#',
+    'Ruby', 'PHP', 'Kotlin', 'Swift', 'Scala', 'Elixir', 'Haskell', 'R', 'SQL',
+    'Django', 'Flask', 'FastAPI', 'React', 'Vue.js', 'Angular', 'Svelte',
+    'Node.js', 'Spring', 'Rails', 'Laravel', 'PostgreSQL', 'MySQL', 'SQLite',
+    'MongoDB', 'Redis', 'Elasticsearch', 'Kafka', 'RabbitMQ', 'Docker',
+    'Kubernetes', 'Terraform', 'AWS', 'GCP', 'Azure', 'Linux', 'Git',
+    'GraphQL', 'HTML/CSS', 'Tailwind', 'Pandas', 'NumPy', 'PyTorch',
+    'TensorFlow', 'Spark', 'Airflow', 'dbt', 'Figma', 'CI/CD', 'Nginx',
+]
+# Long tail of rarer skills so popularity follows a realistic Zipf curve.
+# Lettered, not numbered: the catalog folds "Python Toolkit 2" into
+# "Python Toolkit" as a version.
+SKILL_VOCABULARY = BASE_SKILLS + [f'{name} Toolkit {letter}' for letter in 'ABCD' for name in BASE_SKILLS]
+
+WORDS = (
+    'build scalable service api data platform team design deliver migrate '
+    'optimize latency customer feature release pipeline cloud mobile web '
+    'dashboard analytics integration security testing monitoring automate '
+    'refactor legacy system performance database cache queue search model'
+).split()
+COMPANIES = ['Acme', 'Globex', 'Initech', 'Umbrella', 'Hooli', 'Stark', 'Wayne', 'Tyrell', 'Soylent', 'Vandelay']
+POSITIONS = ['Software Engineer', 'Senior Engineer', 'Staff Engineer', 'Data Engineer',
+             'Frontend Developer', 'Backend Developer', 'Engineering Manager', 'SRE']
+DEGREES = ['BSc', 'MSc', 'PhD', 'Bootcamp Certificate']
+LEVELS = ['beginner', 'intermediate', 'advanced', 'expert']
+LINK_TYPES = ['github', 'demo', 'documentation', 'other']
+PLATFORMS = ['github', 'linkedin', 'portfolio', 'twitter', 'other']
+
+# Id slots reserved per profile (and per project for project children).
+EDUCATION_SLOTS = 3
+EXPERIENCE_SLOTS = 5
+SOCIAL_SLOTS = len(PLATFORMS)
+LINK_SLOTS = 3
+PROJECT_SKILL_SLOTS = 6
+
+
+def zipf_cum_weights(n, exponent=1.1):
+    total = 0.0
+    weights = []
+    for rank in range(1, n + 1):
+        total += 1.0 / rank ** exponent
+        weights.append(total)
+    return weights
+
+
+def sentence(rng, mean_words):
+    """Text whose length varies log-normally around ``mean_words``"""
+    count = max(1, int(rng.lognormvariate(math.log(mean_words), 0.6)))
+    return ' '.join(rng.choice(WORDS) for _ in range(count)).capitalize() + '.'
+
+
+def random_date(rng, start_year=2005, end_year=2025):
+    start = date(start_year, 1, 1)
+    return start + timedelta(days=rng.randrange((date(end_year, 1, 1) - start).days))
+
+
+class Generator:
+    def __init__(self, options, bases, canonical_ids):
+        self.options = options
+        self.bases = bases
+        self.canonical_ids = canonical_ids
+        self.cum_weights = zipf_cum_weights(len(SKILL_VOCABULARY))
+
+    def pick_skills(self, rng, count):
+        """Distinct skill names drawn by Zipfian popularity"""
+        chosen = {}
+        total = self.cum_weights[-1]
+        while len(chosen) < count:
+            index = bisect.bisect(self.cum_weights, rng.random() * total)
+            chosen.setdefault(SKILL_VOCABULARY[min(index, len(SKILL_VOCABULARY) - 1)], None)
+        return list(chosen)
+
+    def rows(self, index):
+        """All rows of the ``index``-th generated profile, keyed by model"""
+        options, bases = self.options, self.bases
+        rng = random.Random(options['seed'] * 1_000_003 + index)
+        skills_max = options['skills_per_profile']
+        projects_max = options['projects_per_profile']
+        profile_id = bases[Profile] + index
+        rows = {model: [] for model in bases}
+
+        rows[Profile].append(Profile(
+            id=profile_id,
+            name=f'Synthetic User {profile_id}',
+            email=f'user{profile_id}@example.com',
+            bio=sentence(rng, 30),
+        ))
+
+        for slot in range(rng.randint(1, EDUCATION_SLOTS)):
+            start = random_date(rng, 1995, 2020)
+            rows[Education].append(Education(
+                id=bases[Education] + index * EDUCATION_SLOTS + slot,
+                profile_id=profile_id,
+                institution=f'{rng.choice(COMPANIES)} University',
+                degree=rng.choice(DEGREES),
+                field_of_study='Computer Science',
+                start_date=start,
+                end_date=start + timedelta(days=rng.randint(300, 1800)),
+                description=sentence(rng, 12),
+            ))
+
+        skill_ids = []
+        names = self.pick_skills(rng, rng.randint(max(1, skills_max // 2), skills_max)) if skills_max else []
+        for slot, name in enumerate(names):
+            skill_id = bases[Skill] + index * skills_max + slot
+            skill_ids.append(skill_id)
+            rows[Skill].append(Skill(
+                id=skill_id,
+                profile_id=profile_id,
+                name=name,
+                canonical_id=self.canonical_ids[name],
+                level=rng.choice(LEVELS),
+                years_experience=rng.randint(0, 15),
+            ))
+
+        for slot in range(rng.randint(projects_max // 2, projects_max) if projects_max else 0):
+            project_slot = index * projects_max + slot
+            project_id = bases[Project] + project_slot
+            start = random_date(rng)
+            ongoing = rng.random() < 0.2
+            rows[Project].append(Project(
+                id=project_id,
+                profile_id=profile_id,
+                title=sentence(rng, 4).rstrip('.'),
+                description=sentence(rng, 40),
+                start_date=start,
+                end_date=None if ongoing else start + timedelta(days=rng.randint(30, 900)),
+                is_ongoing=ongoing,
+            ))
+            for link in range(rng.randint(0, LINK_SLOTS)):
+                rows[ProjectLink].append(ProjectLink(
+                    id=bases[ProjectLink] + project_slot * LINK_SLOTS + link,
+                    project_id=project_id,
+                    url=f'https://example.com/p/{project_id}/{link}',
+                    link_type=rng.choice(LINK_TYPES),
+                ))
+            used = rng.sample(skill_ids, min(len(skill_ids), rng.randint(1, PROJECT_SKILL_SLOTS)))
+            for link, skill_id in enumerate(used):
+                rows[ProjectSkill].append(ProjectSkill(
+                    id=bases[ProjectSkill] + project_slot * PROJECT_SKILL_SLOTS + link,
+                    project_id=project_id,
+                    skill_id=skill_id,
+                ))
+
+        for slot in range(rng.randint(1, EXPERIENCE_SLOTS)):
+            start = random_date(rng)
+            current = slot == 0 and rng.random() < 0.6
+            rows[WorkExperience].append(WorkExperience(
+                id=bases[WorkExperience] + index * EXPERIENCE_SLOTS + slot,
+                profile_id=profile_id,
+                company=f'{rng.choice(COMPANIES)} {rng.choice(["Inc.", "Labs", "GmbH", "Ltd"])}',
+                position=rng.choice(POSITIONS),
+                location=rng.choice(['Remote', 'Berlin', 'London', 'New York', 'Bangalore']),
+                start_date=start,
+                end_date=None if current else start + timedelta(days=rng.randint(90, 2500)),
+                is_current=current,
+                description=sentence(rng, 25),
+            ))
+
+        for slot, platform in enumerate(rng.sample(PLATFORMS, rng.randint(1, SOCIAL_SLOTS))):
+            rows[SocialLink].append(SocialLink(
+                id=bases[SocialLink] + index * SOCIAL_SLOTS + slot,
+                profile_id=profile_id,
+                platform=platform,
+                url=f'https://example.com/{platform}/{profile_id}',
+            ))
+        return rows
+
+    def insert_range(self, start, stop):
+        """Insert profiles ``start``..``stop`` in chunked transactions"""
+        chunk_size = self.options['chunk_size']
+        batch_size = self.options['batch_size']
+        inserted = {model: 0 for model in self.bases}
+        for chunk_start in range(start, stop, chunk_size):
+            chunk = {model: [] for model in self.bases}
+            for index in range(chunk_start, min(chunk_start + chunk_size, stop)):
+                for model, rows in self.rows(index).items():
+                    chunk[model].extend(rows)
+            with transaction.atomic():
+                # Parents before children so foreign keys are satisfied.
+                for model in self.bases:
+                    model.objects.bulk_create(chunk[model], batch_size=batch_size)
+                    inserted[model] += len(chunk[model])
+        return inserted
+
+
+def _worker(generator, start, stop):
+    connections.close_all()
+    if connection.vendor == 'sqlite':
+        # Workers queue for SQLite's single write lock instead of failing.
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout = 120000')
+    try:
+        return generator.insert_range(start, stop)
+    finally:
+        connections.close_all()
+
+
+def generate(profiles, skills_per_profile=10, projects_per_profile=5, seed=42,
+             chunk_size=500, batch_size=2000, workers=1):
+    """
+    Append ``profiles`` synthetic profiles with their related rows.
+
+    Returns the number of rows inserted per model. Post-save signals don't
+    fire for ``bulk_create``, so derived data (search index, stats, caches) must be
+    rebuilt afterwards.
+    """
+    models = [Profile, Education, Skill, Project, ProjectLink,
+              ProjectSkill, WorkExperience, SocialLink]
+    skills_per_profile = min(skills_per_profile, len(SKILL_VOCABULARY))
+    bases = {model: (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1 for model in models}
+    catalog = taxonomy.resolve_many(SKILL_VOCABULARY)
+    generator = Generator({
+        'seed': seed,
+        'skills_per_profile': skills_per_profile,
+        'projects_per_profile': projects_per_profile,
+        'chunk_size': chunk_size,
+        'batch_size': batch_size,
+    }, bases, {name: skill.pk for name, skill in catalog.items()})
+
+    workers = max(1, min(workers, profiles // chunk_size or 1))
+    if workers == 1:
+        return generator.insert_range(0, profiles)
+
+    step = math.ceil(profiles / workers)
+    ranges = [(generator, start, min(start + step, profiles)) for start in range(0, profiles, step)]
+    connections.close_all()
+    context = multiprocessing.get_context('fork')
+    with context.Pool(len(ranges)) as pool:
+        results = pool.starmap(_worker, ranges)
+    totals = {model: 0 for model in models}
+    for result in results:
+        for model, count in result.items():
+            totals[model] += count
+    return totals
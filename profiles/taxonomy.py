@@ -0,0 +1,105 @@
+import re
+import unicodedata
+
+from django.db.models import Q
+
+from .models import CanonicalSkill, SkillAlias, SkillStats
+
+
+# Well-known spellings folded into one catalog entry: alias -> display name.
+DEFAULT_ALIASES = {
+    'js': 'JavaScript',
+    'ecmascript': 'JavaScript',
+    'ts': 'TypeScript',
+    'py': 'Python',
+    'python3': 'Python',
+    'golang': 'Go',
+    'node': 'Node.js',
+    'nodejs': 'Node.js',
+    'reactjs': 'React',
+    'react.js': 'React',
+    'vuejs': 'Vue.js',
+    'vue': 'Vue.js',
+    'postgres': 'PostgreSQL',
+    'psql': 'PostgreSQL',
+    'k8s': 'Kubernetes',
+    'html': 'HTML/CSS',
+    'css': 'HTML/CSS',
+    'amazon web services': 'AWS',
+}
+
+_VERSION_SUFFIX = re.compile(r'\s+v?\d+(\.\d+)*$')
+
+
+def normalize_skill_name(name):
+    """
+    Fold a free-text skill name to its catalog key.
+
+    "Python", " python " and "Python 3.11" all normalize to "python"; a
+    version glued to the name ("HTML5", "S3") is kept.
+    """
+    key = unicodedata.normalize('NFKC', name or '').casefold()
+    key = ' '.join(key.split())
+    return _VERSION_SUFFIX.sub('', key) or key
+
+
+def display_name(name):
+    """Catalog display name for the first spelling seen of a skill"""
+    name = ' '.join((name or '').split())
+    return _VERSION_SUFFIX.sub('', name) or name
+
+
+def resolve_many(names):
+    """
+    Resolve skill names to catalog entries, creating missing ones.
+
+    Returns ``{name: CanonicalSkill}`` using a fixed number of queries
+    regardless of how many names are given.
+    """
+    keys = {name: normalize_skill_name(name) for name in names}
+    aliases = dict(
+        SkillAlias.objects.filter(alias__in=set(keys.values()))
+        .values_list('alias', 'canonical__key')
+    )
+    targets = {key: aliases.get(key, key) for key in keys.values()}
+    catalog = CanonicalSkill.objects.in_bulk(set(targets.values()), field_name='key')
+
+    missing = {}
+    for name, key in keys.items():
+        target = targets[key]
+        if target not in catalog and target not in missing:
+            missing[target] = CanonicalSkill(name=display_name(name), key=target)
+    if missing:
+        CanonicalSkill.objects.bulk_create(missing.values(), ignore_conflicts=True)
+        created = CanonicalSkill.objects.in_bulk(missing.keys(), field_name='key')
+        catalog.update(created)
+        # New entries are unused so far: their stats start at zero.
+        SkillStats.objects.bulk_create(
+            [SkillStats(canonical=skill, name=skill.name) for skill in created.values()],
+            ignore_conflicts=True,
+        )
+
+    return {name: catalog[targets[key]] for name, key in keys.items()}
+
+
+def resolve(name):
+    """Catalog entry for one skill name, created if missing"""
+    return resolve_many([name])[name]
+
+
+def matching_canonical_ids(term):
+    """
+    Catalog ids whose key or any alias contains the normalized ``term``.
+
+    Returned as a ``values('id')`` queryset so callers can filter on
+    ``canonical_id__in`` in a single query; the catalog holds one row per
+    distinct skill, so the substring match stays small however many
+    profiles there are.
+    """
+    key = normalize_skill_name(term)
+    return (
+        CanonicalSkill.objects
+        .filter(Q(key__contains=key) | Q(aliases__alias__contains=key))
+        .values('id')
+        .distinct()
+    )
@@ -1,3 +1,1090 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import json
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+)
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+
+from playground.db import ReadOnlyRequestMiddleware, ReadReplicaRouter
+
+from . import async_views, cache, metrics, synthetic, taxonomy
+from .middleware import CompressionMiddleware
+from .models import (
+    CanonicalSkill, ChangeEvent, Education, Profile, ProfileStats, Project, ProjectLink,
+    ProjectSkill, Skill, SkillStats, SocialLink, WorkExperience
+)
+from .renderers import FastJSONRenderer
+from .views import SearchView
+
+
+class ResponseCacheMixin:
+    """Starts and ends each test with an empty response cache"""
+
+    def setUp(self):
+        super().setUp()
+        # Cached data outlives the test that computed it: versions only move on commit.
+        caches['responses'].clear()
+        self.addCleanup(caches['responses'].clear)
+
+
+class QueryPlanTests(ResponseCacheMixin, TestCase):
+    """List and detail endpoints cost a fixed number of queries, whatever the row counts"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.small = cls.create_profile('Small', children=1)
+        cls.large = cls.create_profile('Large', children=5)
+
+    @staticmethod
+    def create_profile(name, children):
+        profile = Profile.objects.create(name=name, email=f'{name.lower()}@example.com')
+        for n in range(children):
+            skill = Skill.objects.create(profile=profile, name=f'Skill {n}')
+            project = Project.objects.create(profile=profile, title=f'Project {n}',
+                                             description='Skill matrix')
+            ProjectSkill.objects.create(project=project, skill=skill)
+            ProjectLink.objects.create(project=project, url='https://example.com', link_type='github')
+            Education.objects.create(profile=profile, institution='University', degree='BSc',
+                                     start_date=date(2010, 1, 1))
+            WorkExperience.objects.create(profile=profile, company='Acme', position='Engineer',
+                                          description='Skill matrix', start_date=date(2015, 1, 1))
+        SocialLink.objects.create(profile=profile, platform='github', url='https://example.com')
+        return profile
+
+    def test_profile_detail(self):
+        # The profile, then one prefetch per nested list (project skills
+        # and links included)
+        for profile in (self.small, self.large):
+            with self.subTest(profile=profile.name), self.assertNumQueries(8):
+                self.assertEqual(self.client.get(f'/api/profiles/{profile.pk}/').status_code, 200)
+
+    def test_lists(self):
+        for path, queries in (('/api/profiles/', 8), ('/api/projects/', 3), ('/api/skills/', 1)):
+            with self.subTest(path=path), self.assertNumQueries(queries):
+                self.assertEqual(self.client.get(path).status_code, 200)
+        self.create_profile('Later', children=3)
+        with self.assertNumQueries(8):
+            self.assertEqual(len(self.client.get('/api/profiles/').json()['results']), 3)
+
+    def test_search_and_skill_views(self):
+        # Search: a count, a page of hits and their rows per category (with
+        # the projects' skills); by-skill: the projects, then their skills;
+        # top skills: one read of the maintained counts
+        paths = (('/api/search/?q=skill', 10), ('/api/projects/by-skill/?skill=skill', 2),
+                 ('/api/skills/top/', 1))
+        for profiles in (2, 3):
+            if profiles == 3:
+                self.create_profile('Later', children=3)
+                caches['responses'].clear()
+            for path, queries in paths:
+                with self.subTest(path=path, profiles=profiles), self.assertNumQueries(queries):
+                    self.assertEqual(self.client.get(path).status_code, 200)
+
+
+class QueryPlanCheckTests(ResponseCacheMixin, TransactionTestCase):
+    """check_query_plans passes on a seeded database"""
+    # The async views read from their own threads.
+    databases = {'default', 'readonly'}
+
+    def test_seeded_database_is_clean(self):
+        # More profiles than the threshold, which the catalog stays under
+        call_command('seed_data', profiles=600, verbosity=0, stdout=StringIO())
+        stdout = StringIO()
+        # The test runner has set the test environment up already.
+        with mock.patch.multiple('profiles.management.commands.check_query_plans',
+                                 setup_test_environment=mock.DEFAULT,
+                                 teardown_test_environment=mock.DEFAULT):
+            call_command('check_query_plans', no_seed=True, threshold=500,
+                         stdout=stdout, stderr=StringIO())
+        self.assertIn('No full table scans above the threshold', stdout.getvalue())
+
+
+class LeanSerializationTests(ResponseCacheMixin, TestCase):
+    """The lean path must render byte-for-byte what the serializers render"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for n in range(3):
+            profile = Profile.objects.create(name=f'User {n}', email=f'user{n}@example.com', bio='')
+            python = Skill.objects.create(profile=profile, name='Python', level='expert', years_experience=8)
+            sql = Skill.objects.create(profile=profile, name='SQL', years_experience=n)
+            for p in range(3):
+                project = Project.objects.create(
+                    profile=profile,
+                    title=f'Project {n}.{p}',
+                    description='Data pipeline',
+                    start_date=date(2020, 1, p + 1),
+                    end_date=None if p == 0 else date(2021, 6, p + 1),
+                    is_ongoing=p == 0,
+                )
+                ProjectSkill.objects.create(project=project, skill=python)
+                if p:
+                    ProjectSkill.objects.create(project=project, skill=sql)
+                    ProjectLink.objects.create(project=project, url=f'https://example.com/{n}/{p}',
+                                               link_type='github')
+        Profile.objects.create(name='Empty', email='empty@example.com')
+
+    def get(self, path, lean):
+        with self.settings(LEAN_SERIALIZATION=lean):
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def assertLeanMatches(self, path):
+        self.assertEqual(self.get(path, lean=True).content, self.get(path, lean=False).content)
+
+    def test_lists_match(self):
+        for path in ('/api/skills/', '/api/projects/', '/api/projects/?page_size=2',
+                     '/api/projects/?page=2&page_size=4', '/api/skills/?count=true'):
+            with self.subTest(path=path):
+                self.assertLeanMatches(path)
+
+    def test_skills_omit_catalog_entry(self):
+        profile = Profile.objects.get(name='User 0')
+        for path in ('/api/skills/', f'/api/profiles/{profile.pk}/'):
+            for lean in (False, True):
+                with self.subTest(path=path, lean=lean):
+                    data = self.get(path, lean=lean).json()
+                    skill = (data['results'] if 'results' in data else data['skills'])[0]
+                    self.assertEqual(list(skill), ['id', 'name', 'level', 'years_experience', 'profile'])
+
+    def test_cursor_pages_match(self):
+        path = '/api/projects/?page_size=4'
+        while path:
+            with self.subTest(path=path):
+                self.assertLeanMatches(path)
+            path = self.get(path, lean=True).json()['next']
+
+    def test_summaries_match(self):
+        for path in ('/api/profile/summary/', '/api/skills/top/?limit=5',
+                     '/api/projects/by-skill/?skill=python', '/api/projects/by-skill/?skill=cobol'):
+            with self.subTest(path=path):
+                self.assertLeanMatches(path)
+
+    def test_fieldsets_match(self):
+        for path in ('/api/projects/?fields=title,skills', '/api/projects/?fields=id&expand=profile',
+                     '/api/projects/by-skill/?skill=python&fields=title,links_count',
+                     '/api/profile/summary/?fields=name,projects_count'):
+            with self.subTest(path=path):
+                self.assertLeanMatches(path)
+
+
+class ResponseCacheTests(ResponseCacheMixin, TestCase):
+    """Profile responses are cached under the profile's version, with ETags"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profile = Profile.objects.create(name='Cached', email='cached@example.com')
+        cls.other = Profile.objects.create(name='Other', email='other@example.com')
+
+    def get(self, path, **headers):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path, **headers)
+        return response, len(queries)
+
+    def test_etag_and_invalidation(self):
+        path = f'/api/profiles/{self.profile.pk}/'
+        response, _ = self.get(path)
+        etag = response['ETag']
+        response, queries = self.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response['ETag'], queries), (304, etag, 0))
+        response, queries = self.get(path)
+        self.assertEqual((response.status_code, queries), (200, 0))
+
+        # Another profile's writes leave this one's entries alone.
+        with self.captureOnCommitCallbacks(execute=True):
+            Skill.objects.create(profile=self.other, name='Go')
+        self.assertEqual(self.get(path, HTTP_IF_NONE_MATCH=etag)[0].status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Skill.objects.create(profile=self.profile, name='Python')
+        response, queries = self.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual([skill['name'] for skill in response.json()['skills']], ['Python'])
+        self.assertGreater(queries, 0)
+
+    def test_moving_a_row_invalidates_both_profiles(self):
+        project = Project.objects.create(profile=self.profile, title='Moved', description='')
+        link = ProjectLink.objects.create(project=project, url='https://example.com', link_type='demo')
+        home = Project.objects.create(profile=self.profile, title='Home', description='')
+        paths = [f'/api/profiles/{pk}/' for pk in (self.profile.pk, self.other.pk)]
+
+        def move_project():
+            loaded = Project.objects.get(pk=project.pk)
+            loaded.profile = self.other
+            loaded.save()
+
+        def move_link():
+            # Loaded without project_id, so the previous owner is read from the database
+            loaded = ProjectLink.objects.only('url').get(pk=link.pk)
+            loaded.project = home
+            loaded.save()
+
+        for move in (move_project, move_link):
+            with self.subTest(move=move.__name__):
+                etags = [self.get(path)[0]['ETag'] for path in paths]
+                with self.captureOnCommitCallbacks(execute=True):
+                    move()
+                for path, etag in zip(paths, etags):
+                    self.assertEqual(self.get(path, HTTP_IF_NONE_MATCH=etag)[0].status_code, 200)
+
+
+class KeysetPaginationTests(TestCase):
+    """Cursor pages cover every row once, both ways, and bad cursors are 404s"""
+
+    @classmethod
+    def setUpTestData(cls):
+        profile = Profile.objects.create(name='Pages', email='pages@example.com')
+        Skill.objects.create(profile=profile, name='Python')
+        Skill.objects.create(profile=profile, name='Go')
+        for n in range(7):
+            Project.objects.create(profile=profile, title=f'Project {n}', description='')
+        # Ties on created_at are broken by id.
+        Project.objects.filter(title__in=['Project 2', 'Project 3', 'Project 4']).update(
+            created_at=Project.objects.get(title='Project 2').created_at
+        )
+        cls.expected = list(Project.objects.order_by('created_at', 'id').values_list('pk', flat=True))
+
+    def page(self, path):
+        response = self.client.get(path, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return [row['id'] for row in data['results']], data['next'], data['previous']
+
+    def test_walk_forward_and_back(self):
+        pages, path = [], '/api/projects/?page_size=3'
+        while path:
+            rows, path, previous = self.page(path)
+            pages.append(rows)
+        self.assertEqual([pk for rows in pages for pk in rows], self.expected)
+        self.assertEqual([len(rows) for rows in pages], [3, 3, 1])
+
+        backwards = []
+        while previous:
+            rows, _, previous = self.page(previous)
+            backwards.insert(0, rows)
+        self.assertEqual(backwards, pages[:-1])
+
+    def test_invalid_cursors(self):
+        _, next_page, _ = self.page('/api/skills/?ordering=name&page_size=1')
+        cursor = next_page.split('cursor=')[1].split('&')[0]
+        for path in ('/api/projects/?cursor=garbage', '/api/projects/?cursor=e30',
+                     # A cursor is only valid for the ordering that made it.
+                     f'/api/skills/?ordering=-years_experience&cursor={cursor}'):
+            with self.subTest(path=path):
+                response = self.client.get(path, HTTP_ACCEPT='application/json')
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.json(), {'detail': 'Invalid cursor'})
+
+
+class CompressionTests(ResponseCacheMixin, TestCase):
+    """Response compression and renderer negotiation"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profile = Profile.objects.create(name='Zoë', email='zoe@example.com', bio='Line\u2028break')
+        for n in range(20):
+            Skill.objects.create(profile=cls.profile, name=f'Skill {n}')
+
+    def test_gzip(self):
+        path = f'/api/profiles/{self.profile.pk}/'
+        plain = self.client.get(path)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+        self.assertFalse(plain.has_header('Content-Encoding'))
+
+        response = self.client.get(path, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        # The bytes differ by encoding, so the ETag is weak, and still revalidates.
+        self.assertEqual(response['ETag'], f'W/{plain["ETag"]}')
+        response = self.client.get(path, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_left_alone(self):
+        for path, encoding in (('/api/health/', 'gzip'),
+                               (f'/api/profiles/{self.profile.pk}/', 'gzip;q=0'),
+                               ('/api/export/', 'gzip')):
+            with self.subTest(path=path, encoding=encoding):
+                response = self.client.get(path, HTTP_ACCEPT_ENCODING=encoding)
+                self.assertEqual(response.status_code, 200)
+                self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_renderer_negotiation(self):
+        path = f'/api/profiles/{self.profile.pk}/'
+        response = self.client.get(path, HTTP_ACCEPT='text/html')
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
+        self.assertEqual(self.client.get(path, HTTP_ACCEPT='application/xml').status_code, 406)
+        for query, headers in (('', {'HTTP_ACCEPT': 'application/json'}), ('?format=json', {})):
+            with self.subTest(query=query):
+                response = self.client.get(path + query, **headers)
+                self.assertEqual(response['Content-Type'], 'application/json')
+        # orjson's output is DRF's, byte for byte, escapes included.
+        self.assertIn(b'Line\\u2028break', response.content)
+        self.assertEqual(FastJSONRenderer().render(response.json()), JSONRenderer().render(response.json()))
+
+    def test_pages_sharing_an_etag_are_not_mixed_up(self):
+        # A page embedding the user must not be served from another's compressed copy.
+        pages = iter([f'<p>{user}</p>'.ljust(2048).encode() for user in ('alice', 'bob')])
+
+        def page(request):
+            response = HttpResponse(next(pages), content_type='text/html; charset=utf-8')
+            response['ETag'] = '"shared"'
+            return response
+
+        middleware = CompressionMiddleware(page)
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        bodies = [gzip.decompress(middleware(request).content) for _ in range(2)]
+        self.assertIn(b'alice', bodies[0])
+        self.assertIn(b'bob', bodies[1])
+
+
+class ServerTimingTests(ResponseCacheMixin, TestCase):
+    """Per-request phase timings in Server-Timing, totals at /api/metrics/"""
+
+    @classmethod
+    def setUpTestData(cls):
+        profile = Profile.objects.create(name='Timed', email='timed@example.com')
+        for n in range(3):
+            Skill.objects.create(profile=profile, name=f'Skill{n}')
+
+    def setUp(self):
+        super().setUp()
+        metrics.registry.reset()
+        self.addCleanup(metrics.registry.reset)
+
+    def test_header(self):
+        response = self.client.get('/api/skills/')
+        entries = re.findall(r'(\w+);dur=([\d.]+)', response['Server-Timing'])
+        self.assertEqual([name for name, _ in entries], ['db', 'app', 'render', 'total'])
+        durations = {name: float(duration) for name, duration in entries}
+        self.assertIn('desc="1 queries, 0 repeated"', response['Server-Timing'])
+        self.assertLessEqual(durations['db'] + durations['app'] + durations['render'],
+                             durations['total'] + 0.01)
+
+    def test_metrics_exposition(self):
+        for _ in range(2):
+            self.client.get('/api/skills/')
+        self.client.get('/api/health/')
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        lines = response.content.decode().splitlines()
+        for name, kind in (('profiles_request_duration_seconds', 'histogram'),
+                           ('profiles_request_phase_seconds_total', 'counter'),
+                           ('profiles_db_queries_total', 'counter'),
+                           ('profiles_db_duplicate_queries_total', 'counter')):
+            self.assertIn(f'# TYPE {name} {kind}', lines)
+        samples = dict(line.rsplit(' ', 1) for line in lines if not line.startswith('#'))
+        # Cumulative buckets ending at +Inf, which counts every request
+        buckets = [int(value) for key, value in samples.items()
+                   if key.startswith('profiles_request_duration_seconds_bucket{endpoint="skill-list-create"')]
+        self.assertEqual(len(buckets), len(metrics.BUCKETS) + 1)
+        self.assertEqual(buckets, sorted(buckets))
+        self.assertEqual(samples['profiles_request_duration_seconds_bucket{endpoint="skill-list-create",le="+Inf"}'], '2')
+        self.assertEqual(samples['profiles_request_duration_seconds_count{endpoint="skill-list-create"}'], '2')
+        self.assertEqual(samples['profiles_db_queries_total{endpoint="skill-list-create"}'], '2')
+        for phase in metrics.PHASES:
+            self.assertIn(f'profiles_request_phase_seconds_total{{endpoint="skill-list-create",phase="{phase}"}}',
+                          samples)
+        self.assertEqual(samples['profiles_request_duration_seconds_count{endpoint="health-check"}'], '1')
+
+
+class ExportTests(TestCase):
+    """NDJSON export: one profile per line, and errors as JSON lines"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for n in range(3):
+            profile = Profile.objects.create(name=f'Export {n}', email=f'export{n}@example.com')
+            Skill.objects.create(profile=profile, name='Python')
+
+    def test_stream(self):
+        response = self.client.get('/api/export/?batch_size=2')
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        documents = [json.loads(line) for line in lines]
+        self.assertEqual([document['name'] for document in documents], ['Export 0', 'Export 1', 'Export 2'])
+        self.assertEqual(documents[0], self.client.get(f'/api/profiles/{documents[0]["id"]}/').json())
+
+    def test_command(self):
+        stdout = StringIO()
+        call_command('export_profiles', batch_size=2, stdout=stdout)
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual([json.loads(line)['name'] for line in lines], ['Export 0', 'Export 1', 'Export 2'])
+        self.assertEqual(stdout.getvalue(), b''.join(self.client.get('/api/export/').streaming_content).decode())
+
+    def test_errors_render_as_json(self):
+        response = self.client.get('/api/export/?format=json')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(json.loads(response.content), {'detail': 'Not found.'})
+        self.assertTrue(response.content.endswith(b'\n'))
+
+
+class BatchRequestTests(ResponseCacheMixin, TestCase):
+    """Sub-responses of a batch are what the same GETs return one by one"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profile = Profile.objects.create(name='Batch', email='batch@example.com')
+        Skill.objects.create(profile=cls.profile, name='Python')
+
+    def test_batch_matches_single_requests(self):
+        paths = ['/api/profile/summary/', f'/api/profiles/{self.profile.pk}/skills/',
+                 '/api/skills/top/?limit=5', '/api/profile/summary/']
+        response = self.client.post('/api/batch/', {'requests': paths}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['responses']
+        self.assertEqual([item['id'] for item in results], [0, 1, 2, 3])
+        for path, item in zip(paths, results):
+            with self.subTest(path=path):
+                self.assertEqual(item['status'], 200)
+                self.assertEqual(item['body'], self.client.get(path, HTTP_ACCEPT='application/json').json())
+
+    def test_only_get_api_routes(self):
+        response = self.client.post('/api/batch/', {'requests': [
+            {'id': 'write', 'path': '/api/skills/', 'method': 'POST'},
+            {'id': 'admin', 'path': '/admin/'},
+            {'id': 'nested', 'path': '/api/batch/'},
+        ]}, content_type='application/json')
+        self.assertEqual([(item['id'], item['status']) for item in response.json()['responses']],
+                         [('write', 405), ('admin', 404), ('nested', 404)])
+
+
+class ListFilterTests(TestCase):
+    """Declared filters and ?ordering= on the list endpoints"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profile = Profile.objects.create(name='Filter', email='filter@example.com')
+        for index, name in enumerate(['Python', 'Go', 'Rust', 'SQL', 'C']):
+            Skill.objects.create(profile=cls.profile, name=name, years_experience=index % 3)
+        cls.project = Project.objects.create(profile=cls.profile, title='Linked', description='')
+        Project.objects.create(profile=cls.profile, title='Unlinked', description='')
+        for link_type in ('github', 'demo'):
+            ProjectLink.objects.create(project=cls.project, url='https://example.com', link_type=link_type)
+
+    def walk(self, path):
+        rows = []
+        while path:
+            data = self.client.get(path, HTTP_ACCEPT='application/json').json()
+            rows += data['results']
+            path = data['next']
+        return rows
+
+    def test_ordering_pages(self):
+        expected = list(Skill.objects.order_by('-years_experience', '-id').values_list('name', flat=True))
+        for lean in ('0', '1'):
+            with self.subTest(lean=lean):
+                rows = self.walk(f'/api/skills/?ordering=-years_experience&page_size=2&lean={lean}')
+                self.assertEqual([row['name'] for row in rows], expected)
+
+    def test_filters(self):
+        self.assertEqual([row['name'] for row in self.walk('/api/skills/?name__iexact=python')], ['Python'])
+        rows = self.walk('/api/projects/?link_type__in=github,demo')
+        self.assertEqual([row['id'] for row in rows], [self.project.pk])
+        response = self.client.get('/api/skills/?years_experience__gte=many')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('years_experience__gte', response.json())
+
+    def test_iexact_uses_lower_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/skills/?name__iexact=python')
+        sql = next(q['sql'] for q in queries if 'LOWER(' in q['sql'])
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = ' '.join(row[3] for row in cursor.fetchall())
+        self.assertIn('USING INDEX skill_name_lower_idx', plan)
+
+
+class SearchTests(TestCase):
+    """BM25 ranking, and the FTS5 tables following writes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profile = Profile.objects.create(name='Searcher', email='searcher@example.com')
+        # Created first, so primary-key order would list it first.
+        cls.mention = Project.objects.create(profile=cls.profile, title='Billing',
+                                             description='Moved the queue to Kafka')
+        cls.titled = Project.objects.create(profile=cls.profile, title='Kafka consumers',
+                                            description='Stream processing')
+
+    def setUp(self):
+        caches['throttle'].clear()
+        self.addCleanup(caches['throttle'].clear)
+
+    def titles(self, query):
+        response = self.client.get('/api/search/', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [item['title'] for item in response.json()['results']['projects']['data']]
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.titles('kafka'), ['Kafka consumers', 'Billing'])
+
+    def test_index_follows_writes(self):
+        self.titled.title = 'Flink consumers'
+        self.titled.save()
+        self.assertEqual(self.titles('flink'), ['Flink consumers'])
+        self.assertEqual(self.titles('kafka'), ['Billing'])
+        self.mention.delete()
+        self.assertEqual(self.titles('kafka'), [])
+
+
+class ThrottleTests(TestCase):
+    """Cost-weighted throttling and query budgets on the search endpoints"""
+
+    rates = {'search': '10/min', 'search:all': '100/min'}
+
+    def setUp(self):
+        caches['throttle'].clear()
+        self.addCleanup(caches['throttle'].clear)
+
+    def test_short_terms_cost_more(self):
+        rest_framework = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': self.rates}
+        with override_settings(REST_FRAMEWORK=rest_framework):
+            # One-letter terms cost 8 of the client's 10 tokens.
+            self.assertEqual(self.client.get('/api/search/?q=a').status_code, 200)
+            response = self.client.get('/api/search/?q=a')
+            self.assertEqual(response.status_code, 429)
+            self.assertIn('Retry-After', response)
+            self.assertEqual(self.client.get('/api/search/?q=python').status_code, 200)
+            self.assertEqual(self.client.get('/api/search/?q=a', REMOTE_ADDR='10.0.0.2').status_code, 200)
+
+    @override_settings(QUERY_BUDGETS={'search': 0})
+    @mock.patch('profiles.throttling.PROGRESS_INTERVAL', 1)
+    def test_query_budget(self):
+        response = self.client.get('/api/search/?q=python')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.client.get('/api/skills/').status_code, 200)
+
+
+class AdminPaginationTests(TestCase):
+    """Profile change pages cost the same whatever the number of child rows"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.small = cls.create_profile('Small', rows=3)
+        cls.large = cls.create_profile('Large', rows=45)
+
+    @staticmethod
+    def create_profile(name, rows):
+        # Saved one by one, so each skill has its own catalog entry
+        profile = Profile.objects.create(name=name, email=f'{name.lower()}@example.com')
+        for i in range(rows):
+            Skill.objects.create(profile=profile, name=f'Skill{i}')
+        platforms = [value for value, _ in SocialLink._meta.get_field('platform').choices]
+        for platform in platforms[:rows]:
+            SocialLink.objects.create(profile=profile, platform=platform, url='https://example.com')
+        return profile
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def change_page(self, profile, query=''):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/admin/profiles/profile/{profile.pk}/change/{query}')
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_inline_pages(self):
+        self.change_page(self.small)  # warm per-process caches (content types, ...)
+        _, small_queries = self.change_page(self.small)
+        response, large_queries = self.change_page(self.large)
+        self.assertEqual((small_queries, large_queries), (9, 9))
+        self.assertEqual(response.context['inline_admin_formsets'][1].formset.initial_form_count(), 20)
+        response, _ = self.change_page(self.large, '?skills-page=3')
+        self.assertEqual(response.context['inline_admin_formsets'][1].formset.initial_form_count(), 5)
+
+
+class BulkWriteTests(TestCase):
+    """Bulk endpoints upsert valid items and report the rest by index"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profile = Profile.objects.create(name='Bulk', email='bulk@example.com')
+        cls.other = Profile.objects.create(name='Other', email='other@example.com')
+        cls.python = Skill.objects.create(profile=cls.profile, name='Python', level='beginner',
+                                          years_experience=1)
+
+    def post(self, path, items):
+        return self.client.post(path, items, content_type='application/json')
+
+    def test_skill_upsert(self):
+        response = self.post('/api/skills/bulk/', [
+            {'profile': self.profile.pk, 'name': 'Python', 'level': 'expert', 'years_experience': 6},
+            {'profile': self.profile.pk, 'name': 'Go', 'years_experience': 1},
+            # The last occurrence of a key wins.
+            {'profile': self.profile.pk, 'name': 'Go', 'years_experience': 3},
+        ])
+        self.assertEqual(response.status_code, 201)
+        go = Skill.objects.get(profile=self.profile, name='Go')
+        self.assertEqual(response.json(), {
+            'saved': 2,
+            'results': [{'index': 0, 'id': self.python.pk}, {'index': 2, 'id': go.pk}],
+            'errors': [],
+        })
+        self.python.refresh_from_db()
+        self.assertEqual((self.python.level, self.python.years_experience), ('expert', 6))
+        self.assertEqual(go.years_experience, 3)
+        self.assertIsNotNone(go.canonical_id)
+        self.assertEqual(ProfileStats.objects.get(pk=self.profile.pk).skill_years, 9)
+
+    def test_per_item_errors(self):
+        project = Project.objects.create(profile=self.profile, title='Bulk', description='')
+        foreign = Skill.objects.create(profile=self.other, name='Go')
+        response = self.post('/api/project-skills/bulk/', [
+            {'project': project.pk, 'skill': self.python.pk},
+            {'project': project.pk, 'skill': foreign.pk},
+            {'project': 999999, 'skill': self.python.pk},
+            {'project': 'first', 'skill': self.python.pk},
+        ])
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual(data['saved'], 1)
+        self.assertEqual([error['index'] for error in data['errors']], [1, 2, 3])
+        self.assertEqual(data['errors'][0]['errors'],
+                         {'non_field_errors': ['Skill and project belong to different profiles.']})
+        self.assertIn('project', data['errors'][1]['errors'])
+        self.assertEqual(list(project.project_skills.values_list('skill', flat=True)), [self.python.pk])
+
+    def test_nothing_valid(self):
+        response = self.post('/api/skills/bulk/', [{'profile': self.profile.pk, 'level': 'guru'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['saved'], 0)
+        self.assertEqual(set(response.json()['errors'][0]['errors']), {'name', 'level'})
+        self.assertEqual(self.post('/api/skills/bulk/', {'items': 'Python'}).status_code, 400)
+
+
+class ProfileIngestTests(TestCase):
+    """Nested profile documents on POST and PUT"""
+
+    document = {
+        'name': 'Ada', 'email': 'ada@example.com',
+        'skills': [{'name': 'Python', 'level': 'expert'}, {'name': 'Rust'}],
+        'projects': [{
+            'title': 'Engine', 'description': 'Analytical',
+            'skills': ['Python'],
+            'links': [{'url': 'https://example.com/engine', 'link_type': 'github'}],
+        }],
+        'social_links': [{'platform': 'github', 'url': 'https://github.com/ada'}],
+    }
+
+    def send(self, method, url, document):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, document, content_type='application/json')
+        writes = [q['sql'] for q in queries.captured_queries
+                  if q['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))]
+        return response, writes
+
+    def test_create_and_diff(self):
+        response, _ = self.send('post', '/api/profiles/', self.document)
+        self.assertEqual(response.status_code, 201)
+        pk = response.json()['id']
+        self.assertEqual(response.json(), self.client.get(f'/api/profiles/{pk}/').json())
+        self.assertEqual(response.json()['projects'][0]['skills'], ['Python'])
+
+        # Unchanged document: nothing is written.
+        response, writes = self.send('put', f'/api/profiles/{pk}/', self.document)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(writes, [])
+
+        document = dict(self.document, skills=[{'name': 'Python', 'level': 'beginner'}])
+        response, _ = self.send('put', f'/api/profiles/{pk}/', document)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Skill.objects.get(profile=pk).level, 'beginner')
+        self.assertFalse(Skill.objects.filter(name='Rust').exists())
+        self.assertEqual(ProjectLink.objects.filter(project__profile=pk).count(), 1)
+
+    def test_swap_and_rename_by_id(self):
+        pk = self.send('post', '/api/profiles/', self.document)[0].json()['id']
+        python, rust = Skill.objects.filter(profile=pk).order_by('name')
+        document = dict(self.document, projects=[], skills=[
+            {'id': python.pk, 'name': 'Rust'}, {'id': rust.pk, 'name': 'Go'},
+        ])
+        response, _ = self.send('put', f'/api/profiles/{pk}/', document)
+        self.assertEqual(response.status_code, 200)
+        renamed = {skill.pk: (skill.name, skill.canonical.key)
+                   for skill in Skill.objects.filter(profile=pk).select_related('canonical')}
+        self.assertEqual(renamed, {python.pk: ('Rust', 'rust'), rust.pk: ('Go', 'go')})
+        ranking = dict(SkillStats.objects.values_list('name', 'profiles_count'))
+        self.assertEqual((ranking['Python'], ranking['Go']), (0, 1))
+
+    def test_invalid_document_writes_nothing(self):
+        document = dict(self.document, projects=[{'title': 'Engine', 'skills': ['COBOL']}])
+        response, writes = self.send('post', '/api/profiles/', document)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('projects', response.json())
+        self.assertEqual(writes, [])
+        self.assertFalse(Profile.objects.exists())
+
+
+class StatsTests(TestCase):
+    """ProfileStats and SkillStats follow writes, and rebuild_stats repairs drift"""
+
+    def setUp(self):
+        self.ada = Profile.objects.create(name='Ada', email='ada@example.com')
+        self.bob = Profile.objects.create(name='Bob', email='bob@example.com')
+        self.python = Skill.objects.create(profile=self.ada, name='Python', years_experience=5)
+        self.sql = Skill.objects.create(profile=self.ada, name='SQL', years_experience=2)
+        Skill.objects.create(profile=self.bob, name='python 3', years_experience=1)
+        self.project = Project.objects.create(profile=self.ada, title='ETL', description='')
+        ProjectSkill.objects.create(project=self.project, skill=self.python)
+        ProjectSkill.objects.create(project=self.project, skill=self.sql)
+
+    def profile_stats(self, profile):
+        return ProfileStats.objects.values(
+            'skills_count', 'projects_count', 'experience_count', 'skill_years'
+        ).get(pk=profile.pk)
+
+    def skill_stats(self, skill):
+        skill.refresh_from_db()
+        return SkillStats.objects.values('projects_count', 'profiles_count').get(pk=skill.canonical_id)
+
+    def test_counters_follow_writes(self):
+        self.assertEqual(self.profile_stats(self.ada), {
+            'skills_count': 2, 'projects_count': 1, 'experience_count': 0, 'skill_years': 7,
+        })
+        self.assertEqual(self.skill_stats(self.python), {'projects_count': 1, 'profiles_count': 2})
+
+        self.python.years_experience = 6
+        self.python.save()
+        self.assertEqual(self.profile_stats(self.ada)['skill_years'], 8)
+
+        self.project.profile = self.bob
+        self.project.save()
+        self.assertEqual(self.profile_stats(self.ada)['projects_count'], 0)
+        self.assertEqual(self.profile_stats(self.bob)['projects_count'], 1)
+
+        self.project.delete()
+        self.assertEqual(self.skill_stats(self.python), {'projects_count': 0, 'profiles_count': 2})
+        self.assertEqual(self.skill_stats(self.sql), {'projects_count': 0, 'profiles_count': 1})
+
+        self.bob.delete()
+        self.assertEqual(self.skill_stats(self.python), {'projects_count': 0, 'profiles_count': 1})
+        self.assertFalse(ProfileStats.objects.filter(pk=self.bob.pk).exists())
+
+    def test_writes_refresh_only_what_they_feed(self):
+        project = Project.objects.get(pk=self.project.pk)
+        project.title = 'ELT'
+        with CaptureQueriesContext(connection) as queries:
+            project.save()
+        self.assertFalse([q for q in queries if 'stats' in q['sql']])
+
+        skill = Skill.objects.get(pk=self.python.pk)
+        skill.level = 'expert'
+        with CaptureQueriesContext(connection) as queries:
+            skill.save()
+        # No catalog lookup or pre-save read; one UPDATE of the profile's sums
+        self.assertEqual([q['sql'].split()[0] for q in queries], ['UPDATE', 'UPDATE', 'INSERT'])
+
+    def test_cascades_refresh_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.project.delete()
+        updates = [q for q in queries if q['sql'].startswith('UPDATE "profiles_skillstats"')]
+        self.assertEqual(len(updates), 1)
+
+    def test_rebuild_repairs_drift(self):
+        ProfileStats.objects.filter(pk=self.ada.pk).update(skills_count=99)
+        SkillStats.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_stats', stdout=out)
+        catalog = CanonicalSkill.objects.count()
+        self.assertIn('profile stats: 2 rows, 1 corrected', out.getvalue())
+        self.assertIn(f'skill stats: {catalog} rows, {catalog} corrected', out.getvalue())
+        self.assertEqual(self.profile_stats(self.ada)['skills_count'], 2)
+        self.assertEqual(self.skill_stats(self.python), {'projects_count': 1, 'profiles_count': 2})
+
+
+@mock.patch.object(cache, '_refresh_later', lambda func, *args: func(*args))
+class StaleWhileRevalidateTests(ResponseCacheMixin, TestCase):
+    """Landing-page data is served from the cache, stale after a write until refreshed"""
+
+    def setUp(self):
+        super().setUp()
+        self.profile = Profile.objects.create(name='First', email='first@example.com')
+
+    def get(self, path, **headers):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path, **headers)
+        return response, len(queries)
+
+    def test_warm_then_stale_then_refreshed(self):
+        call_command('warm_cache', stdout=StringIO(), stderr=StringIO())
+        response, queries = self.get('/api/profile/summary/')
+        self.assertEqual((response.json()['name'], queries), ('First', 0))
+        _, queries = self.get('/api/skills/top/')
+        self.assertEqual(queries, 0)
+        response, queries = self.get('/api/profile/summary/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual((response.status_code, queries), (304, 0))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Profile.objects.filter(pk=self.profile.pk).update(name='Renamed')
+            cache.invalidate_profile(self.profile.pk)
+        # The stale value answers the request that triggers the refresh.
+        response, _ = self.get('/api/profile/summary/')
+        self.assertEqual(response.json()['name'], 'First')
+        response, queries = self.get('/api/profile/summary/')
+        self.assertEqual((response.json()['name'], queries), ('Renamed', 0))
+
+    def test_top_skills_limit_is_validated_before_caching(self):
+        self.assertEqual(self.client.get('/api/skills/top/?limit=ten').status_code, 400)
+        for limit in ('-1', '0', '1'):
+            with self.subTest(limit=limit):
+                response, _ = self.get(f'/api/skills/top/?limit={limit}')
+                self.assertEqual(response.status_code, 200)
+        # Out-of-range limits share the clamped entries.
+        _, queries = self.get('/api/skills/top/?limit=100000')
+        self.assertEqual(queries, 1)
+        _, queries = self.get('/api/skills/top/?limit=100')
+        self.assertEqual(queries, 0)
+
+    def test_browsable_api_is_not_tagged(self):
+        for path in ('/api/profile/summary/', '/api/skills/top/'):
+            with self.subTest(path=path):
+                etag = self.client.get(path)['ETag']
+                response = self.client.get(path, HTTP_ACCEPT='text/html', HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertFalse(response.has_header('ETag'))
+
+
+class ChangeLogTests(TestCase):
+    """Writes are logged, in the writer's transaction, for the change stream"""
+
+    def logged(self):
+        return list(ChangeEvent.objects.order_by('pk').values_list('model', 'op', 'profile_id'))
+
+    def test_writes_are_logged(self):
+        profile = Profile.objects.create(name='Log', email='log@example.com')
+        skill = Skill.objects.create(profile=profile, name='Python')
+        skill.level = 'expert'
+        skill.save()
+        skill.delete()
+        self.client.post('/api/skills/bulk/', [{'profile': profile.pk, 'name': 'Go'}],
+                         content_type='application/json')
+        self.assertEqual(self.logged(), [
+            ('profile', 'create', profile.pk), ('skill', 'create', profile.pk),
+            ('skill', 'update', profile.pk), ('skill', 'delete', profile.pk),
+            ('skill', 'save', profile.pk),
+        ])
+
+    def test_moves_are_logged_for_both_profiles(self):
+        first = Profile.objects.create(name='First', email='first@example.com')
+        second = Profile.objects.create(name='Second', email='second@example.com')
+        project = Project.objects.create(profile=first, title='Moved', description='')
+        ChangeEvent.objects.all().delete()
+        project = Project.objects.get(pk=project.pk)
+        project.profile = second
+        project.save()
+        project.title = 'Renamed'
+        project.save()
+        self.assertEqual(self.logged(), [
+            ('project', 'update', first.pk), ('project', 'update', second.pk),
+            ('project', 'update', second.pk),
+        ])
+
+    def test_rolled_back_writes_are_not(self):
+        with self.assertRaises(ValueError), transaction.atomic():
+            Profile.objects.create(name='Gone', email='gone@example.com')
+            raise ValueError
+        self.assertEqual(self.logged(), [])
+
+
+class ChangeStreamTests(TransactionTestCase):
+    """The SSE stream replays after Last-Event-ID, then follows new commits"""
+    reset_sequences = True
+
+    def test_wsgi_is_refused(self):
+        response = self.client.get('/api/events/')
+        self.assertEqual(response.status_code, 501)
+        self.assertFalse(response.streaming)
+
+    async def test_resume_then_follow(self):
+        profile = await Profile.objects.acreate(name='Live', email='live@example.com')
+        response = await self.async_client.get(f'/api/events/?profile={profile.pk}',
+                                               headers={'Last-Event-ID': '0'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        frames = aiter(response.streaming_content)
+        try:
+            self.assertTrue((await anext(frames)).startswith(b'retry:'))
+            self.assertEqual(await anext(frames), b'id: 1\nevent: change\ndata: '
+                             b'{"model":"profile","pk":%d,"op":"create","profile":%d}\n\n'
+                             % (profile.pk, profile.pk))
+            other = await Profile.objects.acreate(name='Other', email='other@example.com')
+            await sync_to_async(Skill.objects.create)(profile=other, name='Go')
+            await sync_to_async(Skill.objects.create)(profile=profile, name='Python')
+            frame = await asyncio.wait_for(anext(frames), 5)
+            self.assertTrue(frame.startswith(b'id: 4\n'))
+            self.assertIn(b'"model":"skill"', frame)
+        finally:
+            await frames.aclose()
+
+
+class AsyncViewTests(ResponseCacheMixin, TransactionTestCase):
+    """The ASGI search and summary views"""
+    # Database work runs on the executor's threads.
+    databases = {'default', 'readonly'}
+
+    def setUp(self):
+        super().setUp()
+        caches['throttle'].clear()
+        self.addCleanup(caches['throttle'].clear)
+        profile = Profile.objects.create(name='Async', email='async@example.com')
+        Project.objects.create(profile=profile, title='Python pipeline', description='Batch jobs')
+        Skill.objects.create(profile=profile, name='Python')
+        WorkExperience.objects.create(profile=profile, company='Acme', position='Python developer',
+                                      start_date=date(2020, 1, 1))
+
+    async def test_match_sync_views(self):
+        response = await self.async_client.get('/api/async/search/?q=python')
+        expected = await sync_to_async(self.client.get)('/api/search/?q=python')
+        self.assertEqual((response.json()['partial'], response.json()['timed_out']), (False, []))
+        self.assertEqual(response.json()['results'], expected.json()['results'])
+        response = await self.async_client.get('/api/async/profile/summary/')
+        expected = await sync_to_async(self.client.get)('/api/profile/summary/')
+        self.assertEqual(response.json(), expected.json())
+
+    async def test_executor_is_bounded(self):
+        running, peak = 0, 0
+        lock = threading.Lock()
+
+        def work():
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+
+        with ThreadPoolExecutor(max_workers=2) as executor, \
+                mock.patch.object(async_views, '_executor', executor):
+            await asyncio.gather(*(async_views.run_db(work) for _ in range(6)))
+        self.assertEqual(peak, 2)
+
+    async def test_timed_out_category_is_partial(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        search_category = SearchView.search_category
+
+        def slow_skills(name, *args):
+            if name == 'skills':
+                release.wait(5)
+                return {}
+            return search_category(name, *args)
+
+        with override_settings(SEARCH_CATEGORY_TIMEOUTS={'skills': 0.05}), \
+                mock.patch.object(SearchView, 'search_category', side_effect=slow_skills):
+            response = await self.async_client.get('/api/async/search/?q=python')
+        data = response.json()
+        self.assertEqual((data['partial'], data['timed_out']), (True, ['skills']))
+        self.assertEqual(data['results']['skills'],
+                         {'count': None, 'page': 1, 'page_size': 20, 'data': [], 'timed_out': True})
+        self.assertEqual([hit['title'] for hit in data['results']['projects']['data']], ['Python pipeline'])
+        self.assertEqual([hit['company'] for hit in data['results']['work_experience']['data']], ['Acme'])
+
+    async def test_throttled_with_sync_search(self):
+        rest_framework = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': ThrottleTests.rates}
+        with override_settings(REST_FRAMEWORK=rest_framework):
+            # One-letter terms cost 8 of the client's 10 tokens, from either view.
+            response = await sync_to_async(self.client.get)('/api/search/?q=a')
+            self.assertEqual(response.status_code, 200)
+            response = await self.async_client.get('/api/async/search/?q=a')
+            self.assertEqual(response.status_code, 429)
+            self.assertIn('Retry-After', response)
+            response = await self.async_client.get('/api/async/search/?q=python')
+            self.assertEqual(response.status_code, 200)
+
+
+class SyntheticDataTests(TransactionTestCase):
+    """seed_data --profiles: the same rows for a seed, however the work is split"""
+
+    def generate(self, **options):
+        call_command('seed_data', profiles=12, chunk_size=4, flush=True, stdout=StringIO(), **options)
+        rows = {}
+        for model in (Profile, Skill, Project, ProjectLink, ProjectSkill, SocialLink):
+            fields = [
+                field.attname for field in model._meta.concrete_fields
+                if not getattr(field, 'auto_now', False) and not getattr(field, 'auto_now_add', False)
+            ]
+            rows[model] = list(model.objects.order_by('pk').values_list(*fields))
+        return rows
+
+    def test_deterministic_per_seed(self):
+        rows = self.generate(seed=1)
+        self.assertEqual(len(rows[Profile]), 12)
+        self.assertEqual(self.generate(seed=1), rows)
+        self.assertNotEqual(self.generate(seed=2), rows)
+
+    def test_vocabulary_entries_stay_distinct(self):
+        keys = {taxonomy.normalize_skill_name(name) for name in synthetic.SKILL_VOCABULARY}
+        self.assertEqual(len(keys), len(synthetic.SKILL_VOCABULARY))
+
+    def test_workers(self):
+        rows = self.generate(seed=1)
+        # Worker processes can't share the in-memory test database: run their ranges in turn.
+        pool = mock.MagicMock()
+        pool.__enter__.return_value.starmap = lambda func, ranges: [func(*args) for args in ranges]
+        with mock.patch.object(synthetic.multiprocessing, 'get_context') as get_context:
+            get_context.return_value.Pool.return_value = pool
+            self.assertEqual(self.generate(seed=1, workers=3), rows)
+        get_context.return_value.Pool.assert_called_once_with(3)
+
+
+class ProfileIngestLockTests(TransactionTestCase):
+    """A PUT reads the rows it diffs against under SQLite's write lock"""
+
+    def test_put_takes_write_lock(self):
+        profile = Profile.objects.create(name='Lock', email='lock@example.com')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put(f'/api/profiles/{profile.pk}/', {'name': 'Locked', 'email': 'lock@example.com'},
+                                       content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        statements = [query['sql'] for query in queries.captured_queries]
+        self.assertEqual(statements[0], 'BEGIN IMMEDIATE')
+
+
+class ReadRoutingTests(SimpleTestCase):
+    """Safe-method reads go to the read-only alias; everything else stays on default"""
+
+    def route(self, method):
+        router = ReadReplicaRouter()
+        request = mock.Mock(method=method)
+        middleware = ReadOnlyRequestMiddleware(
+            lambda request: (router.db_for_read(Profile), router.db_for_write(Profile))
+        )
+        return middleware(request)
+
+    def test_routing(self):
+        self.assertEqual(self.route('GET'), ('readonly', 'default'))
+        self.assertEqual(self.route('POST'), (None, 'default'))
+        # Only default can see a transaction's uncommitted rows.
+        with mock.patch.object(connections['default'], 'in_atomic_block', True):
+            self.assertEqual(self.route('GET'), (None, 'default'))
+        # Outside a request nothing is routed.
+        self.assertIsNone(ReadReplicaRouter().db_for_read(Profile))
+
+    def test_readonly_connections_refuse_writes(self):
+        # Under test the alias mirrors default, so check its init command itself.
+        db = sqlite3.connect(':memory:')
+        self.addCleanup(db.close)
+        db.executescript(settings.DATABASES['readonly']['OPTIONS']['init_command'])
+        with self.assertRaisesMessage(sqlite3.OperationalError, 'readonly'):
+            db.execute('CREATE TABLE t (id integer)')
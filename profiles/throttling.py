@@ -0,0 +1,220 @@
+"""
+Cost-weighted throttling and query budgets for the expensive endpoints.
+
+Views set ``throttle_scope`` and ``get_throttle_cost(request)``; every
+request is charged its cost against two token buckets, the client's and the
+endpoint's (shared by all clients), whose rates come from
+``DEFAULT_THROTTLE_RATES`` as ``'<scope>'`` and ``'<scope>:all'``, e.g.
+``'120/min'``: 120 cost units of burst, refilled over a minute. A refused
+request is answered 429 with ``Retry-After`` before it reaches the database.
+
+Buckets live in the ``THROTTLE_CACHE_ALIAS`` cache, one integer per key, so a
+shared backend (Redis) makes the limits hold across processes; locmem is the
+single-process stand-in and a cache that keeps nothing (dummy) disables
+throttling.
+
+``QueryBudgetMixin`` bounds how long a request's SQL may run: past the
+deadline SQLite's progress handler aborts the running statement and the
+request is answered 503 instead of holding a connection.
+"""
+import re
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import OperationalError, connections
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+# Weight of a search term by its shortest word: short substrings match, and
+# so read, far more rows than selective ones.
+SHORT_TERM_COSTS = {0: 8, 1: 8, 2: 4, 3: 2}
+# SQLite VM instructions between two deadline checks
+PROGRESS_INTERVAL = 1000
+
+
+def _cache():
+    return caches[getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default')]
+
+
+def term_cost(term):
+    """Throttle cost of a substring query, 1 for selective terms up to 8"""
+    words = re.findall(r'\w+', term or '')
+    shortest = min((len(word) for word in words), default=0)
+    return SHORT_TERM_COSTS.get(shortest, 1)
+
+
+def parse_rate(rate):
+    """``'120/min'`` -> ``(120, 60)``: tokens and the seconds they refill over"""
+    num, period = rate.split('/')
+    return int(num), DURATIONS[period[0]]
+
+
+class TokenBucket:
+    """
+    A token bucket stored as the time, in milliseconds, at which it will be
+    full again (GCRA). Spending moves that time forward with one atomic
+    ``incr``, so concurrent requests, in any process sharing the cache,
+    can't spend the same tokens twice.
+    """
+
+    def __init__(self, capacity, period):
+        self.interval = period * 1000 / capacity  # ms per token
+        self.limit = int(capacity * self.interval)
+        # A key that expires mid-debt resets the bucket to full, which this
+        # makes at most one extra burst every ten periods.
+        self.timeout = 10 * period
+
+    def spend(self, key, cost):
+        """Take ``cost`` tokens; returns 0, or the seconds until they are available"""
+        cache = _cache()
+        increment = min(max(int(cost * self.interval), 1), self.limit)
+        now = int(time.time() * 1000)
+        try:
+            full_at = cache.incr(key, increment)
+        except ValueError:
+            cache.add(key, now, timeout=self.timeout)
+            try:
+                full_at = cache.incr(key, increment)
+            except ValueError:
+                return 0
+        if full_at - increment < now:
+            # Idle long enough to refill completely: count from now instead.
+            full_at = cache.incr(key, now - (full_at - increment))
+        if full_at - now > self.limit:
+            cache.decr(key, increment)
+            return (full_at - now - self.limit) / 1000
+        return 0
+
+    def refund(self, key, cost):
+        try:
+            _cache().decr(key, min(max(int(cost * self.interval), 1), self.limit))
+        except ValueError:
+            pass
+
+
+def _bucket(scope):
+    rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+    return TokenBucket(*parse_rate(rate)) if rate else None
+
+
+def client_ident(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return BaseThrottle().get_ident(request)
+
+
+def consume(request, scope, cost=1):
+    """
+    Charge ``cost`` to the client's bucket and then the endpoint's.
+
+    Returns 0 when admitted, else the seconds to wait. A refused request
+    takes nothing from either bucket, so one client hammering an endpoint
+    only drains its own.
+    """
+    client = _bucket(scope)
+    endpoint = _bucket(f'{scope}:all')
+    client_key = f'profiles:throttle:{scope}:{client_ident(request)}'
+    endpoint_key = f'profiles:throttle:{scope}:all'
+    if client is not None:
+        wait = client.spend(client_key, cost)
+        if wait:
+            return wait
+    if endpoint is not None:
+        wait = endpoint.spend(endpoint_key, cost)
+        if wait:
+            if client is not None:
+                client.refund(client_key, cost)
+            return wait
+    return 0
+
+
+class CostThrottle(BaseThrottle):
+    """Charge ``view.get_throttle_cost(request)`` to the view's scope"""
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if not scope:
+            return True
+        get_cost = getattr(view, 'get_throttle_cost', None)
+        self.delay = consume(request, scope, get_cost(request) if get_cost else 1)
+        return not self.delay
+
+    def wait(self):
+        return self.delay
+
+
+class QueryBudgetExceeded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The query ran out of time. Try a more specific query.'
+    default_code = 'query_budget_exceeded'
+
+
+class query_budget:
+    """
+    Abort SQLite statements once ``seconds`` have passed since entering.
+
+    The progress handler is installed on each connection at its first query
+    in the block and removed on exit, so persistent connections are left as
+    they were. Other backends run unbounded.
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.deadline = None
+        self._installed = []
+        self._stack = ExitStack()
+
+    @property
+    def exhausted(self):
+        return self.deadline is not None and time.monotonic() > self.deadline
+
+    def _progress(self):
+        # Non-zero aborts the statement with "interrupted".
+        return int(time.monotonic() > self.deadline)
+
+    def _install(self, execute, sql, params, many, context):
+        connection = context['connection']
+        if connection.vendor == 'sqlite' and connection not in self._installed:
+            connection.connection.set_progress_handler(self._progress, PROGRESS_INTERVAL)
+            self._installed.append(connection)
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self.deadline = time.monotonic() + self.seconds
+        for alias in connections:
+            self._stack.enter_context(connections[alias].execute_wrapper(self._install))
+        return self
+
+    def __exit__(self, *exc_info):
+        for connection in self._installed:
+            if connection.connection is not None:
+                connection.connection.set_progress_handler(None, 0)
+        self._installed = []
+        self._stack.close()
+
+
+class QueryBudgetMixin:
+    """
+    Run the view under the ``QUERY_BUDGETS`` entry for its
+    ``throttle_scope``, answering 503 when a query is cut off by it.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        seconds = getattr(settings, 'QUERY_BUDGETS', {}).get(getattr(self, 'throttle_scope', None))
+        if seconds is None:
+            self.query_budget = None
+            return super().dispatch(request, *args, **kwargs)
+        with query_budget(seconds) as self.query_budget:
+            return super().dispatch(request, *args, **kwargs)
+
+    def handle_exception(self, exc):
+        if (isinstance(exc, OperationalError) and self.query_budget is not None
+                and self.query_budget.exhausted):
+            exc = QueryBudgetExceeded()
+        return super().handle_exception(exc)
@@ -1,14 +1,20 @@
 from django.urls import path
-from . import views
+from . import async_views, batch, bulk, views
 
 urlpatterns = [
     # Health check
     path('health/', views.health_check, name='health-check'),
+    path('metrics/', views.metrics, name='metrics'),
     
     # Profile endpoints
     path('profiles/', views.ProfileListCreateView.as_view(), name='profile-list-create'),
     path('profiles/<int:pk>/', views.ProfileDetailView.as_view(), name='profile-detail'),
     path('profile/summary/', views.ProfileSummaryView.as_view(), name='profile-summary'),
+    path('profiles/<int:pk>/education/', views.ProfileEducationListView.as_view(), name='profile-education-list'),
+    path('profiles/<int:pk>/skills/', views.ProfileSkillListView.as_view(), name='profile-skill-list'),
+    path('profiles/<int:pk>/projects/', views.ProfileProjectListView.as_view(), name='profile-project-list'),
+    path('profiles/<int:pk>/work-experience/', views.ProfileWorkExperienceListView.as_view(), name='profile-work-experience-list'),
+    path('profiles/<int:pk>/social-links/', views.ProfileSocialLinkListView.as_view(), name='profile-social-link-list'),
     
     # Education endpoints
     path('education/', views.EducationListCreateView.as_view(), name='education-list-create'),
@@ -18,11 +24,15 @@ urlpatterns = [
     path('skills/', views.SkillListCreateView.as_view(), name='skill-list-create'),
     path('skills/<int:pk>/', views.SkillDetailView.as_view(), name='skill-detail'),
     path('skills/top/', views.TopSkillsView.as_view(), name='top-skills'),
+    path('skills/bulk/', bulk.SkillBulkView.as_view(), name='skill-bulk'),
     
     # Projects endpoints
     path('projects/', views.ProjectListCreateView.as_view(), name='project-list-create'),
     path('projects/<int:pk>/', views.ProjectDetailView.as_view(), name='project-detail'),
     path('projects/by-skill/', views.ProjectsBySkillView.as_view(), name='projects-by-skill'),
+    path('projects/bulk/', bulk.ProjectBulkView.as_view(), name='project-bulk'),
+    path('project-links/bulk/', bulk.ProjectLinkBulkView.as_view(), name='project-link-bulk'),
+    path('project-skills/bulk/', bulk.ProjectSkillBulkView.as_view(), name='project-skill-bulk'),
     
     # Work Experience endpoints
     path('work-experience/', views.WorkExperienceListCreateView.as_view(), name='work-experience-list-create'),
@@ -34,4 +44,15 @@ urlpatterns = [
     
     # Search endpoint
     path('search/', views.SearchView.as_view(), name='search'),
+
+    # Async variants for ASGI deployments
+    path('async/search/', async_views.search, name='search-async'),
+    path('async/profile/summary/', async_views.profile_summary, name='profile-summary-async'),
+    path('events/', async_views.events, name='events'),
+
+    # Bulk export
+    path('export/', views.ExportView.as_view(), name='export'),
+
+    # Several GET requests in one round trip
+    path('batch/', batch.BatchView.as_view(), name='batch'),
 ]
@@ -1,19 +1,36 @@
+from django.db import DEFAULT_DB_ALIAS, transaction
 from django.shortcuts import render
-from django.db.models import Q, Count
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
 from rest_framework import generics, status
 from rest_framework.decorators import api_view
+from rest_framework.exceptions import ParseError
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 from .models import (
-    Profile, Education, Skill, Project, ProjectLink,
+    Profile, Education, Skill, SkillStats, Project, ProjectLink,
     ProjectSkill, WorkExperience, SocialLink
 )
 from .serializers import (
     ProfileSerializer, ProfileSummarySerializer, EducationSerializer,
-    SkillSerializer, SkillSummarySerializer, ProjectSerializer,
-    ProjectSummarySerializer, WorkExperienceSerializer, SocialLinkSerializer
+    SkillSerializer, SkillSummarySerializer, SkillStatsSerializer,
+    ProjectSerializer, ProjectSummarySerializer, WorkExperienceSerializer,
+    SocialLinkSerializer
 )
+from . import search, stats, taxonomy
+from .export import iter_ndjson
+from .filters import Filter
+from .ingest import ProfileIngestSerializer
+from .fieldsets import FieldsetMixin, apply_fieldsets, requested_fieldsets
+from .lean import LeanListMixin, lean_for, lean_requested, lean_serializer
+from .metrics import registry
+from .cache import (
+    GLOBAL_SCOPE, VersionedCacheMixin, cached_value, profile_scope, tagged_response
+)
+from .queries import PlannedQuerysetMixin, plan_queryset
+from .renderers import NDJSONRenderer
+from .throttling import CostThrottle, QueryBudgetMixin, term_cost
 
 
 # Health check endpoint
@@ -27,76 +44,185 @@ def health_check(request):
     })
 
 
+def metrics(request):
+    """GET /metrics - Per-endpoint latency and query metrics, Prometheus text format"""
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 # Profile CRUD endpoints
-class ProfileListCreateView(generics.ListCreateAPIView):
+class ProfileListCreateView(FieldsetMixin, PlannedQuerysetMixin, generics.ListCreateAPIView):
     queryset = Profile.objects.all()
+    keyset_ordering = ('created_at', 'id')
     serializer_class = ProfileSerializer
 
+    def get_serializer_class(self):
+        # POST takes the whole nested document (profiles/ingest.py)
+        if self.request.method == 'POST':
+            return ProfileIngestSerializer
+        return super().get_serializer_class()
+
 
-class ProfileDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ProfileDetailView(VersionedCacheMixin, FieldsetMixin, PlannedQuerysetMixin,
+                        generics.RetrieveUpdateDestroyAPIView):
     queryset = Profile.objects.all()
     serializer_class = ProfileSerializer
 
+    def get_cache_scope(self):
+        return profile_scope(self.kwargs['pk'])
+
+    def get_serializer_class(self):
+        # PUT replaces the nested document; PATCH stays field by field.
+        if self.request.method == 'PUT':
+            return ProfileIngestSerializer
+        return super().get_serializer_class()
+
+    def update(self, request, *args, **kwargs):
+        if kwargs.get('partial'):
+            return super().update(request, *args, **kwargs)
+        # The default alias opens transactions with BEGIN IMMEDIATE
+        # (transaction_mode in settings), so the rows a PUT diffs against are
+        # read under SQLite's write lock: a concurrent PUT waits for this one
+        # to commit instead of diffing against rows about to change.
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            return super().update(request, *args, **kwargs)
+
+
+# Per-profile child lists
+class ProfileChildListView(VersionedCacheMixin, FieldsetMixin, PlannedQuerysetMixin,
+                           generics.ListAPIView):
+    """Read-only list of one profile's rows, cached under its version"""
+
+    def get_cache_scope(self):
+        return profile_scope(self.kwargs['pk'])
+
+    def get_queryset(self):
+        return super().get_queryset().filter(profile_id=self.kwargs['pk'])
+
+
+class ProfileEducationListView(ProfileChildListView):
+    queryset = Education.objects.all()
+    keyset_ordering = ('start_date', 'id')
+    serializer_class = EducationSerializer
+
+
+class ProfileSkillListView(ProfileChildListView):
+    queryset = Skill.objects.all()
+    serializer_class = SkillSerializer
+
+
+class ProfileProjectListView(ProfileChildListView):
+    queryset = Project.objects.all()
+    keyset_ordering = ('created_at', 'id')
+    serializer_class = ProjectSerializer
+
+
+class ProfileWorkExperienceListView(ProfileChildListView):
+    queryset = WorkExperience.objects.all()
+    keyset_ordering = ('start_date', 'id')
+    serializer_class = WorkExperienceSerializer
+
+
+class ProfileSocialLinkListView(ProfileChildListView):
+    queryset = SocialLink.objects.all()
+    serializer_class = SocialLinkSerializer
+
 
 # Education CRUD endpoints
-class EducationListCreateView(generics.ListCreateAPIView):
+class EducationListCreateView(PlannedQuerysetMixin, generics.ListCreateAPIView):
     queryset = Education.objects.all()
+    keyset_ordering = ('start_date', 'id')
+    filters = {
+        'profile': Filter('profile', ['exact', 'in']),
+        'start_date': Filter('start_date', ['gte', 'lte']),
+    }
+    ordering_fields = ['start_date']
     serializer_class = EducationSerializer
 
 
-class EducationDetailView(generics.RetrieveUpdateDestroyAPIView):
+class EducationDetailView(PlannedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Education.objects.all()
     serializer_class = EducationSerializer
 
 
 # Skills CRUD endpoints
-class SkillListCreateView(generics.ListCreateAPIView):
+class SkillListCreateView(LeanListMixin, PlannedQuerysetMixin, generics.ListCreateAPIView):
     queryset = Skill.objects.all()
+    filters = {
+        'profile': Filter('profile', ['exact', 'in']),
+        'level': Filter('level', ['exact', 'in']),
+        'name': Filter('name', ['exact', 'iexact']),
+        'years_experience': Filter('years_experience', ['gte', 'lte']),
+    }
+    ordering_fields = ['name', 'years_experience']
     serializer_class = SkillSerializer
 
 
-class SkillDetailView(generics.RetrieveUpdateDestroyAPIView):
+class SkillDetailView(PlannedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Skill.objects.all()
     serializer_class = SkillSerializer
 
 
 # Projects CRUD endpoints
-class ProjectListCreateView(generics.ListCreateAPIView):
+class ProjectListCreateView(FieldsetMixin, LeanListMixin, PlannedQuerysetMixin,
+                            generics.ListCreateAPIView):
     queryset = Project.objects.all()
+    keyset_ordering = ('created_at', 'id')
+    filters = {
+        'profile': Filter('profile', ['exact', 'in']),
+        'is_ongoing': Filter('is_ongoing'),
+        'start_date': Filter('start_date', ['gte', 'lte']),
+        'created_at': Filter('created_at', ['gte', 'lte']),
+        'link_type': Filter('links__link_type', ['exact', 'in']),
+    }
+    ordering_fields = ['created_at']
     serializer_class = ProjectSerializer
 
 
-class ProjectDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ProjectDetailView(FieldsetMixin, PlannedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer
 
 
 # Work Experience CRUD endpoints
-class WorkExperienceListCreateView(generics.ListCreateAPIView):
+class WorkExperienceListCreateView(PlannedQuerysetMixin, generics.ListCreateAPIView):
     queryset = WorkExperience.objects.all()
+    keyset_ordering = ('start_date', 'id')
+    filters = {
+        'profile': Filter('profile', ['exact', 'in']),
+        'is_current': Filter('is_current'),
+        'start_date': Filter('start_date', ['gte', 'lte']),
+    }
+    ordering_fields = ['start_date']
     serializer_class = WorkExperienceSerializer
 
 
-class WorkExperienceDetailView(generics.RetrieveUpdateDestroyAPIView):
+class WorkExperienceDetailView(PlannedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = WorkExperience.objects.all()
     serializer_class = WorkExperienceSerializer
 
 
 # Social Links CRUD endpoints
-class SocialLinkListCreateView(generics.ListCreateAPIView):
+class SocialLinkListCreateView(PlannedQuerysetMixin, generics.ListCreateAPIView):
     queryset = SocialLink.objects.all()
     serializer_class = SocialLinkSerializer
 
 
-class SocialLinkDetailView(generics.RetrieveUpdateDestroyAPIView):
+class SocialLinkDetailView(PlannedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = SocialLink.objects.all()
     serializer_class = SocialLinkSerializer
 
 
 # Specialized Query Endpoints
-class ProjectsBySkillView(APIView):
+class ProjectsBySkillView(QueryBudgetMixin, APIView):
     """GET /projects?skill=python - Filter projects by skill"""
 
+    throttle_classes = [CostThrottle]
+    throttle_scope = 'projects-by-skill'
+
+    def get_throttle_cost(self, request):
+        # The skill is a substring of catalog keys: short ones match many.
+        return term_cost(request.query_params.get('skill'))
+
     def get(self, request):
         skill_name = request.query_params.get('skill')
         if not skill_name:
@@ -104,76 +230,142 @@ class ProjectsBySkillView(APIView):
                           status=status.HTTP_400_BAD_REQUEST)
 
         projects = Project.objects.filter(
-            project_skills__skill__name__icontains=skill_name
-        ).distinct()
-
-        serializer = ProjectSummarySerializer(projects, many=True)
+            project_skills__skill__canonical_id__in=taxonomy.matching_canonical_ids(skill_name)
+        ).distinct().order_by('pk')
+
+        fieldsets = requested_fieldsets(request)
+        shape = apply_fieldsets(ProjectSummarySerializer(), *fieldsets)
+        if lean_requested(request):
+            lean = lean_for(shape)
+            data = lean.serialize(lean.values(projects))
+        else:
+            data = apply_fieldsets(
+                ProjectSummarySerializer(plan_queryset(projects, shape), many=True), *fieldsets
+            ).data
         return Response({
             'skill': skill_name,
-            'count': projects.count(),
-            'projects': serializer.data
+            'count': len(data),
+            'projects': data
         })
 
 
 class TopSkillsView(APIView):
-    """GET /skills/top - Get top skills by usage in projects"""
+    """
+    GET /skills/top - Get top catalog skills by usage in projects
 
-    def get(self, request):
-        limit = int(request.query_params.get('limit', 10))
+    Items are catalog entries (``id``, ``name``, ``projects_count``,
+    ``profiles_count``), not individual profiles' skills.
+    """
 
-        skills = Skill.objects.annotate(
-            project_count=Count('projectskill')
-        ).order_by('-project_count', '-years_experience')[:limit]
+    max_limit = 100
 
-        serializer = SkillSummarySerializer(skills, many=True)
-        return Response({
-            'count': skills.count(),
-            'skills': serializer.data
-        })
+    @classmethod
+    def parse_limit(cls, params):
+        """``?limit=`` clamped to ``1..max_limit``, raising ParseError"""
+        try:
+            limit = int(params.get('limit', 10))
+        except ValueError:
+            raise ParseError({'error': 'limit must be an integer'})
+        return min(max(limit, 1), cls.max_limit)
 
+    def get(self, request):
+        limit = self.parse_limit(request.query_params)
+        data, tag = self.cached_top_skills(limit, lean_requested(request))
+        return tagged_response(request, tag, {
+            'count': len(data),
+            'skills': data
+        })
 
-class SearchView(APIView):
+    @staticmethod
+    def top_skills_data(limit=10, lean=False):
+        # Catalog entries rank together ("Python" and "python 3"); the
+        # counts are maintained on write, so this reads one index range.
+        skills = SkillStats.objects.order_by('-projects_count', '-profiles_count', 'name')
+
+        if lean:
+            serializer = lean_serializer(SkillStatsSerializer)
+            return serializer.serialize(serializer.values(skills)[:limit])
+        return SkillStatsSerializer(skills[:limit], many=True).data
+
+    @classmethod
+    def cached_top_skills(cls, limit=10, lean=False, refresh=False):
+        """
+        ``(data, tag)`` for ``top_skills_data()``, served stale-while-revalidate.
+        ``limit`` is part of the cache key, so callers pass it through
+        ``parse_limit()`` first.
+        """
+        # Any project or skill write can reorder the ranking.
+        return cached_value('top-skills', GLOBAL_SCOPE, cls.top_skills_data, limit, lean,
+                            refresh=refresh)
+
+
+class SearchView(QueryBudgetMixin, APIView):
     """GET /search?q=... - Search across projects, skills, and work experience"""
 
-    def get(self, request):
-        query = request.query_params.get('q')
+    throttle_classes = [CostThrottle]
+    throttle_scope = 'search'
+    max_page_size = 100
+    categories = {
+        'projects': (Project, ProjectSummarySerializer),
+        'skills': (Skill, SkillSummarySerializer),
+        'work_experience': (WorkExperience, WorkExperienceSerializer),
+    }
+
+    @classmethod
+    def parse_params(cls, params):
+        """Return ``(query, page, page_size)``, raising ParseError"""
+        query = params.get('q')
         if not query:
-            return Response({'error': 'q parameter is required'},
-                          status=status.HTTP_400_BAD_REQUEST)
-
-        # Search projects
-        projects = Project.objects.filter(
-            Q(title__icontains=query) |
-            Q(description__icontains=query)
-        ).distinct()
-
-        # Search skills
-        skills = Skill.objects.filter(
-            name__icontains=query
-        ).distinct()
-
-        # Search work experience
-        work_experience = WorkExperience.objects.filter(
-            Q(company__icontains=query) |
-            Q(position__icontains=query) |
-            Q(description__icontains=query)
-        ).distinct()
+            raise ParseError({'error': 'q parameter is required'})
+        try:
+            page = max(int(params.get('page', 1)), 1)
+            page_size = min(
+                max(int(params.get('page_size', api_settings.PAGE_SIZE)), 1),
+                cls.max_page_size
+            )
+        except ValueError:
+            raise ParseError({'error': 'page and page_size must be integers'})
+        return query, page, page_size
+
+    @classmethod
+    def query_cost(cls, params):
+        """Throttle cost: the term's selectivity plus one per 100 hits skipped"""
+        try:
+            query, page, page_size = cls.parse_params(params)
+        except ParseError:
+            return 1
+        return term_cost(query) + (page - 1) * page_size // 100
+
+    def get_throttle_cost(self, request):
+        return self.query_cost(request.query_params)
+
+    @classmethod
+    def search_category(cls, name, query, page, page_size):
+        """One page of ranked, serialized hits for a category"""
+        model, serializer_class = cls.categories[name]
+        count, hits = search.search(name, query, (page - 1) * page_size, page_size)
+        objects = plan_queryset(model.objects.all(), serializer_class).in_bulk(
+            [pk for pk, _ in hits]
+        )
+        # Keep the ranked order; skip rows deleted since they were indexed.
+        hits = [(objects[pk], snippet) for pk, snippet in hits if pk in objects]
+        data = serializer_class([obj for obj, _ in hits], many=True).data
+        for item, (_, snippet) in zip(data, hits):
+            item['snippet'] = snippet
+        return {
+            'count': count,
+            'page': page,
+            'page_size': page_size,
+            'data': data
+        }
 
+    def get(self, request):
+        query, page, page_size = self.parse_params(request.query_params)
         return Response({
             'query': query,
             'results': {
-                'projects': {
-                    'count': projects.count(),
-                    'data': ProjectSummarySerializer(projects, many=True).data
-                },
-                'skills': {
-                    'count': skills.count(),
-                    'data': SkillSummarySerializer(skills, many=True).data
-                },
-                'work_experience': {
-                    'count': work_experience.count(),
-                    'data': WorkExperienceSerializer(work_experience, many=True).data
-                }
+                name: self.search_category(name, query, page, page_size)
+                for name in self.categories
             }
         })
 
@@ -182,14 +374,47 @@ class ProfileSummaryView(APIView):
     """GET /profile/summary - Get profile summary with counts"""
 
     def get(self, request):
-        try:
-            profile = Profile.objects.first()  # Get the first profile
-            if not profile:
-                return Response({'error': 'No profile found'},
-                              status=status.HTTP_404_NOT_FOUND)
-
-            serializer = ProfileSummarySerializer(profile)
-            return Response(serializer.data)
-        except Profile.DoesNotExist:
-            return Response({'error': 'Profile not found'},
+        data, tag = self.cached_summary(lean_requested(request), *requested_fieldsets(request))
+        if data is None:
+            return Response({'error': 'No profile found'},
                           status=status.HTTP_404_NOT_FOUND)
+        return tagged_response(request, tag, data)
+
+    @staticmethod
+    def summary_data(lean=False, fields=None, expand=None):
+        """Summary of the first profile, or None when there are no profiles"""
+        # Counts come from the stats table rather than per-request COUNTs.
+        profiles = stats.annotate_profile_counts(Profile.objects.order_by('pk'))
+        if lean:
+            serializer = lean_for(apply_fieldsets(ProfileSummarySerializer(), fields, expand))
+            rows = serializer.serialize(serializer.values(profiles)[:1])
+            return rows[0] if rows else None
+        profile = profiles.first()
+        if not profile:
+            return None
+        return apply_fieldsets(ProfileSummarySerializer(profile), fields, expand).data
+
+    @classmethod
+    def cached_summary(cls, lean=False, fields=None, expand=None, refresh=False):
+        """``(data, tag)`` for ``summary_data()``, served stale-while-revalidate"""
+        # Which profile is "first" can change with any write.
+        return cached_value('profile-summary', GLOBAL_SCOPE, cls.summary_data, lean, fields, expand,
+                            refresh=refresh)
+
+
+class ExportView(APIView):
+    """GET /export?format=ndjson - Stream every profile, one document per line"""
+    renderer_classes = [NDJSONRenderer]
+
+    def get(self, request):
+        try:
+            batch_size = min(max(int(request.query_params.get('batch_size', 500)), 1), 2000)
+        except ValueError:
+            batch_size = 500
+
+        response = StreamingHttpResponse(
+            iter_ndjson(batch_size=batch_size),
+            content_type='application/x-ndjson; charset=utf-8'
+        )
+        response['Content-Disposition'] = 'attachment; filename="profiles.ndjson"'
+        return response